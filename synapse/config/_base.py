@@ -21,6 +21,7 @@
 #
 
 import argparse
+import bisect
 import errno
 import logging
 import os
@@ -942,6 +943,19 @@ def find_config_files(search_paths: List[str]) -> List[str]:
     return config_files
 
 
+# The number of points each instance gets on the hash ring when using consistent
+# hashing. More points give a more even distribution of keys between instances,
+# at the cost of a larger ring to search.
+_CONSISTENT_HASHING_VIRTUAL_NODES = 160
+
+
+def _hash_to_int(value: str) -> int:
+    """Hash the given string to a 64-bit integer, used for placing keys and
+    instances on the consistent hash ring.
+    """
+    return int.from_bytes(sha256(value.encode("utf8")).digest()[:8], byteorder="little")
+
+
 @attr.s(auto_attribs=True)
 class ShardedWorkerHandlingConfig:
     """Algorithm for choosing which instance is responsible for handling some
@@ -950,9 +964,25 @@ class ShardedWorkerHandlingConfig:
     For example, the federation senders use this to determine which instances
     handles sending stuff to a given destination (which is used as the `key`
     below).
+
+    By default keys are assigned by taking their hash modulo the number of
+    instances, which means that changing the set of instances reassigns almost
+    every key. If `consistent_hashing` is set then keys are instead assigned
+    using a hash ring with virtual nodes, so that adding or removing an instance
+    only moves roughly `1/N` of the keys.
     """
 
     instances: List[str]
+    consistent_hashing: bool = False
+
+    # The hash ring, lazily built from `instances`. A sorted list of the ring
+    # positions, the instance at each position, and the instances the ring was
+    # built from (so that we can spot if `instances` is changed under us).
+    _ring_hashes: List[int] = attr.ib(init=False, factory=list, repr=False)
+    _ring_instances: List[str] = attr.ib(init=False, factory=list, repr=False)
+    _ring_built_from: Optional[Tuple[str, ...]] = attr.ib(
+        init=False, default=None, repr=False
+    )
 
     def should_handle(self, instance_name: str, key: str) -> bool:
         """Whether this instance is responsible for handling the given key."""
@@ -977,6 +1007,9 @@ class ShardedWorkerHandlingConfig:
         if len(self.instances) == 1:
             return self.instances[0]
 
+        if self.consistent_hashing:
+            return self._get_instance_from_ring(key)
+
         # We shard by taking the hash, modulo it by the number of instances and
         # then checking whether this instance matches the instance at that
         # index.
@@ -988,6 +1021,25 @@ class ShardedWorkerHandlingConfig:
         remainder = dest_int % (len(self.instances))
         return self.instances[remainder]
 
+    def _get_instance_from_ring(self, key: str) -> str:
+        """Get the instance responsible for the given key using the consistent
+        hash ring: the key is handled by the first instance found walking
+        clockwise around the ring from the key's hash.
+        """
+        instances = tuple(self.instances)
+        if self._ring_built_from != instances:
+            ring = sorted(
+                (_hash_to_int(f"{instance}-{i}"), instance)
+                for instance in set(instances)
+                for i in range(_CONSISTENT_HASHING_VIRTUAL_NODES)
+            )
+            self._ring_hashes = [position for position, _ in ring]
+            self._ring_instances = [instance for _, instance in ring]
+            self._ring_built_from = instances
+
+        index = bisect.bisect_right(self._ring_hashes, _hash_to_int(key))
+        return self._ring_instances[index % len(self._ring_instances)]
+
 
 @attr.s
 class RoutableShardedWorkerHandlingConfig(ShardedWorkerHandlingConfig):
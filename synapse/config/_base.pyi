@@ -202,7 +202,10 @@ def find_config_files(search_paths: List[str]) -> List[str]: ...
 
 class ShardedWorkerHandlingConfig:
     instances: List[str]
-    def __init__(self, instances: List[str]) -> None: ...
+    consistent_hashing: bool
+    def __init__(
+        self, instances: List[str], consistent_hashing: bool = False
+    ) -> None: ...
     def should_handle(self, instance_name: str, key: str) -> bool: ...  # noqa: F811
 
 class RoutableShardedWorkerHandlingConfig(ShardedWorkerHandlingConfig):
@@ -22,7 +22,7 @@ from typing import Any
 
 from synapse.types import JsonDict
 
-from ._base import Config
+from ._base import Config, ConfigError
 
 
 class BackgroundUpdateConfig(Config):
@@ -42,3 +42,23 @@ class BackgroundUpdateConfig(Config):
         self.min_batch_size = bg_update_config.get("min_batch_size", 1)
 
         self.default_batch_size = bg_update_config.get("default_batch_size", 100)
+
+        self.max_concurrent_updates = bg_update_config.get("max_concurrent_updates", 1)
+        if (
+            not isinstance(self.max_concurrent_updates, int)
+            or self.max_concurrent_updates < 1
+        ):
+            raise ConfigError(
+                "max_concurrent_updates must be a positive integer",
+                ("background_updates", "max_concurrent_updates"),
+            )
+
+        self.database_load_threshold = bg_update_config.get("database_load_threshold")
+        if self.database_load_threshold is not None and (
+            not isinstance(self.database_load_threshold, (int, float))
+            or self.database_load_threshold <= 0
+        ):
+            raise ConfigError(
+                "database_load_threshold must be a positive number",
+                ("background_updates", "database_load_threshold"),
+            )
@@ -22,7 +22,7 @@
 import argparse
 import logging
 import os
-from typing import Any, List
+from typing import Any, List, Optional
 
 from synapse.config._base import Config, ConfigError
 from synapse.types import JsonDict
@@ -50,8 +50,9 @@ class DatabaseConnectionConfig:
         db_config: The config for a particular database, as per `database`
             section of main config. Has three fields: `name` for database
             module name, `args` for the args to give to the database
-            connector, and optional `data_stores` that is a list of stores to
-            provision on this database (defaulting to all).
+            connector, optional `data_stores` that is a list of stores to
+            provision on this database (defaulting to all), and an optional
+            `replica` giving the connection `args` for a read replica.
     """
 
     def __init__(self, name: str, db_config: dict):
@@ -76,6 +77,30 @@ class DatabaseConnectionConfig:
         # changed the name).
         self.databases = data_stores
 
+        # The config for a read replica of this database, if any. The replica
+        # connection args default to those of the primary.
+        self.replica: Optional[DatabaseConnectionConfig] = None
+        replica_config = db_config.get("replica")
+        if replica_config is not None:
+            if db_engine != "psycopg2":
+                raise ConfigError(
+                    "Read replicas are only supported with PostgreSQL",
+                    ("database", "replica"),
+                )
+            if not isinstance(replica_config, dict):
+                raise ConfigError("Must be a dictionary", ("database", "replica"))
+
+            self.replica = DatabaseConnectionConfig(
+                f"{name}-replica",
+                {
+                    "name": db_engine,
+                    "args": {
+                        **db_config.get("args", {}),
+                        **replica_config.get("args", {}),
+                    },
+                },
+            )
+
 
 class DatabaseConfig(Config):
     section = "database"
@@ -794,6 +794,30 @@ class ServerConfig(Config):
         else:
             self.max_event_delay_ms = None
 
+        # How long to hold on to read receipts sent by clients before persisting
+        # them, so that multiple receipts from the same user can be coalesced.
+        self.receipts_coalescing_window_ms = self.parse_duration(
+            config.get("receipts_coalescing_window", 0)
+        )
+        if self.receipts_coalescing_window_ms < 0:
+            raise ConfigError("receipts_coalescing_window must not be negative")
+
+        # How long to wait for events in other rooms to become ready to persist,
+        # so that they can be persisted in the same transaction.
+        self.event_persistence_batching_window_ms = self.parse_duration(
+            config.get("event_persistence_batching_window", 0)
+        )
+        if self.event_persistence_batching_window_ms < 0:
+            raise ConfigError("event_persistence_batching_window must not be negative")
+
+        # How often to look for frequently read state groups at the end of long
+        # delta chains, and rewrite them to store their full state.
+        self.state_group_snapshot_interval_ms = self.parse_duration(
+            config.get("state_group_snapshot_interval", 0)
+        )
+        if self.state_group_snapshot_interval_ms < 0:
+            raise ConfigError("state_group_snapshot_interval must not be negative")
+
     def has_tls_listener(self) -> bool:
         return any(listener.is_tls() for listener in self.listeners)
 
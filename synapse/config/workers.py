@@ -154,8 +154,8 @@ class WriterLocations:
             can only be a single instance.
         receipts: The instances that write to the receipts stream. Currently
             can only be a single instance.
-        presence: The instances that write to the presence stream. Currently
-            can only be a single instance.
+        presence: The instances that write to the presence stream. Local users
+            are sharded between the instances by user ID.
         push_rules: The instances that write to the push stream. Currently
             can only be a single instance.
     """
@@ -275,7 +275,10 @@ class WorkerConfig(Config):
         )
         self.send_federation = self.instance_name in federation_sender_instances
         self.federation_shard_config = ShardedWorkerHandlingConfig(
-            federation_sender_instances
+            federation_sender_instances,
+            consistent_hashing=bool(
+                config.get("federation_sender_consistent_hashing", False)
+            ),
         )
 
         # A map from instance name to host/port of their HTTP replication endpoint.
@@ -381,9 +384,9 @@ class WorkerConfig(Config):
         if len(self.writers.events) == 0:
             raise ConfigError("Must specify at least one instance to handle `events`.")
 
-        if len(self.writers.presence) != 1:
+        if len(self.writers.presence) == 0:
             raise ConfigError(
-                "Must only specify one instance to handle `presence` messages."
+                "Must specify at least one instance to handle `presence` messages."
             )
 
         if len(self.writers.push_rules) != 1:
@@ -395,6 +398,19 @@ class WorkerConfig(Config):
             self.writers.events
         )
 
+        self.presence_shard_config = RoutableShardedWorkerHandlingConfig(
+            self.writers.presence
+        )
+
+        # The number of stream IDs that a stream writer reserves from the
+        # database at a time, and then hands out locally.
+        self.stream_id_block_size = config.get("stream_id_block_size", 1)
+        if (
+            not isinstance(self.stream_id_block_size, int)
+            or self.stream_id_block_size < 1
+        ):
+            raise ConfigError("Must be a positive integer", ("stream_id_block_size",))
+
         # Handle sharded push
         pusher_instances = self._worker_names_performing_this_duty(
             config,
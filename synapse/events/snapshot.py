@@ -130,6 +130,12 @@ class EventContext(UnpersistedEventContextBase):
 
         partial_state: if True, we may be storing this event with a temporary,
             incomplete state.
+
+        state_from_prev_events: True if the state before the event was calculated
+            by resolving the state at the event's prev_events, rather than being
+            supplied by the caller. If the room's forward extremities are still
+            exactly those prev_events when the event is persisted, the change to
+            the room's current state is just the delta due to the event.
     """
 
     _storage: "StorageControllers"
@@ -141,6 +147,7 @@ class EventContext(UnpersistedEventContextBase):
     app_service: Optional[ApplicationService] = None
 
     partial_state: bool = False
+    state_from_prev_events: bool = False
 
     @staticmethod
     def with_state(
@@ -150,6 +157,7 @@ class EventContext(UnpersistedEventContextBase):
         state_delta_due_to_event: Optional[StateMap[str]],
         partial_state: bool,
         state_group_deltas: Dict[Tuple[int, int], StateMap[str]],
+        state_from_prev_events: bool = False,
     ) -> "EventContext":
         return EventContext(
             storage=storage,
@@ -158,6 +166,7 @@ class EventContext(UnpersistedEventContextBase):
             state_delta_due_to_event=state_delta_due_to_event,
             state_group_deltas=state_group_deltas,
             partial_state=partial_state,
+            state_from_prev_events=state_from_prev_events,
         )
 
     @staticmethod
@@ -191,6 +200,7 @@ class EventContext(UnpersistedEventContextBase):
             ),
             "app_service_id": self.app_service.id if self.app_service else None,
             "partial_state": self.partial_state,
+            "state_from_prev_events": self.state_from_prev_events,
         }
 
     @staticmethod
@@ -218,6 +228,7 @@ class EventContext(UnpersistedEventContextBase):
             ),
             rejected=input["rejected"],
             partial_state=input.get("partial_state", False),
+            state_from_prev_events=input.get("state_from_prev_events", False),
         )
 
         app_service_id = input["app_service_id"]
@@ -345,6 +356,10 @@ class UnpersistedEventContext(UnpersistedEventContextBase):
 
         state_map_before_event:
             A map of the state before the event, i.e. the state at `state_group_before_event`
+
+        state_from_prev_events:
+            Whether the state before the event was resolved across the event's
+            prev_events. See `EventContext.state_from_prev_events`.
     """
 
     _storage: "StorageControllers"
@@ -355,6 +370,7 @@ class UnpersistedEventContext(UnpersistedEventContextBase):
     delta_ids_to_state_group_before_event: Optional[StateMap[str]]
     partial_state: bool
     state_map_before_event: Optional[StateMap[str]] = None
+    state_from_prev_events: bool = False
 
     @classmethod
     async def batch_persist_unpersisted_contexts(
@@ -390,6 +406,7 @@ class UnpersistedEventContext(UnpersistedEventContextBase):
                 state_delta_due_to_event=unpersisted_context.state_delta_due_to_event,
                 partial_state=unpersisted_context.partial_state,
                 state_group_deltas=state_group_deltas,
+                state_from_prev_events=unpersisted_context.state_from_prev_events,
             )
             events_and_persisted_context.append((event, context))
         return events_and_persisted_context
@@ -464,6 +481,7 @@ class UnpersistedEventContext(UnpersistedEventContextBase):
             state_delta_due_to_event=self.state_delta_due_to_event,
             state_group_deltas=state_group_deltas,
             partial_state=self.partial_state,
+            state_from_prev_events=self.state_from_prev_events,
         )
 
     def _build_state_group_deltas(self) -> Dict[Tuple[int, int], StateMap]:
@@ -78,6 +78,7 @@ from synapse.logging.opentracing import (
     SynapseTags,
     log_kv,
     set_tag,
+    start_active_span,
     start_active_span_from_edu,
     tag_args,
     trace,
@@ -85,6 +86,7 @@ from synapse.logging.opentracing import (
 from synapse.metrics.background_process_metrics import wrap_as_background_process
 from synapse.replication.http.federation import (
     ReplicationFederationSendEduRestServlet,
+    ReplicationFederationSendEdusRestServlet,
     ReplicationGetQueryRestServlet,
 )
 from synapse.storage.databases.main.lock import Lock
@@ -103,6 +105,11 @@ if TYPE_CHECKING:
 # parallel, up to this limit.
 TRANSACTION_CONCURRENCY_LIMIT = 10
 
+# EDU types that we handle as a batch per incoming transaction, rather than one
+# EDU at a time. This means they are forwarded to the worker that handles them in
+# a single replication request, and can be persisted together.
+BATCHED_EDU_TYPES = (EduTypes.TYPING, EduTypes.RECEIPT, EduTypes.PRESENCE)
+
 logger = logging.getLogger(__name__)
 
 received_pdus_counter = Counter("synapse_federation_server_received_pdus", "")
@@ -535,7 +542,33 @@ class FederationServer(FederationBase):
         return pdu_results
 
     async def _handle_edus_in_txn(self, origin: str, transaction: Transaction) -> None:
-        """Process the EDUs in a received transaction."""
+        """Process the EDUs in a received transaction.
+
+        EDUs with types in `BATCHED_EDU_TYPES` are grouped by type and each group is
+        handled in one go, rather than one EDU at a time.
+        """
+
+        edus_by_batched_type: Dict[str, List[JsonDict]] = {}
+        unbatched_edus: List[JsonDict] = []
+        for edu_dict in transaction.edus:
+            if edu_dict["edu_type"] in BATCHED_EDU_TYPES:
+                edus_by_batched_type.setdefault(edu_dict["edu_type"], []).append(
+                    edu_dict["content"]
+                )
+            else:
+                unbatched_edus.append(edu_dict)
+
+        async def _process_edu_batch(batch: Tuple[str, List[JsonDict]]) -> None:
+            edu_type, contents = batch
+            received_edus_counter.inc(len(contents))
+
+            try:
+                await self.registry.on_edus(edu_type, origin, contents)
+            except Exception:
+                # As below, if there was an error handling the EDUs, we must reject
+                # the transaction.
+                logger.exception("Error handling EDUs of type %s", edu_type)
+                raise SynapseError(500, f"Error handing EDU of type {edu_type}")
 
         async def _process_edu(edu_dict: JsonDict) -> None:
             received_edus_counter.inc()
@@ -566,10 +599,24 @@ class FederationServer(FederationBase):
                 #   thing rather than carrying on with the rest of them. That would
                 #   probably be best done inside `concurrently_execute`.
 
-        await concurrently_execute(
-            _process_edu,
-            transaction.edus,
-            TRANSACTION_CONCURRENCY_LIMIT,
+        await make_deferred_yieldable(
+            gather_results(
+                (
+                    run_in_background(
+                        concurrently_execute,
+                        _process_edu_batch,
+                        edus_by_batched_type.items(),
+                        TRANSACTION_CONCURRENCY_LIMIT,
+                    ),
+                    run_in_background(
+                        concurrently_execute,
+                        _process_edu,
+                        unbatched_edus,
+                        TRANSACTION_CONCURRENCY_LIMIT,
+                    ),
+                ),
+                consumeErrors=True,
+            ).addErrback(unwrapFirstError)
         )
 
     async def on_room_state_request(
@@ -1370,8 +1417,12 @@ class FederationHandlerRegistry:
         # the case.
         self._get_query_client = ReplicationGetQueryRestServlet.make_client(hs)
         self._send_edu = ReplicationFederationSendEduRestServlet.make_client(hs)
+        self._send_edus = ReplicationFederationSendEdusRestServlet.make_client(hs)
 
         self.edu_handlers: Dict[str, Callable[[str, dict], Awaitable[None]]] = {}
+        self.edu_batch_handlers: Dict[
+            str, Callable[[str, List[JsonDict]], Awaitable[None]]
+        ] = {}
         self.query_handlers: Dict[str, Callable[[dict], Awaitable[JsonDict]]] = {}
 
         # Map from type to instance names that we should route EDU handling to.
@@ -1398,6 +1449,30 @@ class FederationHandlerRegistry:
 
         self.edu_handlers[edu_type] = handler
 
+    def register_edu_batch_handler(
+        self,
+        edu_type: str,
+        handler: Callable[[str, List[JsonDict]], Awaitable[None]],
+    ) -> None:
+        """Sets the handler callable that will be used to handle a batch of
+        incoming federation EDUs of the given type from the same origin.
+
+        This is optional: if no batch handler is registered then the handler
+        registered with `register_edu_handler` is called for each EDU in turn.
+
+        Args:
+            edu_type: The type of the incoming EDU to register handler for
+            handler: A callable invoked on a batch of incoming EDUs of the given
+                type. The arguments are the origin server name and the list of
+                EDU contents.
+        """
+        if edu_type in self.edu_batch_handlers:
+            raise KeyError("Already have an EDU batch handler for %s" % (edu_type,))
+
+        logger.info("Registering federation EDU batch handler for %r", edu_type)
+
+        self.edu_batch_handlers[edu_type] = handler
+
     def register_query_handler(
         self, query_type: str, handler: Callable[[dict], Awaitable[JsonDict]]
     ) -> None:
@@ -1452,6 +1527,46 @@ class FederationHandlerRegistry:
         # Oh well, let's just log and move on.
         logger.warning("No handler registered for EDU type %s", edu_type)
 
+    async def on_edus(
+        self, edu_type: str, origin: str, contents: List[JsonDict]
+    ) -> None:
+        """Handle a batch of EDUs of the same type from the same origin.
+
+        If the EDUs need to be handled on another instance, they are forwarded
+        there in a single replication request.
+        """
+        if not self.config.server.track_presence and edu_type == EduTypes.PRESENCE:
+            return
+
+        # Check if we have a handler on this instance
+        batch_handler = self.edu_batch_handlers.get(edu_type)
+        if batch_handler:
+            with start_active_span("handle_edus"):
+                await batch_handler(origin, contents)
+            return
+
+        if edu_type in self.edu_handlers:
+            for content in contents:
+                await self.on_edu(edu_type, origin, content)
+            return
+
+        # Check if we can route it somewhere else that isn't us
+        instances = self._edu_type_to_instance.get(edu_type, ["master"])
+        if self._instance_name not in instances:
+            # Pick an instance randomly so that we don't overload one.
+            route_to = random.choice(instances)
+
+            await self._send_edus(
+                instance_name=route_to,
+                edu_type=edu_type,
+                origin=origin,
+                contents=contents,
+            )
+            return
+
+        # Oh well, let's just log and move on.
+        logger.warning("No handler registered for EDU type %s", edu_type)
+
     async def on_query(self, query_type: str, args: dict) -> JsonDict:
         handler = self.query_handlers.get(query_type)
         if handler:
@@ -73,6 +73,10 @@ CATCHUP_RETRY_INTERVAL = 60 * 60 * 1000
 # they are bounded in size.
 MAX_PRESENCE_STATES_PER_EDU = 50
 
+# The maximum number of PDUs we send in each catch-up transaction. We pack the
+# catch-up PDUs for multiple rooms into each transaction up to this limit.
+MAX_CATCH_UP_PDUS_PER_TRANSACTION = 10
+
 
 class PerDestinationQueue:
     """
@@ -451,6 +455,8 @@ class PerDestinationQueue:
 
         last_successful_stream_ordering: int = _tmp_last_successful_stream_ordering
 
+        catch_up_progress: Optional[_CatchUpProgress] = None
+
         # get at most 50 catchup room/PDUs
         while True:
             event_ids = await self._store.get_catch_up_room_event_ids(
@@ -494,106 +500,193 @@ class PerDestinationQueue:
                 len(catchup_pdus),
             )
 
-            # We send transactions with events from one room only, as its likely
-            # that the remote will have to do additional processing, which may
-            # take some time. It's better to give it small amounts of work
-            # rather than risk the request timing out and repeatedly being
-            # retried, and not making any progress.
-            #
+            if catch_up_progress is None:
+                catch_up_progress = _CatchUpProgress(
+                    start_ts=self._clock.time_msec(),
+                    total_rooms=await self._store.get_catch_up_room_count(
+                        self._destination, last_successful_stream_ordering
+                    ),
+                )
+
             # Note: `catchup_pdus` will have exactly one PDU per room.
-            for pdu in catchup_pdus:
-                # The PDU from the DB will be the newest PDU in the room from
-                # *this server* that we tried---but were unable---to send to the remote.
-                # servers may have sent lots of events since then, and we want
-                # to try and tell the remote only about the *latest* events in
-                # the room. This is so that it doesn't get inundated by events
-                # from various parts of the DAG, which all need to be processed.
-                #
-                # Note: this does mean that in large rooms a server coming back
-                # online will get sent the same events from all the different
-                # servers, but the remote will correctly deduplicate them and
-                # handle it only once.
-
-                # Step 1, fetch the current extremities
-                extrems = await self._store.get_prev_events_for_room(pdu.room_id)
-
-                if pdu.event_id in extrems:
-                    # If the event is in the extremities, then great! We can just
-                    # use that without having to do further checks.
-                    room_catchup_pdus = [pdu]
-                elif await self._store.is_partial_state_room(pdu.room_id):
-                    # We can't be sure which events the destination should
-                    # see using only partial state. Avoid doing so, and just retry
-                    # sending our the newest PDU the remote is missing from us.
-                    room_catchup_pdus = [pdu]
-                else:
-                    # If not, fetch the extremities and figure out which we can
-                    # send.
-                    extrem_events = await self._store.get_events_as_list(extrems)
-
-                    new_pdus = []
-                    for p in extrem_events:
-                        # We pulled this from the DB, so it'll be non-null
-                        assert p.internal_metadata.stream_ordering
-
-                        # Filter out events that happened before the remote went
-                        # offline
-                        if (
-                            p.internal_metadata.stream_ordering
-                            < last_successful_stream_ordering
-                        ):
-                            continue
+            rooms_to_catch_up = await self._get_catch_up_pdus_for_rooms(
+                catchup_pdus, last_successful_stream_ordering
+            )
 
-                        new_pdus.append(p)
-
-                    # Filter out events where the server is not in the room,
-                    # e.g. it may have left/been kicked. *Ideally* we'd pull
-                    # out the kick and send that, but it's a rare edge case
-                    # so we don't bother for now (the server that sent the
-                    # kick should send it out if its online).
-                    new_pdus = await filter_events_for_server(
-                        self._storage_controllers,
-                        self._destination,
-                        self._server_name,
-                        new_pdus,
-                        redact=False,
-                        filter_out_erased_senders=True,
-                        filter_out_remote_partial_state_events=True,
-                    )
+            # Prioritise the rooms with the most recent activity, as those are the
+            # ones the remote's users are most likely to care about.
+            rooms_to_catch_up.sort(
+                key=lambda room: max(
+                    p.internal_metadata.stream_ordering or 0 for p in room[1]
+                ),
+                reverse=True,
+            )
 
-                    # If we've filtered out all the extremities, fall back to
-                    # sending the original event. This should ensure that the
-                    # server gets at least some of missed events (especially if
-                    # the other sending servers are up).
-                    if new_pdus:
-                        room_catchup_pdus = new_pdus
-                    else:
-                        room_catchup_pdus = [pdu]
+            # We send transactions with events from a small number of rooms only,
+            # as its likely that the remote will have to do additional
+            # processing, which may take some time. It's better to give it small
+            # amounts of work rather than risk the request timing out and
+            # repeatedly being retried, and not making any progress.
+            unsent_stream_orderings = sorted(
+                pdu.internal_metadata.stream_ordering or 0 for pdu in catchup_pdus
+            )
+            while rooms_to_catch_up:
+                transaction_pdus: List[EventBase] = []
+                transaction_rooms: List[EventBase] = []
+                while rooms_to_catch_up and (
+                    not transaction_pdus
+                    or len(transaction_pdus) + len(rooms_to_catch_up[0][1])
+                    <= MAX_CATCH_UP_PDUS_PER_TRANSACTION
+                ):
+                    pdu, room_catchup_pdus = rooms_to_catch_up.pop(0)
+                    transaction_rooms.append(pdu)
+                    transaction_pdus.extend(room_catchup_pdus)
 
                 logger.info(
-                    "Catching up rooms to %s: %r", self._destination, pdu.room_id
+                    "Catching up rooms to %s: %r",
+                    self._destination,
+                    [pdu.room_id for pdu in transaction_rooms],
                 )
 
                 await self._transaction_manager.send_new_transaction(
-                    self._destination, room_catchup_pdus, []
+                    self._destination, transaction_pdus, []
                 )
 
                 sent_transactions_counter.inc()
 
-                # We pulled this from the DB, so it'll be non-null
-                assert pdu.internal_metadata.stream_ordering
+                for pdu in transaction_rooms:
+                    # We pulled this from the DB, so it'll be non-null
+                    assert pdu.internal_metadata.stream_ordering
+                    unsent_stream_orderings.remove(
+                        pdu.internal_metadata.stream_ordering
+                    )
 
-                # Note that we mark the last successful stream ordering as that
-                # from the *original* PDU, rather than the PDU(s) we actually
-                # send. This is because we use it to mark our position in the
-                # queue of missed PDUs to process.
-                last_successful_stream_ordering = pdu.internal_metadata.stream_ordering
+                # Note that we mark the last successful stream ordering based on
+                # the *original* PDUs, rather than the PDU(s) we actually send.
+                # This is because we use it to mark our position in the queue of
+                # missed PDUs to process.
+                #
+                # As we don't send the rooms in stream order, we can only advance
+                # our position up to just before the oldest PDU we haven't sent
+                # yet.
+                if unsent_stream_orderings:
+                    new_stream_ordering = unsent_stream_orderings[0] - 1
+                else:
+                    new_stream_ordering = max(
+                        pdu.internal_metadata.stream_ordering or 0
+                        for pdu in catchup_pdus
+                    )
 
+                catch_up_progress.rooms_sent += len(transaction_rooms)
+                catch_up_progress.log_progress(
+                    self._destination, self._clock.time_msec()
+                )
+
+                if new_stream_ordering <= last_successful_stream_ordering:
+                    continue
+
+                last_successful_stream_ordering = new_stream_ordering
                 self._last_successful_stream_ordering = last_successful_stream_ordering
                 await self._store.set_destination_last_successful_stream_ordering(
                     self._destination, last_successful_stream_ordering
                 )
 
+    async def _get_catch_up_pdus_for_rooms(
+        self, catchup_pdus: List[EventBase], last_successful_stream_ordering: int
+    ) -> List[Tuple[EventBase, List[EventBase]]]:
+        """Work out which PDUs to send to the destination to catch it up on each
+        of the rooms of the given PDUs.
+
+        The forward extremities and partial state status of all the rooms are
+        fetched in bulk, rather than room by room.
+
+        Args:
+            catchup_pdus: The newest PDU in each room from *this server* that we
+                tried---but were unable---to send to the remote.
+            last_successful_stream_ordering: The stream ordering of the last PDU
+                we successfully sent to the destination.
+
+        Returns:
+            A list of tuples of the original PDU and the PDUs to send in its place,
+            one per room.
+        """
+        # The PDU from the DB will be the newest PDU in the room from *this
+        # server* that we tried---but were unable---to send to the remote.
+        # servers may have sent lots of events since then, and we want to try
+        # and tell the remote only about the *latest* events in the room. This
+        # is so that it doesn't get inundated by events from various parts of
+        # the DAG, which all need to be processed.
+        #
+        # Note: this does mean that in large rooms a server coming back online
+        # will get sent the same events from all the different servers, but the
+        # remote will correctly deduplicate them and handle it only once.
+        room_ids = [pdu.room_id for pdu in catchup_pdus]
+
+        # Step 1, fetch the current extremities of all the rooms.
+        extrems_by_room = await self._store.get_prev_events_for_rooms(room_ids)
+        partial_state_rooms = await self._store.is_partial_state_room_batched(room_ids)
+
+        # Step 2, work out which rooms need their extremities checking. If the
+        # PDU is in the extremities then great! We can just use that without
+        # having to do further checks. If the room is partial state then we
+        # can't be sure which events the destination should see using only
+        # partial state, so we avoid doing so, and just retry sending our the
+        # newest PDU the remote is missing from us.
+        rooms_to_check = [
+            pdu
+            for pdu in catchup_pdus
+            if pdu.event_id not in extrems_by_room.get(pdu.room_id, ())
+            and not partial_state_rooms.get(pdu.room_id)
+        ]
+
+        # Step 3, fetch the extremities we need to check in one go, and figure
+        # out which we can send.
+        extrem_events = await self._store.get_events_as_list(
+            [
+                event_id
+                for pdu in rooms_to_check
+                for event_id in extrems_by_room.get(pdu.room_id, ())
+            ]
+        )
+
+        new_pdus = []
+        for p in extrem_events:
+            # We pulled this from the DB, so it'll be non-null
+            assert p.internal_metadata.stream_ordering
+
+            # Filter out events that happened before the remote went
+            # offline
+            if p.internal_metadata.stream_ordering < last_successful_stream_ordering:
+                continue
+
+            new_pdus.append(p)
+
+        # Filter out events where the server is not in the room, e.g. it may
+        # have left/been kicked. *Ideally* we'd pull out the kick and send that,
+        # but it's a rare edge case so we don't bother for now (the server that
+        # sent the kick should send it out if its online).
+        new_pdus = await filter_events_for_server(
+            self._storage_controllers,
+            self._destination,
+            self._server_name,
+            new_pdus,
+            redact=False,
+            filter_out_erased_senders=True,
+            filter_out_remote_partial_state_events=True,
+        )
+
+        new_pdus_by_room: Dict[str, List[EventBase]] = {}
+        for p in new_pdus:
+            new_pdus_by_room.setdefault(p.room_id, []).append(p)
+
+        # If we've filtered out all the extremities of a room, fall back to
+        # sending the original event. This should ensure that the server gets at
+        # least some of missed events (especially if the other sending servers
+        # are up).
+        return [
+            (pdu, new_pdus_by_room.get(pdu.room_id) or [pdu]) for pdu in catchup_pdus
+        ]
+
     def _get_receipt_edus(self, limit: int) -> Iterable[Edu]:
         if not self._pending_receipt_edus:
             return
@@ -830,3 +923,38 @@ class _TransactionQueueManager:
             await self.queue._store.set_destination_last_successful_stream_ordering(
                 self.queue._destination, self._last_stream_ordering
             )
+
+
+@attr.s(slots=True, auto_attribs=True)
+class _CatchUpProgress:
+    """Tracks the progress of catching up a destination, for logging."""
+
+    # When we started catching up, in ms.
+    start_ts: int
+    # The number of rooms we needed to catch up on when we started.
+    total_rooms: int
+    # The number of rooms we've sent catch-up PDUs for so far.
+    rooms_sent: int = 0
+
+    def log_progress(self, destination: str, now_ms: int) -> None:
+        """Log how far through catching up the destination we are, and an
+        estimate of how long is left based on the rate so far.
+        """
+        # New rooms may need catching up while we're catching up, so the total
+        # is only an estimate.
+        total_rooms = max(self.total_rooms, self.rooms_sent)
+        elapsed_ms = now_ms - self.start_ts
+
+        remaining_s = 0.0
+        if self.rooms_sent:
+            remaining_s = (
+                (total_rooms - self.rooms_sent) * elapsed_ms / self.rooms_sent / 1000
+            )
+
+        logger.info(
+            "Catch-up progress for %s: sent %d/%d rooms, ~%.0fs remaining",
+            destination,
+            self.rooms_sent,
+            total_rooms,
+            remaining_s,
+        )
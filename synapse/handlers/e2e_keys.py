@@ -20,7 +20,16 @@
 #
 #
 import logging
-from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
 
 import attr
 from canonicaljson import encode_canonical_json
@@ -47,6 +56,7 @@ from synapse.types import (
 )
 from synapse.util import json_decoder
 from synapse.util.async_helpers import Linearizer, concurrently_execute
+from synapse.util.caches.response_cache import ResponseCache
 from synapse.util.cancellation import cancellable
 from synapse.util.retryutils import (
     NotRetryingDestination,
@@ -112,6 +122,13 @@ class E2eKeysHandler:
             max_count=10,
         )
 
+        # Deduplicate concurrent identical device key queries to remote
+        # servers, e.g. when many local users in a large room query the keys of
+        # the same remote users at once.
+        self._query_client_keys_cache: ResponseCache[
+            Tuple[str, FrozenSet[Tuple[str, FrozenSet[str]]]]
+        ] = ResponseCache(hs.get_clock(), "query_client_keys")
+
         self._query_appservices_for_otks = (
             hs.config.experimental.msc3983_appservice_otk_claims
         )
@@ -424,8 +441,19 @@ class E2eKeysHandler:
             destination_query.pop(user_id)
 
         try:
-            remote_result = await self.federation.query_client_keys(
-                destination, {"device_keys": destination_query}, timeout=timeout
+            cache_key = (
+                destination,
+                frozenset(
+                    (user_id, frozenset(device_ids))
+                    for user_id, device_ids in destination_query.items()
+                ),
+            )
+            remote_result = await self._query_client_keys_cache.wrap(
+                cache_key,
+                self.federation.query_client_keys,
+                destination,
+                {"device_keys": destination_query},
+                timeout=timeout,
             )
 
             for user_id, keys in remote_result["device_keys"].items():
@@ -502,7 +530,7 @@ class E2eKeysHandler:
         self,
         query: Mapping[str, Optional[List[str]]],
         include_displaynames: bool = True,
-    ) -> Dict[str, Dict[str, dict]]:
+    ) -> Dict[str, Dict[str, JsonMapping]]:
         """Get E2E device keys for local users
 
         Args:
@@ -517,7 +545,7 @@ class E2eKeysHandler:
         set_tag("local_query", str(query))
         local_query: List[Tuple[str, Optional[str]]] = []
 
-        result_dict: Dict[str, Dict[str, dict]] = {}
+        result_dict: Dict[str, Dict[str, JsonMapping]] = {}
         for user_id, device_ids in query.items():
             # we use UserID.from_string to catch invalid user ids
             if not self.is_mine(UserID.from_string(user_id)):
@@ -1227,7 +1255,7 @@ class E2eKeysHandler:
         master_key_id: str,
         signed_master_key: JsonDict,
         stored_master_key: JsonMapping,
-        devices: Dict[str, Dict[str, JsonDict]],
+        devices: Mapping[str, JsonMapping],
     ) -> List["SignatureListItem"]:
         """Check signatures of a user's master key made by their devices.
 
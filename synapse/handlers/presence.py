@@ -87,6 +87,7 @@ from typing import (
     Collection,
     ContextManager,
     Dict,
+    FrozenSet,
     Generator,
     Iterable,
     List,
@@ -199,6 +200,15 @@ class BasePresenceHandler(abc.ABC):
         self.presence_router = hs.get_presence_router()
         self.state = hs.get_state_handler()
         self.is_mine_id = hs.is_mine_id
+        self.notifier = hs.get_notifier()
+        self.instance_id = hs.get_instance_id()
+        self._instance_name = hs.get_instance_name()
+
+        # Presence for local users is sharded between the presence writers by
+        # user ID, while presence for remote users is handled by the first
+        # presence writer.
+        self._presence_writers = hs.config.worker.writers.presence
+        self._presence_shard_config = hs.config.worker.presence_shard_config
 
         self._presence_enabled = hs.config.server.presence_enabled
         self._track_presence = hs.config.server.track_presence
@@ -222,6 +232,20 @@ class BasePresenceHandler(abc.ABC):
         # The combined status across all user devices.
         self.user_to_current_state = {state.user_id: state for state in active_presence}
 
+        # The number of ongoing syncs on this process, by (user ID, device ID).
+        # Empty if _presence_enabled is false.
+        self._user_device_to_num_current_syncs: Dict[
+            Tuple[str, Optional[str]], int
+        ] = {}
+
+        # (user_id, device_id) -> last_sync_ms. Lists the devices of users whose
+        # presence is handled by another process that have stopped syncing, but
+        # we haven't notified the presence writer of that yet.
+        self._user_devices_going_offline: Dict[Tuple[str, Optional[str]], int] = {}
+
+        self._bump_active_client = ReplicationBumpPresenceActiveTime.make_client(hs)
+        self._set_state_client = ReplicationPresenceSetState.make_client(hs)
+
     @abc.abstractmethod
     async def user_syncing(
         self,
@@ -260,6 +284,103 @@ class BasePresenceHandler(abc.ABC):
             An iterable of tuples of user ID and device ID.
         """
 
+    def _get_presence_writer_for_user(self, user_id: str) -> str:
+        """Get the name of the presence writer instance that handles the
+        presence of the given user.
+        """
+        if self.is_mine_id(user_id):
+            return self._presence_shard_config.get_instance(user_id)
+
+        return self._presence_writers[0]
+
+    def send_user_sync(
+        self,
+        user_id: str,
+        device_id: Optional[str],
+        is_syncing: bool,
+        last_sync_ms: int,
+    ) -> None:
+        if self._track_presence:
+            self.hs.get_replication_command_handler().send_user_sync(
+                self.instance_id, user_id, device_id, is_syncing, last_sync_ms
+            )
+
+    def mark_as_coming_online(self, user_id: str, device_id: Optional[str]) -> None:
+        """A user has started syncing. Send a UserSync to the presence writer,
+        unless they had recently stopped syncing.
+        """
+        going_offline = self._user_devices_going_offline.pop((user_id, device_id), None)
+        if not going_offline:
+            # Safe to skip because we haven't yet told the presence writer they
+            # were offline
+            self.send_user_sync(user_id, device_id, True, self.clock.time_msec())
+
+    def mark_as_going_offline(self, user_id: str, device_id: Optional[str]) -> None:
+        """A user has stopped syncing. We wait before notifying the presence
+        writer as its likely they'll come back soon. This allows us to avoid
+        sending a stopped syncing immediately followed by a started syncing
+        notification to the presence writer
+        """
+        self._user_devices_going_offline[(user_id, device_id)] = self.clock.time_msec()
+
+    def send_stop_syncing(self) -> None:
+        """Check if there are any users who have stopped syncing a while ago and
+        haven't come back yet. If there are poke the presence writer about them.
+        """
+        now = self.clock.time_msec()
+        for (user_id, device_id), last_sync_ms in list(
+            self._user_devices_going_offline.items()
+        ):
+            if now - last_sync_ms > UPDATE_SYNCING_USERS_MS:
+                self._user_devices_going_offline.pop((user_id, device_id), None)
+                self.send_user_sync(user_id, device_id, False, last_sync_ms)
+
+    async def _user_syncing_via_replication(
+        self, user_id: str, device_id: Optional[str], presence_state: str
+    ) -> ContextManager[None]:
+        """Record that a user whose presence is handled by a different process
+        is syncing against this one.
+
+        The presence writer for the user is told about the new presence state,
+        and about the device starting and stopping syncing via `USER_SYNC`
+        replication commands.
+        """
+        # Note that this causes last_active_ts to be incremented which is not
+        # what the spec wants.
+        await self.set_state(
+            UserID.from_string(user_id),
+            device_id,
+            state={"presence": presence_state},
+            is_sync=True,
+        )
+
+        curr_sync = self._user_device_to_num_current_syncs.get((user_id, device_id), 0)
+        self._user_device_to_num_current_syncs[(user_id, device_id)] = curr_sync + 1
+
+        # If this is the first in-flight sync, notify replication
+        if self._user_device_to_num_current_syncs[(user_id, device_id)] == 1:
+            self.mark_as_coming_online(user_id, device_id)
+
+        def _end() -> None:
+            # We check that the user_id is in user_to_num_current_syncs because
+            # user_to_num_current_syncs may have been cleared if we are
+            # shutting down.
+            if (user_id, device_id) in self._user_device_to_num_current_syncs:
+                self._user_device_to_num_current_syncs[(user_id, device_id)] -= 1
+
+                # If there are no more in-flight syncs, notify replication
+                if self._user_device_to_num_current_syncs[(user_id, device_id)] == 0:
+                    self.mark_as_going_offline(user_id, device_id)
+
+        @contextlib.contextmanager
+        def _user_syncing() -> Generator[None, None, None]:
+            try:
+                yield
+            finally:
+                _end()
+
+        return _user_syncing()
+
     async def get_state(self, target_user: UserID) -> UserPresenceState:
         results = await self.get_states([target_user.to_string()])
         return results[0]
@@ -377,6 +498,19 @@ class BasePresenceHandler(abc.ABC):
         This is a no-op when presence is handled by a different worker.
         """
 
+    async def notify_from_replication(
+        self, states: List[UserPresenceState], stream_id: int
+    ) -> None:
+        parties = await get_interested_parties(self.store, self.presence_router, states)
+        room_ids_to_states, users_to_states = parties
+
+        self.notifier.on_new_event(
+            StreamKeyType.PRESENCE,
+            stream_id,
+            rooms=room_ids_to_states.keys(),
+            users=users_to_states.keys(),
+        )
+
     async def process_replication_rows(
         self, stream_name: str, instance_name: str, token: int, rows: list
     ) -> None:
@@ -385,6 +519,44 @@ class BasePresenceHandler(abc.ABC):
             stream_name, instance_name, token, rows
         )
 
+        if stream_name != PresenceStream.NAME:
+            return
+
+        states = [
+            UserPresenceState(
+                row.user_id,
+                row.state,
+                row.last_active_ts,
+                row.last_federation_update_ts,
+                row.last_user_sync_ts,
+                row.status_msg,
+                row.currently_active,
+            )
+            for row in rows
+        ]
+
+        # The list of states to notify sync streams and remote servers about.
+        # This is calculated by comparing the old and new states for each user
+        # using `should_notify(..)`.
+        #
+        # Note that this is necessary as the presence writer will periodically
+        # flush presence state changes that should not be notified about to the
+        # DB, and so will be sent over the replication stream.
+        state_to_notify = []
+
+        for new_state in states:
+            old_state = self.user_to_current_state.get(new_state.user_id)
+            self.user_to_current_state[new_state.user_id] = new_state
+            is_mine = self.is_mine_id(new_state.user_id)
+            if not old_state or should_notify(old_state, new_state, is_mine):
+                state_to_notify.append(new_state)
+
+        stream_id = token
+        await self.notify_from_replication(state_to_notify, stream_id)
+
+        # If this is a federation sender, notify about presence updates.
+        await self.maybe_send_presence_to_interested_destinations(state_to_notify)
+
     def get_federation_queue(self) -> "PresenceFederationQueue":
         """Get the presence federation queue."""
         return self._federation_queue
@@ -484,30 +656,13 @@ class _NullContextManager(ContextManager[None]):
 class WorkerPresenceHandler(BasePresenceHandler):
     def __init__(self, hs: "HomeServer"):
         super().__init__(hs)
-        self._presence_writer_instance = hs.config.worker.writers.presence[0]
 
         # Route presence EDUs to the right worker
         hs.get_federation_registry().register_instances_for_edu(
             EduTypes.PRESENCE,
-            hs.config.worker.writers.presence,
+            self._presence_writers[:1],
         )
 
-        # The number of ongoing syncs on this process, by (user ID, device ID).
-        # Empty if _presence_enabled is false.
-        self._user_device_to_num_current_syncs: Dict[
-            Tuple[str, Optional[str]], int
-        ] = {}
-
-        self.notifier = hs.get_notifier()
-        self.instance_id = hs.get_instance_id()
-
-        # (user_id, device_id) -> last_sync_ms. Lists the devices that have stopped
-        # syncing but we haven't notified the presence writer of that yet
-        self._user_devices_going_offline: Dict[Tuple[str, Optional[str]], int] = {}
-
-        self._bump_active_client = ReplicationBumpPresenceActiveTime.make_client(hs)
-        self._set_state_client = ReplicationPresenceSetState.make_client(hs)
-
         self._send_stop_syncing_loop = self.clock.looping_call(
             self.send_stop_syncing, UPDATE_SYNCING_USERS_MS
         )
@@ -526,48 +681,6 @@ class WorkerPresenceHandler(BasePresenceHandler):
                 ClearUserSyncsCommand(self.instance_id)
             )
 
-    def send_user_sync(
-        self,
-        user_id: str,
-        device_id: Optional[str],
-        is_syncing: bool,
-        last_sync_ms: int,
-    ) -> None:
-        if self._track_presence:
-            self.hs.get_replication_command_handler().send_user_sync(
-                self.instance_id, user_id, device_id, is_syncing, last_sync_ms
-            )
-
-    def mark_as_coming_online(self, user_id: str, device_id: Optional[str]) -> None:
-        """A user has started syncing. Send a UserSync to the presence writer,
-        unless they had recently stopped syncing.
-        """
-        going_offline = self._user_devices_going_offline.pop((user_id, device_id), None)
-        if not going_offline:
-            # Safe to skip because we haven't yet told the presence writer they
-            # were offline
-            self.send_user_sync(user_id, device_id, True, self.clock.time_msec())
-
-    def mark_as_going_offline(self, user_id: str, device_id: Optional[str]) -> None:
-        """A user has stopped syncing. We wait before notifying the presence
-        writer as its likely they'll come back soon. This allows us to avoid
-        sending a stopped syncing immediately followed by a started syncing
-        notification to the presence writer
-        """
-        self._user_devices_going_offline[(user_id, device_id)] = self.clock.time_msec()
-
-    def send_stop_syncing(self) -> None:
-        """Check if there are any users who have stopped syncing a while ago and
-        haven't come back yet. If there are poke the presence writer about them.
-        """
-        now = self.clock.time_msec()
-        for (user_id, device_id), last_sync_ms in list(
-            self._user_devices_going_offline.items()
-        ):
-            if now - last_sync_ms > UPDATE_SYNCING_USERS_MS:
-                self._user_devices_going_offline.pop((user_id, device_id), None)
-                self.send_user_sync(user_id, device_id, False, last_sync_ms)
-
     async def user_syncing(
         self,
         user_id: str,
@@ -583,98 +696,10 @@ class WorkerPresenceHandler(BasePresenceHandler):
         if not affect_presence or not self._track_presence:
             return _NullContextManager()
 
-        # Note that this causes last_active_ts to be incremented which is not
-        # what the spec wants.
-        await self.set_state(
-            UserID.from_string(user_id),
-            device_id,
-            state={"presence": presence_state},
-            is_sync=True,
-        )
-
-        curr_sync = self._user_device_to_num_current_syncs.get((user_id, device_id), 0)
-        self._user_device_to_num_current_syncs[(user_id, device_id)] = curr_sync + 1
-
-        # If this is the first in-flight sync, notify replication
-        if self._user_device_to_num_current_syncs[(user_id, device_id)] == 1:
-            self.mark_as_coming_online(user_id, device_id)
-
-        def _end() -> None:
-            # We check that the user_id is in user_to_num_current_syncs because
-            # user_to_num_current_syncs may have been cleared if we are
-            # shutting down.
-            if (user_id, device_id) in self._user_device_to_num_current_syncs:
-                self._user_device_to_num_current_syncs[(user_id, device_id)] -= 1
-
-                # If there are no more in-flight syncs, notify replication
-                if self._user_device_to_num_current_syncs[(user_id, device_id)] == 0:
-                    self.mark_as_going_offline(user_id, device_id)
-
-        @contextlib.contextmanager
-        def _user_syncing() -> Generator[None, None, None]:
-            try:
-                yield
-            finally:
-                _end()
-
-        return _user_syncing()
-
-    async def notify_from_replication(
-        self, states: List[UserPresenceState], stream_id: int
-    ) -> None:
-        parties = await get_interested_parties(self.store, self.presence_router, states)
-        room_ids_to_states, users_to_states = parties
-
-        self.notifier.on_new_event(
-            StreamKeyType.PRESENCE,
-            stream_id,
-            rooms=room_ids_to_states.keys(),
-            users=users_to_states.keys(),
+        return await self._user_syncing_via_replication(
+            user_id, device_id, presence_state
         )
 
-    async def process_replication_rows(
-        self, stream_name: str, instance_name: str, token: int, rows: list
-    ) -> None:
-        await super().process_replication_rows(stream_name, instance_name, token, rows)
-
-        if stream_name != PresenceStream.NAME:
-            return
-
-        states = [
-            UserPresenceState(
-                row.user_id,
-                row.state,
-                row.last_active_ts,
-                row.last_federation_update_ts,
-                row.last_user_sync_ts,
-                row.status_msg,
-                row.currently_active,
-            )
-            for row in rows
-        ]
-
-        # The list of states to notify sync streams and remote servers about.
-        # This is calculated by comparing the old and new states for each user
-        # using `should_notify(..)`.
-        #
-        # Note that this is necessary as the presence writer will periodically
-        # flush presence state changes that should not be notified about to the
-        # DB, and so will be sent over the replication stream.
-        state_to_notify = []
-
-        for new_state in states:
-            old_state = self.user_to_current_state.get(new_state.user_id)
-            self.user_to_current_state[new_state.user_id] = new_state
-            is_mine = self.is_mine_id(new_state.user_id)
-            if not old_state or should_notify(old_state, new_state, is_mine):
-                state_to_notify.append(new_state)
-
-        stream_id = token
-        await self.notify_from_replication(state_to_notify, stream_id)
-
-        # If this is a federation sender, notify about presence updates.
-        await self.maybe_send_presence_to_interested_destinations(state_to_notify)
-
     def get_currently_syncing_users_for_replication(
         self,
     ) -> Iterable[Tuple[str, Optional[str]]]:
@@ -715,9 +740,9 @@ class WorkerPresenceHandler(BasePresenceHandler):
         if not self._track_presence:
             return
 
-        # Proxy request to instance that writes presence
+        # Proxy request to instance that writes presence for the user
         await self._set_state_client(
-            instance_name=self._presence_writer_instance,
+            instance_name=self._get_presence_writer_for_user(user_id),
             user_id=user_id,
             device_id=device_id,
             state=state,
@@ -735,10 +760,10 @@ class WorkerPresenceHandler(BasePresenceHandler):
         if not self._track_presence:
             return
 
-        # Proxy request to instance that writes presence
+        # Proxy request to instance that writes presence for the user
         user_id = user.to_string()
         await self._bump_active_client(
-            instance_name=self._presence_writer_instance,
+            instance_name=self._get_presence_writer_for_user(user_id),
             user_id=user_id,
             device_id=device_id,
         )
@@ -748,13 +773,21 @@ class PresenceHandler(BasePresenceHandler):
     def __init__(self, hs: "HomeServer"):
         super().__init__(hs)
         self.wheel_timer: WheelTimer[str] = WheelTimer()
-        self.notifier = hs.get_notifier()
 
         federation_registry = hs.get_federation_registry()
 
-        federation_registry.register_edu_handler(
-            EduTypes.PRESENCE, self.incoming_presence
-        )
+        # Presence of remote users is handled by the first presence writer.
+        if self._instance_name == self._presence_writers[0]:
+            federation_registry.register_edu_handler(
+                EduTypes.PRESENCE, self.incoming_presence
+            )
+            federation_registry.register_edu_batch_handler(
+                EduTypes.PRESENCE, self.incoming_presence_batch
+            )
+        else:
+            federation_registry.register_instances_for_edu(
+                EduTypes.PRESENCE, self._presence_writers[:1]
+            )
 
         LaterGauge(
             "synapse_handlers_presence_user_to_current_state_size",
@@ -771,6 +804,10 @@ class PresenceHandler(BasePresenceHandler):
         now = self.clock.time_msec()
         if self._track_presence:
             for state in self.user_to_current_state.values():
+                if not self._handles_presence_for_user(state.user_id):
+                    # Another presence writer will time out this user.
+                    continue
+
                 # Create a psuedo-device to properly handle time outs. This will
                 # be overridden by any "real" devices within SYNC_ONLINE_TIMEOUT.
                 pseudo_device_id = None
@@ -817,12 +854,6 @@ class PresenceHandler(BasePresenceHandler):
             self._on_shutdown,
         )
 
-        # Keeps track of the number of *ongoing* syncs on this process. While
-        # this is non zero a user will never go offline.
-        self._user_device_to_num_current_syncs: Dict[
-            Tuple[str, Optional[str]], int
-        ] = {}
-
         # Keeps track of the number of *ongoing* syncs on other processes.
         #
         # While any sync is ongoing on another process the user's device will never
@@ -840,6 +871,12 @@ class PresenceHandler(BasePresenceHandler):
 
         self.external_sync_linearizer = Linearizer(name="external_sync_linearizer")
 
+        if len(self._presence_writers) > 1:
+            # Users whose presence is handled by another presence writer may
+            # sync against this process, in which case we need to tell that
+            # writer when they stop syncing.
+            self.clock.looping_call(self.send_stop_syncing, UPDATE_SYNCING_USERS_MS)
+
         if self._track_presence:
             # Start a LoopingCall in 30s that fires every 5s.
             # The initial delay is to allow disconnected clients a chance to
@@ -874,6 +911,10 @@ class PresenceHandler(BasePresenceHandler):
         self._event_pos = self.store.get_room_max_stream_ordering()
         self._event_processing = False
 
+    def _handles_presence_for_user(self, user_id: str) -> bool:
+        """Whether this presence writer handles the presence of the given user."""
+        return self._get_presence_writer_for_user(user_id) == self._instance_name
+
     async def _on_shutdown(self) -> None:
         """Gets called when shutting down. This lets us persist any updates that
         we haven't yet persisted, e.g. updates that only changes some internal
@@ -893,6 +934,13 @@ class PresenceHandler(BasePresenceHandler):
             len(self.user_to_current_state),
         )
 
+        if self._track_presence and len(self._presence_writers) > 1:
+            # Tell the other presence writers that users are no longer syncing
+            # against this process.
+            self.hs.get_replication_command_handler().send_command(
+                ClearUserSyncsCommand(self.instance_id)
+            )
+
         if self.unpersisted_users_changes:
             await self.store.update_presence(
                 [
@@ -1062,15 +1110,19 @@ class PresenceHandler(BasePresenceHandler):
 
         timers_fired_counter.inc(len(states))
 
-        # Set of user ID & device IDs which are currently syncing.
-        syncing_user_devices = {
-            user_id_device_id
-            for user_id_device_id, count in self._user_device_to_num_current_syncs.items()
-            if count
-        }
-        syncing_user_devices.update(
-            itertools.chain(*self.external_process_to_current_syncs.values())
-        )
+        # Set of user ID & device IDs which are currently syncing. We only need
+        # to consider the devices of the users whose timers have fired, rather
+        # than every syncing device, so that the cost of each tick scales with
+        # the number of expired timers and not with the number of online users.
+        external_syncs = list(self.external_process_to_current_syncs.values())
+        syncing_user_devices: Set[Tuple[str, Optional[str]]] = set()
+        for user_id in users_to_check:
+            for device_id in self._user_to_device_to_current_state.get(user_id, ()):
+                user_id_device_id = (user_id, device_id)
+                if self._user_device_to_num_current_syncs.get(user_id_device_id) or any(
+                    user_id_device_id in syncs for syncs in external_syncs
+                ):
+                    syncing_user_devices.add(user_id_device_id)
 
         changes = handle_timeouts(
             states,
@@ -1094,6 +1146,15 @@ class PresenceHandler(BasePresenceHandler):
 
         user_id = user.to_string()
 
+        if not self._handles_presence_for_user(user_id):
+            # Proxy request to instance that writes presence for the user
+            await self._bump_active_client(
+                instance_name=self._get_presence_writer_for_user(user_id),
+                user_id=user_id,
+                device_id=device_id,
+            )
+            return
+
         bump_active_time_counter.inc()
 
         now = self.clock.time_msec()
@@ -1144,6 +1205,11 @@ class PresenceHandler(BasePresenceHandler):
         if not affect_presence or not self._track_presence:
             return _NullContextManager()
 
+        if not self._handles_presence_for_user(user_id):
+            return await self._user_syncing_via_replication(
+                user_id, device_id, presence_state
+            )
+
         curr_sync = self._user_device_to_num_current_syncs.get((user_id, device_id), 0)
         self._user_device_to_num_current_syncs[(user_id, device_id)] = curr_sync + 1
 
@@ -1183,8 +1249,16 @@ class PresenceHandler(BasePresenceHandler):
     def get_currently_syncing_users_for_replication(
         self,
     ) -> Iterable[Tuple[str, Optional[str]]]:
-        # since we are the process handling presence, there is nothing to do here.
-        return []
+        # We only need to tell other presence writers about the users they
+        # handle the presence of.
+        return [
+            (user_id, device_id)
+            for (
+                user_id,
+                device_id,
+            ), count in self._user_device_to_num_current_syncs.items()
+            if count > 0 and not self._handles_presence_for_user(user_id)
+        ]
 
     async def update_external_syncs_row(
         self,
@@ -1205,6 +1279,10 @@ class PresenceHandler(BasePresenceHandler):
             is_syncing: Whether or not the user is now syncing
             sync_time_msec: Time in ms when the user was last syncing
         """
+        if not self._handles_presence_for_user(user_id):
+            # Another presence writer is tracking this user.
+            return
+
         async with self.external_sync_linearizer.queue(process_id):
             prev_state = await self.current_state_for_user(user_id)
 
@@ -1301,12 +1379,23 @@ class PresenceHandler(BasePresenceHandler):
 
     async def incoming_presence(self, origin: str, content: JsonDict) -> None:
         """Called when we receive a `m.presence` EDU from a remote server."""
+        await self.incoming_presence_batch(origin, [content])
+
+    async def incoming_presence_batch(
+        self, origin: str, contents: List[JsonDict]
+    ) -> None:
+        """Called when we receive a batch of `m.presence` EDUs from a remote
+        server, e.g. all the presence EDUs in a single transaction. The updates are
+        applied together.
+        """
         if not self._track_presence:
             return
 
         now = self.clock.time_msec()
         updates = []
-        for push in content.get("push", []):
+        for push in itertools.chain.from_iterable(
+            content.get("push", []) for content in contents
+        ):
             # A "push" contains a list of presence that we are probably interested
             # in.
             user_id = push.get("user_id", None)
@@ -1380,6 +1469,19 @@ class PresenceHandler(BasePresenceHandler):
             return
 
         user_id = target_user.to_string()
+
+        if not self._handles_presence_for_user(user_id):
+            # Proxy request to instance that writes presence for the user
+            await self._set_state_client(
+                instance_name=self._get_presence_writer_for_user(user_id),
+                user_id=user_id,
+                device_id=device_id,
+                state=state,
+                force_notify=force_notify,
+                is_sync=is_sync,
+            )
+            return
+
         now = self.clock.time_msec()
 
         prev_state = await self.current_state_for_user(user_id)
@@ -1450,8 +1552,7 @@ class PresenceHandler(BasePresenceHandler):
         - currently_active(int)
 
         Args:
-            instance_name: The writer we want to fetch updates from. Unused
-                here since there is only ever one writer.
+            instance_name: The writer we want to fetch updates from.
             last_id: The token to fetch updates from. Exclusive.
             current_id: The token to fetch updates up to. Inclusive.
             limit: The requested limit for the number of rows to return. The
@@ -1599,7 +1700,9 @@ class PresenceHandler(BasePresenceHandler):
         prev_remote_hosts = set()
         for user_id in prev_users:
             if self.is_mine_id(user_id):
-                prev_local_users.append(user_id)
+                # Other presence writers send the states of their own users.
+                if self._handles_presence_for_user(user_id):
+                    prev_local_users.append(user_id)
             else:
                 prev_remote_hosts.add(get_domain_from_id(user_id))
 
@@ -1611,7 +1714,8 @@ class PresenceHandler(BasePresenceHandler):
         newly_joined_remote_hosts = set()
         for user_id in newly_joined_users:
             if self.is_mine_id(user_id):
-                newly_joined_local_users.append(user_id)
+                if self._handles_presence_for_user(user_id):
+                    newly_joined_local_users.append(user_id)
             else:
                 host = get_domain_from_id(user_id)
                 if host not in prev_remote_hosts:
@@ -2277,9 +2381,11 @@ async def get_interested_parties(
     """
     room_ids_to_states: Dict[str, List[UserPresenceState]] = {}
     users_to_states: Dict[str, List[UserPresenceState]] = {}
+    user_id_to_room_ids = await store.get_rooms_for_users(
+        {state.user_id for state in states}
+    )
     for state in states:
-        room_ids = await store.get_rooms_for_user(state.user_id)
-        for room_id in room_ids:
+        for room_id in user_id_to_room_ids.get(state.user_id, ()):
             room_ids_to_states.setdefault(room_id, []).append(state)
 
         # Always notify self
@@ -2319,13 +2425,30 @@ async def get_interested_remotes(
     # First we look up the rooms each user is in (as well as any explicit
     # subscriptions), then for each distinct room we look up the remote
     # hosts in those rooms.
+    user_id_to_room_ids = await store.get_rooms_for_users(
+        {state.user_id for state in states}
+    )
+
+    # Users who share the same set of rooms (e.g. users who are only in a single
+    # room together) get sent to the same destinations, so we group their
+    # states together rather than computing and sending to the set of hosts
+    # once per user.
+    room_ids_to_states: Dict[FrozenSet[str], List[UserPresenceState]] = {}
     for state in states:
-        room_ids = await store.get_rooms_for_user(state.user_id)
+        room_ids_to_states.setdefault(
+            user_id_to_room_ids.get(state.user_id, frozenset()), []
+        ).append(state)
+
+    room_id_to_hosts: Dict[str, AbstractSet[str]] = {}
+    for room_ids, room_states in room_ids_to_states.items():
         hosts: Set[str] = set()
         for room_id in room_ids:
-            room_hosts = await store.get_current_hosts_in_room(room_id)
+            room_hosts = room_id_to_hosts.get(room_id)
+            if room_hosts is None:
+                room_hosts = await store.get_current_hosts_in_room(room_id)
+                room_id_to_hosts[room_id] = room_hosts
             hosts.update(room_hosts)
-        hosts_and_states.append((hosts, [state]))
+        hosts_and_states.append((hosts, room_states))
 
     # Ask a presence routing module for any additional parties if one
     # is loaded.
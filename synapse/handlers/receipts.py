@@ -19,7 +19,9 @@
 #
 #
 import logging
-from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter
 
 from synapse.api.constants import EduTypes, ReceiptTypes
 from synapse.appservice import ApplicationService
@@ -33,12 +35,19 @@ from synapse.types import (
     UserID,
     get_domain_from_id,
 )
+from synapse.util.batching_queue import BatchingQueue
 
 if TYPE_CHECKING:
     from synapse.server import HomeServer
 
 logger = logging.getLogger(__name__)
 
+coalesced_client_receipts_counter = Counter(
+    "synapse_handlers_receipts_coalesced_client_receipts",
+    "Number of client receipts that were superseded by a later receipt before "
+    "being persisted",
+)
+
 
 class ReceiptsHandler:
     def __init__(self, hs: "HomeServer"):
@@ -65,6 +74,9 @@ class ReceiptsHandler:
             hs.get_federation_registry().register_edu_handler(
                 EduTypes.RECEIPT, self._received_remote_receipt
             )
+            hs.get_federation_registry().register_edu_batch_handler(
+                EduTypes.RECEIPT, self._received_remote_receipts
+            )
         else:
             hs.get_federation_registry().register_instances_for_edu(
                 EduTypes.RECEIPT,
@@ -74,91 +86,115 @@ class ReceiptsHandler:
         self.clock = self.hs.get_clock()
         self.state = hs.get_state_handler()
 
+        # If configured, we buffer receipts sent by clients for a short while
+        # so that a burst of receipts from the same user only results in a
+        # single write. This is keyed by user ID.
+        self._client_receipts_queue: Optional[
+            BatchingQueue[Tuple[ReadReceipt, int], None]
+        ] = None
+        coalescing_window_ms = hs.config.server.receipts_coalescing_window_ms
+        if coalescing_window_ms > 0:
+            self._client_receipts_queue = BatchingQueue(
+                "receipts_client_receipts",
+                self.clock,
+                self._process_client_receipts,
+                batch_delay_s=coalescing_window_ms / 1000,
+            )
+
     async def _received_remote_receipt(self, origin: str, content: JsonDict) -> None:
         """Called when we receive an EDU of type m.receipt from a remote HS."""
+        await self._received_remote_receipts(origin, [content])
+
+    async def _received_remote_receipts(
+        self, origin: str, contents: List[JsonDict]
+    ) -> None:
+        """Called when we receive a batch of EDUs of type m.receipt from a remote
+        HS, e.g. all the receipt EDUs in a single transaction. The receipts are
+        persisted together.
+        """
         receipts = []
-        for room_id, room_values in content.items():
-            # If we're not in the room just ditch the event entirely. This is
-            # probably an old server that has come back and thinks we're still in
-            # the room (or we've been rejoined to the room by a state reset).
-            is_in_room = await self.event_auth_handler.is_host_in_room(
-                room_id, self.server_name
-            )
-            if not is_in_room:
-                logger.info(
-                    "Ignoring receipt for room %r from server %s as we're not in the room",
-                    room_id,
-                    origin,
+        for content in contents:
+            for room_id, room_values in content.items():
+                # If we're not in the room just ditch the event entirely. This is
+                # probably an old server that has come back and thinks we're still in
+                # the room (or we've been rejoined to the room by a state reset).
+                is_in_room = await self.event_auth_handler.is_host_in_room(
+                    room_id, self.server_name
                 )
-                continue
+                if not is_in_room:
+                    logger.info(
+                        "Ignoring receipt for room %r from server %s as we're not in the room",
+                        room_id,
+                        origin,
+                    )
+                    continue
 
-            # Let's check that the origin server is in the room before accepting the receipt.
-            # We don't want to block waiting on a partial state so take an
-            # approximation if needed.
-            domains = await self._storage_controllers.state.get_current_hosts_in_room_or_partial_state_approximation(
-                room_id
-            )
-            if origin not in domains:
-                logger.info(
-                    "Ignoring receipt for room %r from server %s as they're not in the room",
-                    room_id,
-                    origin,
+                # Let's check that the origin server is in the room before accepting the receipt.
+                # We don't want to block waiting on a partial state so take an
+                # approximation if needed.
+                domains = await self._storage_controllers.state.get_current_hosts_in_room_or_partial_state_approximation(
+                    room_id
                 )
-                continue
-
-            for receipt_type, users in room_values.items():
-                for user_id, user_values in users.items():
-                    if get_domain_from_id(user_id) != origin:
-                        logger.info(
-                            "Received receipt for user %r from server %s, ignoring",
-                            user_id,
-                            origin,
-                        )
-                        continue
-
-                    # Check if these receipts apply to a thread.
-                    data = user_values.get("data", {})
-                    thread_id = data.get("thread_id")
-                    # If the thread ID is invalid, consider it missing.
-                    if not isinstance(thread_id, str):
-                        thread_id = None
-
-                    receipts.append(
-                        ReadReceipt(
-                            room_id=room_id,
-                            receipt_type=receipt_type,
-                            user_id=user_id,
-                            event_ids=user_values["event_ids"],
-                            thread_id=thread_id,
-                            data=data,
-                        )
+                if origin not in domains:
+                    logger.info(
+                        "Ignoring receipt for room %r from server %s as they're not in the room",
+                        room_id,
+                        origin,
                     )
+                    continue
+
+                for receipt_type, users in room_values.items():
+                    for user_id, user_values in users.items():
+                        if get_domain_from_id(user_id) != origin:
+                            logger.info(
+                                "Received receipt for user %r from server %s, ignoring",
+                                user_id,
+                                origin,
+                            )
+                            continue
+
+                        # Check if these receipts apply to a thread.
+                        data = user_values.get("data", {})
+                        thread_id = data.get("thread_id")
+                        # If the thread ID is invalid, consider it missing.
+                        if not isinstance(thread_id, str):
+                            thread_id = None
+
+                        receipts.append(
+                            ReadReceipt(
+                                room_id=room_id,
+                                receipt_type=receipt_type,
+                                user_id=user_id,
+                                event_ids=user_values["event_ids"],
+                                thread_id=thread_id,
+                                data=data,
+                            )
+                        )
 
         await self._handle_new_receipts(receipts)
 
-    async def _handle_new_receipts(self, receipts: List[ReadReceipt]) -> bool:
-        """Takes a list of receipts, stores them and informs the notifier."""
-
-        receipts_persisted: List[ReadReceipt] = []
-        for receipt in receipts:
-            stream_id = await self.store.insert_receipt(
-                receipt.room_id,
-                receipt.receipt_type,
-                receipt.user_id,
-                receipt.event_ids,
-                receipt.thread_id,
-                receipt.data,
-            )
+    async def _handle_new_receipts(
+        self, receipts: List[ReadReceipt]
+    ) -> List[ReadReceipt]:
+        """Takes a list of receipts, stores them and informs the notifier.
 
-            if stream_id is None:
-                # stream_id will be None if this receipt is 'old'
-                continue
+        Returns:
+            The receipts that were persisted, i.e. excluding any that were older
+            than the receipts we already had.
+        """
+
+        stream_ids = await self.store.insert_receipts(receipts)
 
-            receipts_persisted.append(receipt)
+        # stream_id will be None if this receipt is 'old'
+        receipts_persisted: List[ReadReceipt] = [
+            receipt
+            for receipt, stream_id in zip(receipts, stream_ids)
+            if stream_id is not None
+        ]
 
         if not receipts_persisted:
             # no new receipts
-            return False
+            return []
 
         max_batch_id = self.store.get_max_receipt_stream_id()
 
@@ -172,7 +208,7 @@ class ReceiptsHandler:
             {r.user_id for r in receipts_persisted}
         )
 
-        return True
+        return receipts_persisted
 
     async def received_client_receipt(
         self,
@@ -188,7 +224,8 @@ class ReceiptsHandler:
 
         # Ensure the room/event exists, this will raise an error if the user
         # cannot view the event.
-        if not await self.event_handler.get_event(user_id, room_id, event_id):
+        event = await self.event_handler.get_event(user_id, room_id, event_id)
+        if not event:
             return
 
         receipt = ReadReceipt(
@@ -200,12 +237,50 @@ class ReceiptsHandler:
             data={"ts": int(self.clock.time_msec())},
         )
 
-        is_new = await self._handle_new_receipts([receipt])
-        if not is_new:
+        if self._client_receipts_queue is not None:
+            # Wait for the receipt (or a later one that supersedes it) to be
+            # persisted before returning.
+            await self._client_receipts_queue.add_to_queue(
+                (receipt, event.internal_metadata.stream_ordering or 0),
+                key=receipt.user_id,
+            )
+            return
+
+        await self._send_client_receipts([receipt])
+
+    async def _process_client_receipts(
+        self, receipts: List[Tuple[ReadReceipt, int]]
+    ) -> None:
+        """Persist a batch of receipts sent by a client, only keeping the latest
+        receipt for each room, receipt type and thread.
+
+        Args:
+            receipts: The receipts, along with the stream ordering of the event
+                that each receipt points at.
+        """
+        latest: Dict[Tuple[str, str, Optional[str]], Tuple[ReadReceipt, int]] = {}
+        for receipt, stream_ordering in receipts:
+            key = (receipt.room_id, receipt.receipt_type, receipt.thread_id)
+            existing = latest.get(key)
+            # Receipts are in the order they were received, so on a tie we keep
+            # the later receipt.
+            if existing is None or stream_ordering >= existing[1]:
+                latest[key] = (receipt, stream_ordering)
+
+        coalesced_client_receipts_counter.inc(len(receipts) - len(latest))
+
+        await self._send_client_receipts([receipt for receipt, _ in latest.values()])
+
+    async def _send_client_receipts(self, receipts: List[ReadReceipt]) -> None:
+        """Persist receipts sent by local clients and send them over federation."""
+        receipts_persisted = await self._handle_new_receipts(receipts)
+
+        if not self.federation_sender:
             return
 
-        if self.federation_sender and receipt_type != ReceiptTypes.READ_PRIVATE:
-            await self.federation_sender.send_read_receipt(receipt)
+        for receipt in receipts_persisted:
+            if receipt.receipt_type != ReceiptTypes.READ_PRIVATE:
+                await self.federation_sender.send_read_receipt(receipt)
 
 
 class ReceiptEventSource(EventSource[MultiWriterStreamToken, JsonMapping]):
@@ -296,17 +296,16 @@ class SlidingSyncExtensionHandler:
                     events=[],
                 )
 
-            # Delete everything before the given since token, as we know the
-            # device must have received them.
-            deleted = await self.store.delete_messages_for_device(
+            # Mark everything before the given since token as received, so that
+            # it gets deleted, as we know the device must have received them.
+            self.store.acknowledge_messages_for_device(
                 user_id=user_id,
                 device_id=device_id,
                 up_to_stream_id=since_stream_id,
             )
 
             logger.debug(
-                "Deleted %d to-device messages up to %d for %s",
-                deleted,
+                "Acknowledged to-device messages up to %d for %s",
                 since_stream_id,
                 user_id,
             )
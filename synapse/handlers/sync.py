@@ -557,18 +557,17 @@ class SyncHandler:
                 timeout -= now - start
                 timeout = max(timeout, 0)
 
-        # if we have a since token, delete any to-device messages before that token
-        # (since we now know that the device has received them)
+        # if we have a since token, mark any to-device messages before that token
+        # as received, so that they get deleted (since we now know that the device
+        # has received them)
         if since_token is not None:
             since_stream_id = since_token.to_device_key
-            deleted = await self.store.delete_messages_for_device(
+            self.store.acknowledge_messages_for_device(
                 sync_config.user.to_string(),
                 sync_config.device_id,
                 since_stream_id,
             )
-            logger.debug(
-                "Deleted %d to-device messages up to %d", deleted, since_stream_id
-            )
+            logger.debug("Acknowledged to-device messages up to %d", since_stream_id)
 
         if timeout == 0 or since_token is None or full_state:
             # we are going to return immediately, so don't bother calling
@@ -106,6 +106,11 @@ class FollowerTypingHandler:
 
         self._rooms_updated: Set[str] = set()
 
+        # caches which room_ids changed at which serials
+        self._typing_stream_change_cache = StreamChangeCache(
+            "TypingStreamChangeCache", self._latest_room_serial
+        )
+
         self.clock.looping_call(self._handle_timeouts, 5000)
         self.clock.looping_call(self._prune_old_typing, FORGET_TIMEOUT)
 
@@ -121,6 +126,10 @@ class FollowerTypingHandler:
         self._member_last_federation_poke = {}
         self.wheel_timer = WheelTimer(bucket_size=5000)
 
+        self._typing_stream_change_cache = StreamChangeCache(
+            "TypingStreamChangeCache", 0
+        )
+
     @wrap_as_background_process("typing._handle_timeouts")
     async def _handle_timeouts(self) -> None:
         logger.debug("Checking for typing timeouts")
@@ -134,7 +143,10 @@ class FollowerTypingHandler:
 
     def _handle_timeout_for_member(self, now: int, member: RoomMember) -> None:
         if not self.is_typing(member):
-            # Nothing to do if they're no longer typing
+            # Nothing to do if they're no longer typing, other than forgetting
+            # about them so that we don't accumulate state for every user that
+            # has ever typed.
+            self._member_last_federation_poke.pop(member, None)
             return
 
         # Check if we need to resend a keep alive over federation for this
@@ -207,6 +219,7 @@ class FollowerTypingHandler:
 
         for row in rows:
             self._room_serials[row.room_id] = token
+            self._typing_stream_change_cache.entity_has_changed(row.room_id, token)
 
             prev_typing = self._room_typing.get(row.room_id, set())
             now_typing = set(row.user_ids)
@@ -278,16 +291,12 @@ class TypingWriterHandler(FollowerTypingHandler):
         # clock time we expect to stop
         self._member_typing_until: Dict[RoomMember, int] = {}
 
-        # caches which room_ids changed at which serials
-        self._typing_stream_change_cache = StreamChangeCache(
-            "TypingStreamChangeCache", self._latest_room_serial
-        )
-
     def _handle_timeout_for_member(self, now: int, member: RoomMember) -> None:
         super()._handle_timeout_for_member(now, member)
 
         if not self.is_typing(member):
             # Nothing to do if they're no longer typing
+            self._member_typing_until.pop(member, None)
             return
 
         until = self._member_typing_until.get(member, None)
@@ -540,11 +549,25 @@ class TypingNotificationEventSource(EventSource[int, JsonMapping]):
 
             events = []
 
+            # Only look at the rooms that have changed since `from_key`, if we
+            # know which those are.
+            result = handler._typing_stream_change_cache.get_all_entities_changed(
+                from_key
+            )
+            if result.hit:
+                changed_room_ids: Iterable[str] = result.entities
+            else:
+                changed_room_ids = handler._room_serials.keys()
+
             # Work on a copy of things here as these may change in the handler while
             # waiting for the AS `is_interested_in_room` call to complete.
             # Shallow copy is safe as no nested data is present.
             latest_room_serial = handler._latest_room_serial
-            room_serials = handler._room_serials.copy()
+            room_serials = {
+                room_id: handler._room_serials[room_id]
+                for room_id in changed_room_ids
+                if room_id in handler._room_serials
+            }
 
             for room_id, serial in room_serials.items():
                 if serial <= from_key:
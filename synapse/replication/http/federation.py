@@ -202,6 +202,49 @@ class ReplicationFederationSendEduRestServlet(ReplicationEndpoint):
         return 200, {}
 
 
+class ReplicationFederationSendEdusRestServlet(ReplicationEndpoint):
+    """Handles a batch of EDUs of the same type newly received from federation,
+    e.g. all the EDUs of that type in a single transaction.
+
+    Request format:
+
+        POST /_synapse/replication/fed_send_edus/:edu_type/:txn_id
+
+        {
+            "origin": ...,
+            "contents: [{ ... }, ...]
+        }
+    """
+
+    NAME = "fed_send_edus"
+    PATH_ARGS = ("edu_type",)
+
+    def __init__(self, hs: "HomeServer"):
+        super().__init__(hs)
+
+        self.store = hs.get_datastores().main
+        self.clock = hs.get_clock()
+        self.registry = hs.get_federation_registry()
+
+    @staticmethod
+    async def _serialize_payload(  # type: ignore[override]
+        edu_type: str, origin: str, contents: List[JsonDict]
+    ) -> JsonDict:
+        return {"origin": origin, "contents": contents}
+
+    async def _handle_request(  # type: ignore[override]
+        self, request: Request, content: JsonDict, edu_type: str
+    ) -> Tuple[int, JsonDict]:
+        origin = content["origin"]
+        edu_contents = content["contents"]
+
+        logger.info("Got %d %r edus from %s", len(edu_contents), edu_type, origin)
+
+        await self.registry.on_edus(edu_type, origin, edu_contents)
+
+        return 200, {}
+
+
 class ReplicationGetQueryRestServlet(ReplicationEndpoint):
     """Handle responding to queries from federation.
 
@@ -320,6 +363,7 @@ class ReplicationStoreRoomOnOutlierMembershipRestServlet(ReplicationEndpoint):
 def register_servlets(hs: "HomeServer", http_server: HttpServer) -> None:
     ReplicationFederationSendEventsRestServlet(hs).register(http_server)
     ReplicationFederationSendEduRestServlet(hs).register(http_server)
+    ReplicationFederationSendEdusRestServlet(hs).register(http_server)
     ReplicationGetQueryRestServlet(hs).register(http_server)
     ReplicationCleanRoomRestServlet(hs).register(http_server)
     ReplicationStoreRoomOnOutlierMembershipRestServlet(hs).register(http_server)
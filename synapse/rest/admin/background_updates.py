@@ -30,6 +30,7 @@ from synapse.http.servlet import (
 )
 from synapse.http.site import SynapseRequest
 from synapse.rest.admin._base import admin_patterns, assert_requester_is_admin
+from synapse.storage.background_updates import BackgroundUpdatePerformance
 from synapse.types import JsonDict
 
 if TYPE_CHECKING:
@@ -96,20 +97,33 @@ class BackgroundUpdateRestServlet(RestServlet):
         enabled = all(db.updates.enabled for db in self._data_stores.databases)
 
         current_updates = {}
+        concurrent_updates = {}
 
         for db in self._data_stores.databases:
             update = db.updates.get_current_update()
-            if not update:
-                continue
-
-            current_updates[db.name()] = {
-                "name": update.name,
-                "total_item_count": update.total_item_count,
-                "total_duration_ms": update.total_duration_ms,
-                "average_items_per_ms": update.average_items_per_ms(),
-            }
-
-        return HTTPStatus.OK, {"enabled": enabled, "current_updates": current_updates}
+            if update:
+                current_updates[db.name()] = _format_update(update)
+
+            other_updates = db.updates.get_concurrent_updates()
+            if other_updates:
+                concurrent_updates[db.name()] = [
+                    _format_update(other_update) for other_update in other_updates
+                ]
+
+        return HTTPStatus.OK, {
+            "enabled": enabled,
+            "current_updates": current_updates,
+            "concurrent_updates": concurrent_updates,
+        }
+
+
+def _format_update(update: BackgroundUpdatePerformance) -> JsonDict:
+    return {
+        "name": update.name,
+        "total_item_count": update.total_item_count,
+        "total_duration_ms": update.total_duration_ms,
+        "average_items_per_ms": update.average_items_per_ms(),
+    }
 
 
 class BackgroundUpdateStartJobRestServlet(RestServlet):
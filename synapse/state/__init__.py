@@ -319,6 +319,7 @@ class StateHandler:
             # if we're given the state before the event, then we use that
             state_group_before_event_prev_group = None
             deltas_to_state_group_before_event = None
+            state_from_prev_events = False
 
             # the partial_state flag must be provided
             assert partial_state is not None
@@ -358,6 +359,7 @@ class StateHandler:
             state_group_before_event_prev_group = entry.prev_group
             deltas_to_state_group_before_event = entry.delta_ids
             state_ids_before_event = None
+            state_from_prev_events = True
 
             # We make sure that we have a state group assigned to the state.
             if entry.state_group is None:
@@ -396,6 +398,7 @@ class StateHandler:
                 delta_ids_to_state_group_before_event=deltas_to_state_group_before_event,
                 partial_state=partial_state,
                 state_map_before_event=state_ids_before_event,
+                state_from_prev_events=state_from_prev_events,
             )
 
         #
@@ -426,6 +429,7 @@ class StateHandler:
             delta_ids_to_state_group_before_event=deltas_to_state_group_before_event,
             partial_state=partial_state,
             state_map_before_event=state_ids_before_event,
+            state_from_prev_events=state_from_prev_events,
         )
 
     async def compute_event_context(
@@ -33,6 +33,7 @@ from typing import (
     List,
     Optional,
     Sequence,
+    Set,
     Tuple,
     Type,
     cast,
@@ -64,6 +65,10 @@ ON_UPDATE_CALLBACK = Callable[[str, str, bool], AsyncContextManager[int]]
 DEFAULT_BATCH_SIZE_CALLBACK = Callable[[str, str], Awaitable[int]]
 MIN_BATCH_SIZE_CALLBACK = Callable[[str, str], Awaitable[int]]
 
+# The most we will multiply the sleep between batches by when the database is
+# busy.
+MAX_SLEEP_MULTIPLIER = 10
+
 
 class Constraint(metaclass=abc.ABCMeta):
     """Base class representing different constraints.
@@ -255,6 +260,10 @@ class BackgroundUpdater:
         # if a background update is currently running, its name.
         self._current_background_update: Optional[str] = None
 
+        # The names of any background updates being run alongside
+        # `_current_background_update`, if `max_concurrent_updates` allows.
+        self._concurrent_background_updates: Set[str] = set()
+
         self._on_update_callback: Optional[ON_UPDATE_CALLBACK] = None
         self._default_batch_size_callback: Optional[DEFAULT_BATCH_SIZE_CALLBACK] = None
         self._min_batch_size_callback: Optional[MIN_BATCH_SIZE_CALLBACK] = None
@@ -282,6 +291,19 @@ class BackgroundUpdater:
         self.update_duration_ms = hs.config.background_updates.update_duration_ms
         self.sleep_duration_ms = hs.config.background_updates.sleep_duration_ms
         self.sleep_enabled = hs.config.background_updates.sleep_enabled
+        self.max_concurrent_updates = (
+            hs.config.background_updates.max_concurrent_updates
+        )
+        self.database_load_threshold = (
+            hs.config.background_updates.database_load_threshold
+        )
+
+        # How much to multiply the sleep between batches by, based on how busy
+        # the database is. See `_update_sleep_multiplier`.
+        self._sleep_multiplier = 1
+        # The time and the database's total transaction time when we last
+        # looked at how busy the database is.
+        self._last_load_sample: Optional[Tuple[float, float]] = None
 
     def get_status(self) -> UpdaterStatus:
         """An integer summarising the updater status. Used as a metric."""
@@ -354,7 +376,10 @@ class BackgroundUpdater:
             return self._on_update_callback(update_name, database_name, oneshot)
 
         return _BackgroundUpdateContextManager(
-            sleep, self._clock, self.sleep_duration_ms, self.update_duration_ms
+            sleep,
+            self._clock,
+            self.sleep_duration_ms * self._sleep_multiplier,
+            self.update_duration_ms,
         )
 
     async def _default_batch_size(self, update_name: str, database_name: str) -> int:
@@ -389,6 +414,14 @@ class BackgroundUpdater:
 
         return perf
 
+    def get_concurrent_updates(self) -> List[BackgroundUpdatePerformance]:
+        """Returns the background updates being run alongside the current one."""
+        return [
+            self._background_update_performance.get(update_name)
+            or BackgroundUpdatePerformance(update_name)
+            for update_name in sorted(self._concurrent_background_updates)
+        ]
+
     def start_doing_background_updates(self) -> None:
         if self.enabled:
             # if we start a new background update, not all updates are done.
@@ -411,6 +444,13 @@ class BackgroundUpdater:
                 "Starting background schema updates for database %s",
                 self._database_name,
             )
+            for _ in range(self.max_concurrent_updates - 1):
+                run_as_background_process(
+                    "background_updates_concurrent",
+                    self._run_concurrent_background_updates,
+                    sleep,
+                )
+
             while self.enabled:
                 try:
                     result = await self.do_next_background_update(sleep)
@@ -446,7 +486,7 @@ class BackgroundUpdater:
             return True
 
         # obviously, if we are currently processing an update, we're not done.
-        if self._current_background_update:
+        if self._current_background_update or self._concurrent_background_updates:
             return False
 
         # otherwise, check if there are updates to be run. This is important,
@@ -469,7 +509,10 @@ class BackgroundUpdater:
         if self._all_done:
             return True
 
-        if update_name == self._current_background_update:
+        if (
+            update_name == self._current_background_update
+            or update_name in self._concurrent_background_updates
+        ):
             return False
 
         update_exists = await self.db_pool.simple_select_one_onecol(
@@ -520,36 +563,20 @@ class BackgroundUpdater:
             True if we have finished running all the background updates, otherwise False
         """
 
-        def get_background_updates_txn(txn: Cursor) -> List[Tuple[str, Optional[str]]]:
-            txn.execute(
-                """
-                SELECT update_name, depends_on FROM background_updates
-                ORDER BY ordering, update_name
-                """
-            )
-            return cast(List[Tuple[str, Optional[str]]], txn.fetchall())
-
         if not self._current_background_update:
-            all_pending_updates = await self.db_pool.runInteraction(
-                "background_updates",
-                get_background_updates_txn,
-            )
+            all_pending_updates = await self._get_pending_updates()
             if not all_pending_updates:
                 # no work left to do
                 return True
 
-            # find the first update which isn't dependent on another one in the queue.
-            pending = {update_name for update_name, depends_on in all_pending_updates}
-            for update_name, depends_on in all_pending_updates:
-                if not depends_on or depends_on not in pending:
-                    break
-                logger.info(
-                    "Not starting on bg update %s until %s is done",
-                    update_name,
-                    depends_on,
-                )
-            else:
-                # if we get to the end of that for loop, there is a problem
+            update_name = self._pick_next_update(all_pending_updates)
+            if update_name is None:
+                if self._concurrent_background_updates:
+                    # Everything we could run is already being run concurrently,
+                    # so wait for one of those to finish.
+                    await self._clock.sleep(self.sleep_duration_ms / 1000)
+                    return False
+
                 raise Exception(
                     "Unable to find a background update which doesn't depend on "
                     "another: dependency cycle?"
@@ -560,21 +587,107 @@ class BackgroundUpdater:
         # We have a background update to run, otherwise we would have returned
         # early.
         assert self._current_background_update is not None
-        update_info = self._background_update_handlers[self._current_background_update]
+        await self._do_background_update_batch(self._current_background_update, sleep)
+
+        return False
+
+    async def _run_concurrent_background_updates(self, sleep: bool) -> None:
+        """Runs background updates alongside the main loop in
+        `run_background_updates`, for as long as that is running.
+        """
+        update_name: Optional[str] = None
+        back_to_back_failures = 0
+
+        while self._running and self.enabled and not self._aborted:
+            if update_name not in self._concurrent_background_updates:
+                # We've finished the update we were running (or haven't started
+                # one yet), so look for another.
+                update_name = self._pick_next_update(await self._get_pending_updates())
+                if update_name is None:
+                    await self._clock.sleep(self.sleep_duration_ms / 1000)
+                    continue
+
+                self._concurrent_background_updates.add(update_name)
+
+            assert update_name is not None
+            try:
+                await self._do_background_update_batch(update_name, sleep)
+                back_to_back_failures = 0
+            except Exception as e:
+                logger.exception("Error doing update %s: %s", update_name, e)
+
+                # Let the update be picked up again.
+                self._concurrent_background_updates.discard(update_name)
+
+                back_to_back_failures += 1
+                if back_to_back_failures >= 5:
+                    self._aborted = True
+                    raise RuntimeError(
+                        "5 back-to-back background update failures; aborting."
+                    )
+
+        if update_name is not None:
+            self._concurrent_background_updates.discard(update_name)
+
+    async def _get_pending_updates(self) -> List[Tuple[str, Optional[str]]]:
+        """Get the names of all the pending background updates, along with the
+        update each depends on (if any), in the order they should be run.
+        """
+
+        def get_background_updates_txn(txn: Cursor) -> List[Tuple[str, Optional[str]]]:
+            txn.execute(
+                """
+                SELECT update_name, depends_on FROM background_updates
+                ORDER BY ordering, update_name
+                """
+            )
+            return cast(List[Tuple[str, Optional[str]]], txn.fetchall())
+
+        return await self.db_pool.runInteraction(
+            "background_updates",
+            get_background_updates_txn,
+        )
+
+    def _pick_next_update(
+        self, all_pending_updates: List[Tuple[str, Optional[str]]]
+    ) -> Optional[str]:
+        """Find the first pending update which isn't already running and doesn't
+        depend on another one in the queue.
+        """
+        pending = {update_name for update_name, depends_on in all_pending_updates}
+        for update_name, depends_on in all_pending_updates:
+            if (
+                update_name == self._current_background_update
+                or update_name in self._concurrent_background_updates
+            ):
+                continue
+
+            if not depends_on or depends_on not in pending:
+                return update_name
+
+            logger.info(
+                "Not starting on bg update %s until %s is done",
+                update_name,
+                depends_on,
+            )
+
+        return None
+
+    async def _do_background_update_batch(self, update_name: str, sleep: bool) -> None:
+        """Run a single batch of the given background update."""
+        update_info = self._background_update_handlers[update_name]
 
         async with self._get_context_manager_for_update(
             sleep=sleep,
-            update_name=self._current_background_update,
+            update_name=update_name,
             database_name=self._database_name,
             oneshot=update_info.oneshot,
         ) as desired_duration_ms:
-            await self._do_background_update(desired_duration_ms)
-
-        return False
+            await self._do_background_update(update_name, desired_duration_ms)
 
-    async def _do_background_update(self, desired_duration_ms: float) -> int:
-        assert self._current_background_update is not None
-        update_name = self._current_background_update
+    async def _do_background_update(
+        self, update_name: str, desired_duration_ms: float
+    ) -> int:
         logger.info("Starting update batch on background update '%s'", update_name)
 
         update_handler = self._background_update_handlers[update_name].callback
@@ -617,6 +730,7 @@ class BackgroundUpdater:
         duration_ms = time_stop - time_start
 
         performance.update(items_updated, duration_ms)
+        self._update_sleep_multiplier(duration_ms)
 
         logger.info(
             "Running background update %r. Processed %r items in %rms."
@@ -632,6 +746,42 @@ class BackgroundUpdater:
 
         return len(self._background_update_performance)
 
+    def _update_sleep_multiplier(self, batch_duration_ms: float) -> None:
+        """Back off from running background updates while the rest of Synapse
+        is keeping the database busy, and speed back up once it is quieter.
+
+        We measure how busy the database is by how much time has been spent in
+        database transactions since we last checked, other than by the batch
+        of background updates we just ran.
+        """
+        if self.database_load_threshold is None:
+            return
+
+        now = self._clock.time()
+        total_txn_time = self.db_pool._current_txn_total_time
+
+        last_load_sample = self._last_load_sample
+        self._last_load_sample = (now, total_txn_time)
+        if last_load_sample is None:
+            return
+
+        last_time, last_total_txn_time = last_load_sample
+        elapsed = now - last_time
+        if elapsed <= 0:
+            return
+
+        other_txn_time = max(
+            0.0, total_txn_time - last_total_txn_time - batch_duration_ms / 1000
+        )
+        load = other_txn_time / elapsed
+
+        if load > self.database_load_threshold:
+            self._sleep_multiplier = min(
+                self._sleep_multiplier * 2, MAX_SLEEP_MULTIPLIER
+            )
+        else:
+            self._sleep_multiplier = max(self._sleep_multiplier // 2, 1)
+
     def register_background_update_handler(
         self,
         update_name: str,
@@ -1052,12 +1202,15 @@ class BackgroundUpdater:
         Returns:
             None, completes once the task is removed.
         """
-        if update_name != self._current_background_update:
+        if update_name == self._current_background_update:
+            self._current_background_update = None
+        elif update_name in self._concurrent_background_updates:
+            self._concurrent_background_updates.discard(update_name)
+        else:
             raise Exception(
                 "Cannot end background update %s which isn't currently running"
                 % update_name
             )
-        self._current_background_update = None
         await self.db_pool.simple_delete_one(
             "background_updates", keyvalues={"update_name": update_name}
         )
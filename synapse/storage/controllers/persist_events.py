@@ -64,7 +64,7 @@ from synapse.logging.opentracing import (
 from synapse.metrics.background_process_metrics import run_as_background_process
 from synapse.storage.controllers.state import StateStorageController
 from synapse.storage.databases import Databases
-from synapse.storage.databases.main.events import DeltaState
+from synapse.storage.databases.main.events import DeltaState, RoomEventsToPersist
 from synapse.storage.databases.main.events_worker import EventRedactBehaviour
 from synapse.types import (
     PersistedEventPosition,
@@ -74,6 +74,7 @@ from synapse.types import (
 )
 from synapse.types.state import StateFilter
 from synapse.util.async_helpers import ObservableDeferred, yieldable_gather_results
+from synapse.util.batching_queue import BatchingQueue
 from synapse.util.metrics import Measure
 
 if TYPE_CHECKING:
@@ -81,6 +82,10 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# The number of cross-room persistence batches that may be in flight at once.
+# Rooms are sharded across this many queues by room ID.
+CROSS_ROOM_PERSIST_QUEUE_SHARDS = 5
+
 # The number of times we are recalculating the current state
 state_delta_counter = Counter("synapse_storage_events_state_delta", "")
 
@@ -97,6 +102,13 @@ state_delta_reuse_delta_counter = Counter(
     "synapse_storage_events_state_delta_reuse_delta", ""
 )
 
+# The number of times we took the change to the current state straight from
+# the context of a new event, rather than recalculating it.
+state_delta_from_context_counter = Counter(
+    "synapse_storage_events_state_delta_from_context",
+    "Number of times the current state delta was taken from an event's context",
+)
+
 # The number of forward extremities for each new event.
 forward_extremities_counter = Histogram(
     "synapse_storage_events_forward_extremities_persisted",
@@ -338,6 +350,7 @@ class EventsPersistenceStorageController:
 
         self._clock = hs.get_clock()
         self._instance_name = hs.get_instance_name()
+        self._server_name = hs.hostname
         self.is_mine_id = hs.is_mine_id
         self._event_persist_queue = _EventPeristenceQueue(
             self._process_event_persist_queue_task
@@ -346,6 +359,20 @@ class EventsPersistenceStorageController:
         self._state_controller = state_controller
         self.hs = hs
 
+        # If configured, we wait a short while for events in other rooms to be
+        # ready to persist, so that we can persist them in one transaction.
+        self._cross_room_persist_queue: Optional[
+            BatchingQueue[RoomEventsToPersist, Dict[RoomEventsToPersist, Exception]]
+        ] = None
+        batching_window_ms = hs.config.server.event_persistence_batching_window_ms
+        if batching_window_ms > 0:
+            self._cross_room_persist_queue = BatchingQueue(
+                "persist_events_cross_room",
+                self._clock,
+                self._persist_cross_room_batch,
+                batch_delay_s=batching_window_ms / 1000,
+            )
+
     async def _process_event_persist_queue_task(
         self,
         room_id: str,
@@ -635,18 +662,86 @@ class EventsPersistenceStorageController:
                     room_id, [e for e, _ in chunk]
                 )
 
-            await self.persist_events_store._persist_events_and_state_updates(
-                room_id,
-                chunk,
+            if backfilled or self._cross_room_persist_queue is None:
+                await self.persist_events_store._persist_events_and_state_updates(
+                    room_id,
+                    chunk,
+                    state_delta_for_room=state_delta_for_room,
+                    new_forward_extremities=new_forward_extremities,
+                    use_negative_stream_ordering=backfilled,
+                    inhibit_local_membership_updates=backfilled,
+                    new_event_links=new_event_links,
+                )
+                continue
+
+            room_events = RoomEventsToPersist(
+                room_id=room_id,
+                events_and_contexts=chunk,
                 state_delta_for_room=state_delta_for_room,
                 new_forward_extremities=new_forward_extremities,
-                use_negative_stream_ordering=backfilled,
-                inhibit_local_membership_updates=backfilled,
                 new_event_links=new_event_links,
             )
+            failures = await self._cross_room_persist_queue.add_to_queue(
+                room_events, key=hash(room_id) % CROSS_ROOM_PERSIST_QUEUE_SHARDS
+            )
+            failure = failures.get(room_events)
+            if failure is not None:
+                raise failure
 
         return replaced_events
 
+    async def _persist_cross_room_batch(
+        self, batch: List[RoomEventsToPersist]
+    ) -> Dict[RoomEventsToPersist, Exception]:
+        """Callback for the cross-room persistence queue.
+
+        Persists the events for all the given rooms in a single transaction. If
+        that transaction fails we fall back to persisting each room separately,
+        so that a failure in one room doesn't affect the others. If the
+        transaction was committed but something afterwards failed, the events
+        must not be persisted again, so the error is returned for every room.
+
+        Returns:
+            A map of the rooms' events that failed to persist to the exception
+            that was raised.
+        """
+        try:
+            await self.persist_events_store._persist_events_and_state_updates_for_rooms(
+                batch
+            )
+            return {}
+        except Exception as e:
+            if len(batch) == 1:
+                return {batch[0]: e}
+
+            # Check whether the failure happened before or after the
+            # transaction was committed: if it was, all of the events in the
+            # batch will be in the database.
+            event_ids = {
+                event.event_id
+                for room_events in batch
+                for event, _ in room_events.events_and_contexts
+            }
+            persisted = await self.main_store.have_persisted_events(event_ids)
+            if len(persisted) == len(event_ids):
+                return {room_events: e for room_events in batch}
+
+            logger.warning(
+                "Failed to persist events in %d rooms in one transaction, retrying each room separately",
+                len(batch),
+            )
+
+        failures: Dict[RoomEventsToPersist, Exception] = {}
+        for room_events in batch:
+            try:
+                await self.persist_events_store._persist_events_and_state_updates_for_rooms(
+                    [room_events]
+                )
+            except Exception as e:
+                failures[room_events] = e
+
+        return failures
+
     async def _calculate_new_forward_extremities_and_state_delta(
         self, room_id: str, ev_ctx_rm: List[Tuple[EventBase, EventContext]]
     ) -> Tuple[Optional[Set[str]], Optional[DeltaState]]:
@@ -690,6 +785,21 @@ class EventsPersistenceStorageController:
             if all_single_prev_not_state:
                 return (new_forward_extremities, None)
 
+        delta_ids = await self._get_state_delta_from_context(
+            room_id, ev_ctx_rm, latest_event_ids, new_latest_event_ids
+        )
+        if delta_ids is not None:
+            state_delta_from_context_counter.inc()
+            if not delta_ids:
+                return (new_forward_extremities, None)
+
+            delta = DeltaState([], delta_ids)
+            if not await self._is_server_still_joined(room_id, ev_ctx_rm, delta):
+                logger.info("Server no longer in room %s", room_id)
+                delta.no_longer_in_room = True
+
+            return (new_forward_extremities, delta)
+
         state_delta_counter.inc()
         if len(new_latest_event_ids) == 1:
             state_delta_single_event_counter.inc()
@@ -758,6 +868,64 @@ class EventsPersistenceStorageController:
 
         return (new_forward_extremities, delta)
 
+    async def _get_state_delta_from_context(
+        self,
+        room_id: str,
+        events_context: List[Tuple[EventBase, EventContext]],
+        old_latest_event_ids: AbstractSet[str],
+        new_latest_event_ids: AbstractSet[str],
+    ) -> Optional[StateMap[str]]:
+        """Try to work out the change to the current state of the room from the
+        context of the new forward extremity, without going back to the state
+        groups.
+
+        This works when a single event we are persisting replaces all of the
+        room's forward extremities, and its context was built by resolving the
+        state across exactly those extremities (which is what happens for
+        events created locally, so long as nothing else was persisted in the
+        meantime). In that case the current state of the room is the state
+        before the event, and the only change is the event itself.
+
+        Returns:
+            The state delta to apply to the current state (which is empty for
+            a non-state event), or None if it needs to be calculated the long
+            way.
+        """
+        if len(new_latest_event_ids) != 1:
+            return None
+
+        (new_extremity,) = new_latest_event_ids
+        ev_ctx = next(
+            ((ev, ctx) for ev, ctx in events_context if ev.event_id == new_extremity),
+            None,
+        )
+        if ev_ctx is None:
+            return None
+        ev, ctx = ev_ctx
+
+        if (
+            ctx.rejected
+            or ctx.partial_state
+            or not ctx.state_from_prev_events
+            or set(ev.prev_event_ids()) != old_latest_event_ids
+        ):
+            return None
+
+        if ctx.state_group is None or ctx.state_group_before_event is None:
+            return None
+
+        # If we have left the room then its current state has been cleared out,
+        # so it no longer matches the state at the extremities.
+        if not await self.main_store.is_host_joined(room_id, self._server_name):
+            return None
+
+        if ctx.state_group == ctx.state_group_before_event:
+            return {}
+
+        return ctx.state_group_deltas.get(
+            (ctx.state_group_before_event, ctx.state_group)
+        )
+
     async def _calculate_new_extremities(
         self,
         room_id: str,
@@ -20,6 +20,7 @@
 #
 #
 import inspect
+import io
 import logging
 import time
 import types
@@ -88,6 +89,16 @@ sql_txn_count = Counter("synapse_storage_transaction_time_count", "sec", ["desc"
 sql_txn_duration = Counter("synapse_storage_transaction_time_sum", "sec", ["desc"])
 
 
+# How often we check how far a read replica has got, in milliseconds.
+REPLICA_POSITIONS_POLL_INTERVAL_MS = 1000
+
+
+# The minimum number of rows for which `simple_insert_many_txn` will use `COPY`
+# rather than `INSERT` on postgres. `COPY` has a higher fixed cost, but sends all
+# the rows in one go rather than in pages of 100 rows.
+COPY_MIN_ROWS = 1000
+
+
 # Unique indexes which have been added in background updates. Maps from table name
 # to the name of the background update which added the unique index to that table.
 #
@@ -422,6 +433,32 @@ class LoggingTransaction:
             values,
         )
 
+    def copy_from(
+        self, table: str, keys: Sequence[str], values: Iterable[Iterable[Any]]
+    ) -> None:
+        """Bulk load rows into the given table using `COPY ... FROM STDIN`. Only
+        available when using postgres.
+
+        Raises:
+            TypeError: if any of the values can't be encoded for `COPY`. Nothing
+                is sent to the database in this case.
+        """
+        assert isinstance(self.database_engine, PostgresEngine)
+
+        # Encode all the rows up front, so that we don't send a partial `COPY`
+        # to the database if a value can't be encoded.
+        data = io.StringIO()
+        for row in values:
+            data.write("\t".join(_encode_value_for_copy(value) for value in row))
+            data.write("\n")
+        data.seek(0)
+
+        sql = "COPY %s (%s) FROM STDIN" % (table, ", ".join(keys))
+        self._do_execute(
+            lambda the_sql: self.txn.copy_expert(the_sql, data),  # type: ignore[attr-defined]
+            sql,
+        )
+
     def execute(self, sql: str, parameters: SQLQueryParameters = ()) -> None:
         self._do_execute(self.txn.execute, sql, parameters)
 
@@ -565,6 +602,30 @@ class DatabasePool:
         self._database_config = database_config
         self._db_pool = make_pool(hs.get_reactor(), database_config, engine)
 
+        # An optional pool of connections to a read replica of the database.
+        # This is only used for transactions that ask for it with
+        # `allow_replica`.
+        self._replica_pool: Optional[adbapi.ConnectionPool] = None
+
+        # The positions in `stream_positions` as seen on the replica, as a map
+        # from stream name to instance name to stream ID. We use these to work
+        # out whether the replica has caught up with a given stream position.
+        self._replica_stream_positions: Dict[str, Dict[str, int]] = {}
+
+        if database_config.replica is not None:
+            self._replica_pool = make_pool(
+                hs.get_reactor(), database_config.replica, engine
+            )
+
+            # The `stream_positions` table lives in the main data store.
+            if "main" in database_config.databases:
+                self._clock.looping_call(
+                    run_as_background_process,
+                    REPLICA_POSITIONS_POLL_INTERVAL_MS,
+                    "poll_replica_stream_positions",
+                    self._poll_replica_stream_positions,
+                )
+
         self.updates = BackgroundUpdater(hs, self)
         LaterGauge(
             "synapse_background_update_status",
@@ -612,6 +673,72 @@ class DatabasePool:
         """Is the database pool currently running"""
         return self._db_pool.running
 
+    async def _poll_replica_stream_positions(self) -> None:
+        """Fetch the stream positions that the read replica has caught up to."""
+
+        def _get_replica_stream_positions_txn(
+            txn: LoggingTransaction,
+        ) -> Dict[str, Dict[str, int]]:
+            txn.execute(
+                "SELECT stream_name, instance_name, stream_id FROM stream_positions"
+            )
+            positions: Dict[str, Dict[str, int]] = {}
+            for stream_name, instance_name, stream_id in txn:
+                positions.setdefault(stream_name, {})[instance_name] = stream_id
+            return positions
+
+        try:
+            self._replica_stream_positions = await self.runInteraction(
+                "poll_replica_stream_positions",
+                _get_replica_stream_positions_txn,
+                db_autocommit=True,
+                allow_replica=True,
+            )
+        except Exception:
+            # Stop sending queries to the replica until it's reachable again.
+            logger.warning(
+                "Failed to fetch stream positions from replica", exc_info=True
+            )
+            self._replica_stream_positions = {}
+
+    def replica_has_caught_up_to(
+        self, stream_positions: Mapping[str, Mapping[str, int]]
+    ) -> bool:
+        """Check whether the read replica has caught up with the given stream
+        positions, i.e. whether it is safe to run a transaction that depends on
+        those positions with `allow_replica`.
+
+        Each writer to a stream is checked separately: the replica has caught
+        up with a writer once the writer's position in the replica's copy of
+        `stream_positions` is at or beyond the given position for that writer.
+        A writer with no row there is treated as not having written anything
+        to the stream yet.
+
+        Args:
+            stream_positions: Map from stream name (as used in the
+                `stream_positions` table) to a map from writer instance name to
+                stream ID.
+
+        Returns:
+            True if the replica has caught up, False if there is no replica or
+            it may be behind.
+        """
+        if self._replica_pool is None:
+            return False
+
+        for stream_name, positions in stream_positions.items():
+            replica_positions = self._replica_stream_positions.get(stream_name, {})
+            for instance_name, stream_id in positions.items():
+                # Streams start at 1, and streams with negative IDs (e.g.
+                # backfill) go backwards from -1.
+                if stream_id >= 0:
+                    if replica_positions.get(instance_name, 1) < stream_id:
+                        return False
+                elif replica_positions.get(instance_name, -1) > stream_id:
+                    return False
+
+        return True
+
     async def _check_safe_to_upsert(self) -> None:
         """
         Is it safe to use native UPSERT?
@@ -875,6 +1002,7 @@ class DatabasePool:
         *args: Any,
         db_autocommit: bool = False,
         isolation_level: Optional[int] = None,
+        allow_replica: bool = False,
         **kwargs: Any,
     ) -> R:
         """Starts a transaction on the database and runs a given function
@@ -898,6 +1026,10 @@ class DatabasePool:
                 correctly handle that case.
 
             isolation_level: Set the server isolation level for this transaction.
+            allow_replica: Whether to run the function against the read replica,
+                if one is configured. This must only be set for read-only
+                transactions, and callers should check that the replica is not
+                behind the data they need with `replica_has_caught_up_to`.
             args: positional args to pass to `func`
             kwargs: named args to pass to `func`
 
@@ -926,6 +1058,7 @@ class DatabasePool:
                         *args,
                         db_autocommit=db_autocommit,
                         isolation_level=isolation_level,
+                        allow_replica=allow_replica,
                         **kwargs,
                     )
 
@@ -957,6 +1090,7 @@ class DatabasePool:
         *args: Any,
         db_autocommit: bool = False,
         isolation_level: Optional[int] = None,
+        allow_replica: bool = False,
         **kwargs: Any,
     ) -> R:
         """Wraps the .runWithConnection() method on the underlying db_pool.
@@ -970,11 +1104,17 @@ class DatabasePool:
                 i.e. outside of a transaction. This is useful for transaction
                 that are only a single query. Currently only affects postgres.
             isolation_level: Set the server isolation level for this transaction.
+            allow_replica: Whether to use a connection to the read replica, if
+                one is configured. See `runInteraction`.
             kwargs: named args to pass to `func`
 
         Returns:
             The result of func
         """
+        db_pool = self._db_pool
+        if allow_replica and self._replica_pool is not None:
+            db_pool = self._replica_pool
+
         curr_context = current_context()
         if not curr_context:
             logger.warning(
@@ -1006,7 +1146,7 @@ class DatabasePool:
                     context.add_database_scheduled(sched_duration_sec)
 
                     if self._txn_limit > 0:
-                        tid = self._db_pool.threadID()
+                        tid = db_pool.threadID()
                         self._txn_counters[tid] += 1
 
                         if self._txn_counters[tid] > self._txn_limit:
@@ -1045,7 +1185,7 @@ class DatabasePool:
                             self.engine.attempt_to_set_isolation_level(conn, None)
 
         return await make_deferred_yieldable(
-            self._db_pool.runWithConnection(inner_func, *args, **kwargs)
+            db_pool.runWithConnection(inner_func, *args, **kwargs)
         )
 
     async def execute(self, desc: str, query: str, *args: Any) -> List[Tuple[Any, ...]]:
@@ -1184,6 +1324,17 @@ class DatabasePool:
             return
 
         if isinstance(txn.database_engine, PostgresEngine):
+            if len(values) >= COPY_MIN_ROWS:
+                # For large batches (e.g. when persisting lots of events during
+                # a join or backfill) `COPY` is much faster than `INSERT`.
+                try:
+                    txn.copy_from(table, keys, values)
+                    return
+                except TypeError:
+                    # Some of the values aren't supported by `COPY`, fall back
+                    # to `INSERT`.
+                    pass
+
             # We use `execute_values` as it can be a lot faster than `execute_batch`,
             # but it's only available on postgres.
             sql = "INSERT INTO %s (%s) VALUES ?" % (
@@ -2504,6 +2655,33 @@ class DatabasePool:
         return txn.fetchall()
 
 
+def _encode_value_for_copy(value: Any) -> str:
+    """Encode a value in the postgres `COPY` text format.
+
+    Raises:
+        TypeError: if the value is of a type we don't know how to encode.
+    """
+    if value is None:
+        return "\\N"
+    # Note: we need to check for bools before ints, as bools are ints.
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    if isinstance(value, (bytes, memoryview)):
+        # bytea in hex format, with the backslash escaped for `COPY`.
+        return "\\\\x" + bytes(value).hex()
+
+    raise TypeError("Cannot encode %r for COPY" % (type(value),))
+
+
 def make_in_list_sql_clause(
     database_engine: BaseDatabaseEngine,
     column: str,
@@ -516,9 +516,7 @@ class CacheInvalidationWorkerStore(SQLBaseStore):
         self._attempt_to_invalidate_cache(
             "get_unread_event_push_actions_by_room_for_user", (room_id,)
         )
-        self._attempt_to_invalidate_cache(
-            "_get_linearized_receipts_for_room", (room_id,)
-        )
+        self._attempt_to_invalidate_cache("_get_receipts_in_room", (room_id,))
         self._attempt_to_invalidate_cache("is_room_blocked", (room_id,))
         self._attempt_to_invalidate_cache("get_retention_policy_for_room", (room_id,))
         self._attempt_to_invalidate_cache(
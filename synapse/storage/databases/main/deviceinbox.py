@@ -33,6 +33,8 @@ from typing import (
     cast,
 )
 
+from prometheus_client import Counter
+
 from synapse.api.constants import EventContentFields
 from synapse.logging import issue9533_logger
 from synapse.logging.opentracing import (
@@ -42,6 +44,8 @@ from synapse.logging.opentracing import (
     start_active_span,
     trace,
 )
+from synapse.metrics import LaterGauge
+from synapse.metrics.background_process_metrics import wrap_as_background_process
 from synapse.replication.tcp.streams import ToDeviceStream
 from synapse.storage._base import SQLBaseStore, db_to_json
 from synapse.storage.database import (
@@ -62,6 +66,14 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# How often we delete to-device messages that devices have acknowledged receiving.
+DELETE_ACKNOWLEDGED_DEVICE_MESSAGES_INTERVAL_MS = 10 * 1000
+
+deleted_device_messages_counter = Counter(
+    "synapse_storage_device_inbox_deleted_messages",
+    "Number of acknowledged to-device messages deleted from the device inbox",
+)
+
 
 class DeviceInboxWorkerStore(SQLBaseStore):
     def __init__(
@@ -85,6 +97,24 @@ class DeviceInboxWorkerStore(SQLBaseStore):
             expiry_ms=30 * 60 * 1000,
         )
 
+        # Map of (user_id, device_id) to the stream_id up to which the device has
+        # acknowledged receiving its to-device messages, for devices whose
+        # messages we haven't deleted yet. Rather than deleting messages on every
+        # sync, we delete them in batches in the background.
+        self._pending_device_inbox_acks: Dict[Tuple[str, Optional[str]], int] = {}
+
+        LaterGauge(
+            "synapse_storage_device_inbox_pending_acknowledged_devices",
+            "Number of devices with acknowledged to-device messages waiting to be deleted",
+            [],
+            lambda: len(self._pending_device_inbox_acks),
+        )
+
+        self._clock.looping_call(
+            self._delete_acknowledged_device_messages,
+            DELETE_ACKNOWLEDGED_DEVICE_MESSAGES_INTERVAL_MS,
+        )
+
         self._can_write_to_device = (
             self._instance_name in hs.config.worker.writers.to_device
         )
@@ -234,6 +264,14 @@ class DeviceInboxWorkerStore(SQLBaseStore):
                 * The last-processed stream ID. Subsequent calls of this function with the
                   same device should pass this value as 'from_stream_id'.
         """
+        # The device has already received any messages that it has acknowledged,
+        # even if we haven't got round to deleting them yet.
+        acknowledged_stream_id = self._pending_device_inbox_acks.get(
+            (user_id, device_id), 0
+        )
+        if from_stream_id < acknowledged_stream_id:
+            from_stream_id = min(acknowledged_stream_id, to_stream_id)
+
         if not self._device_inbox_stream_cache.has_entity_changed(
             user_id, from_stream_id
         ):
@@ -440,6 +478,87 @@ class DeviceInboxWorkerStore(SQLBaseStore):
             "get_device_messages", get_device_messages_txn
         )
 
+    def acknowledge_messages_for_device(
+        self,
+        user_id: str,
+        device_id: Optional[str],
+        up_to_stream_id: int,
+    ) -> None:
+        """Record that the device has received all its to-device messages up to
+        the given stream ID, e.g. because it has synced with a since token at that
+        position.
+
+        The messages are deleted in the background by
+        `_delete_acknowledged_device_messages`, so that repeated syncs by the
+        same device only result in a single delete.
+
+        Args:
+            user_id: The recipient user_id.
+            device_id: The recipient device_id.
+            up_to_stream_id: The stream ID the device has received messages up to.
+        """
+        key = (user_id, device_id)
+        self._pending_device_inbox_acks[key] = max(
+            self._pending_device_inbox_acks.get(key, 0), up_to_stream_id
+        )
+
+    @wrap_as_background_process("delete_acknowledged_device_messages")
+    async def _delete_acknowledged_device_messages(self) -> None:
+        """Delete the to-device messages that devices have acknowledged
+        receiving via `acknowledge_messages_for_device`.
+
+        Messages are deleted in small batches, each in its own autocommit
+        transaction, starting after the position we last deleted up to for the
+        device so that we don't re-scan rows we've already deleted.
+        """
+        for key, up_to_stream_id in list(self._pending_device_inbox_acks.items()):
+            user_id, device_id = key
+
+            # If we have cached the last stream id we've deleted up to, we can
+            # check if there is likely to be anything that needs deleting.
+            last_deleted_stream_id = self._last_device_delete_cache.get(key, None)
+            if (
+                last_deleted_stream_id is None
+                or self._device_inbox_stream_cache.has_entity_changed(
+                    user_id, last_deleted_stream_id
+                )
+            ):
+                from_stream_id = last_deleted_stream_id
+                try:
+                    while True:
+                        (
+                            from_stream_id,
+                            deleted,
+                        ) = await self.delete_messages_for_device_between(
+                            user_id,
+                            device_id,
+                            from_stream_id=from_stream_id,
+                            to_stream_id=up_to_stream_id,
+                            limit=1000,
+                        )
+                        deleted_device_messages_counter.inc(deleted)
+                        if from_stream_id is None:
+                            break
+                except Exception:
+                    # Leave the acknowledgement in place so that we try again
+                    # on the next run, and carry on with the other devices.
+                    logger.exception(
+                        "Failed to delete acknowledged to-device messages for %s/%s",
+                        user_id,
+                        device_id,
+                    )
+                    continue
+
+            # Update the cache, ensuring that we only ever increase the value
+            self._last_device_delete_cache[key] = max(
+                self._last_device_delete_cache.get(key, 0), up_to_stream_id
+            )
+
+            # Only forget the acknowledgement if the device hasn't acknowledged
+            # more messages while we were deleting.
+            if self._pending_device_inbox_acks.get(key) == up_to_stream_id:
+                del self._pending_device_inbox_acks[key]
+
     @trace
     async def delete_messages_for_device(
         self,
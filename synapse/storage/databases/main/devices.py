@@ -739,6 +739,28 @@ class DeviceWorkerStore(RoomMemberWorkerStore, EndToEndKeyWorkerStore):
         """
         txn.execute(sql, (destination, stream_id))
 
+        # Also delete any pokes waiting to be sent which are superseded by a
+        # later poke for the same device, as we only ever send the latest update
+        # for each device (c.f. `get_device_updates_by_remote`). This stops the
+        # table growing with every device change while a destination is slow
+        # to receive them.
+        #
+        # It is safe to do this here as nothing is in flight to the destination
+        # at this point, so the deleted pokes have not been sent. The next update
+        # we send will have a `prev_id` from `device_lists_outbound_last_success`
+        # as updated above.
+        sql = """
+            DELETE FROM device_lists_outbound_pokes
+            WHERE destination = ? AND stream_id > ? AND EXISTS (
+                SELECT 1 FROM device_lists_outbound_pokes AS later
+                WHERE later.destination = device_lists_outbound_pokes.destination
+                    AND later.user_id = device_lists_outbound_pokes.user_id
+                    AND later.device_id = device_lists_outbound_pokes.device_id
+                    AND later.stream_id > device_lists_outbound_pokes.stream_id
+            )
+        """
+        txn.execute(sql, (destination, stream_id))
+
     async def add_user_signature_change_to_streams(
         self, from_user_id: str, user_ids: List[str]
     ) -> int:
@@ -2099,6 +2121,10 @@ class DeviceStore(DeviceWorkerStore, DeviceBackgroundUpdateStore):
             self._get_e2e_device_keys_for_federation_query_inner.invalidate,
             (user_id,),
         )
+        txn.call_after(
+            self._get_e2e_device_keys_for_cs_api_for_user.invalidate,
+            (user_id,),
+        )
 
         min_stream_id = stream_ids[0]
 
@@ -134,6 +134,9 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
                     self._get_e2e_device_keys_for_federation_query_inner.invalidate(
                         (row.user_id,)
                     )
+                    self._get_e2e_device_keys_for_cs_api_for_user.invalidate(
+                        (row.user_id,)
+                    )
 
         super().process_replication_rows(stream_name, instance_name, token, rows)
 
@@ -220,8 +223,12 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
         self,
         query_list: Collection[Tuple[str, Optional[str]]],
         include_displaynames: bool = True,
-    ) -> Dict[str, Dict[str, JsonDict]]:
+    ) -> Dict[str, Dict[str, JsonMapping]]:
         """Fetch a list of device keys, formatted suitably for the C/S API.
+
+        The device keys of each user are cached, so the returned key data must
+        not be modified.
+
         Args:
             query_list: List of pairs of user_ids and device_ids.
             include_displaynames: Whether to include the displayname of returned devices
@@ -235,13 +242,107 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
         if not query_list:
             return {}
 
-        results = await self.get_e2e_device_keys_and_signatures(query_list)
+        # A map of user ID to the devices queried, or None for all devices.
+        queried_devices: Dict[str, Optional[Set[str]]] = {}
+        for user_id, device_id in query_list:
+            if device_id is None:
+                queried_devices[user_id] = None
+            elif user_id not in queried_devices:
+                queried_devices[user_id] = {device_id}
+            else:
+                device_ids = queried_devices[user_id]
+                if device_ids is not None:
+                    device_ids.add(device_id)
+
+        # We need to be careful with the caching here, as there may be a lag
+        # between a device being updated and the cache being invalidated (see
+        # `get_e2e_device_keys_for_federation_query`). Check that there have
+        # been no updates to the device lists of any users we have cached
+        # results for.
+        now_stream_id = self.get_device_stream_token()
+        cached_user_ids = [
+            user_id
+            for user_id in queried_devices
+            if self._get_e2e_device_keys_for_cs_api_for_user.cache.get_immediate(
+                (user_id, include_displaynames), None
+            )
+            is not None
+        ]
+        if cached_user_ids:
+            stale_user_ids = await self.db_pool.runInteraction(
+                "get_e2e_device_keys_for_cs_api_check",
+                self._get_users_with_device_list_updates_since_txn,
+                now_stream_id,
+                cached_user_ids,
+            )
+            for user_id in stale_user_ids:
+                self._get_e2e_device_keys_for_cs_api_for_user.invalidate((user_id,))
+
+        user_devices = await self._get_e2e_device_keys_for_cs_api_for_users(
+            queried_devices, include_displaynames
+        )
+
+        rv: Dict[str, Dict[str, JsonMapping]] = {}
+        for user_id, devices in user_devices.items():
+            if not devices:
+                continue
+
+            device_ids = queried_devices[user_id]
+            if device_ids is None:
+                rv[user_id] = dict(devices)
+            else:
+                rv[user_id] = {
+                    device_id: devices[device_id]
+                    for device_id in device_ids
+                    if device_id in devices
+                }
+
+        return rv
+
+    def _get_users_with_device_list_updates_since_txn(
+        self, txn: LoggingTransaction, stream_id: int, user_ids: Collection[str]
+    ) -> Set[str]:
+        """Get which of the given users have had updates to their device lists
+        at or after the given stream ID.
+        """
+        results: Set[str] = set()
+        for batch in batch_iter(user_ids, 1000):
+            clause, args = make_in_list_sql_clause(
+                self.database_engine, "user_id", batch
+            )
+            sql = f"""
+                SELECT user_id FROM device_lists_stream
+                WHERE stream_id >= ? AND {clause}
+            """
+            txn.execute(sql, (stream_id, *args))
+            results.update(user_id for (user_id,) in txn)
+
+        return results
+
+    @cached(num_args=2, tree=True, iterable=True)
+    async def _get_e2e_device_keys_for_cs_api_for_user(
+        self, user_id: str, include_displaynames: bool
+    ) -> Mapping[str, JsonMapping]:
+        """Get the device keys for all of the user's devices, formatted suitably
+        for the C/S API. See `get_e2e_device_keys_for_cs_api`.
+        """
+        raise NotImplementedError()
+
+    @cachedList(
+        cached_method_name="_get_e2e_device_keys_for_cs_api_for_user",
+        list_name="user_ids",
+    )
+    async def _get_e2e_device_keys_for_cs_api_for_users(
+        self, user_ids: Collection[str], include_displaynames: bool
+    ) -> Mapping[str, Mapping[str, JsonMapping]]:
+        results = await self.get_e2e_device_keys_and_signatures(
+            [(user_id, None) for user_id in user_ids]
+        )
 
         # Build the result structure, un-jsonify the results, and add the
         # "unsigned" section
-        rv: Dict[str, Dict[str, JsonDict]] = {}
+        rv: Dict[str, Dict[str, JsonMapping]] = {user_id: {} for user_id in user_ids}
         for user_id, device_keys in results.items():
-            rv[user_id] = {}
             for device_id, device_info in device_keys.items():
                 r = device_info.keys
                 if r is None:
@@ -1140,55 +1241,41 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
                 are the number of claims that were not fulfilled.
         """
         results: Dict[str, Dict[str, Dict[str, JsonDict]]] = {}
-        missing: List[Tuple[str, str, str, int]] = []
+        if not query_list:
+            return results, []
+
+        unfulfilled_claim_counts: Dict[Tuple[str, str, str], int] = {}
+        for user_id, device_id, algorithm, count in query_list:
+            unfulfilled_claim_counts[user_id, device_id, algorithm] = count
+
         if isinstance(self.database_engine, PostgresEngine):
             # If we can use execute_values we can use a single batch query
             # in autocommit mode.
-            unfulfilled_claim_counts: Dict[Tuple[str, str, str], int] = {}
-            for user_id, device_id, algorithm, count in query_list:
-                unfulfilled_claim_counts[user_id, device_id, algorithm] = count
-
-            bulk_claims = await self.db_pool.runInteraction(
+            claims = await self.db_pool.runInteraction(
                 "claim_e2e_one_time_keys",
                 self._claim_e2e_one_time_keys_bulk,
                 query_list,
                 db_autocommit=True,
             )
-
-            for user_id, device_id, algorithm, key_id, key_json in bulk_claims:
-                device_results = results.setdefault(user_id, {}).setdefault(
-                    device_id, {}
-                )
-                device_results[f"{algorithm}:{key_id}"] = json_decoder.decode(key_json)
-                unfulfilled_claim_counts[(user_id, device_id, algorithm)] -= 1
-
-            # Did we get enough OTKs?
-            missing = [
-                (user, device, alg, count)
-                for (user, device, alg), count in unfulfilled_claim_counts.items()
-                if count > 0
-            ]
         else:
-            for user_id, device_id, algorithm, count in query_list:
-                claim_rows = await self.db_pool.runInteraction(
-                    "claim_e2e_one_time_keys",
-                    self._claim_e2e_one_time_key_simple,
-                    user_id,
-                    device_id,
-                    algorithm,
-                    count,
-                    db_autocommit=False,
-                )
-                if claim_rows:
-                    device_results = results.setdefault(user_id, {}).setdefault(
-                        device_id, {}
-                    )
-                    for claim_row in claim_rows:
-                        device_results[claim_row[0]] = json_decoder.decode(claim_row[1])
-                # Did we get enough OTKs?
-                count -= len(claim_rows)
-                if count:
-                    missing.append((user_id, device_id, algorithm, count))
+            # Otherwise claim all the keys in a single transaction.
+            claims = await self.db_pool.runInteraction(
+                "claim_e2e_one_time_keys",
+                self._claim_e2e_one_time_keys_simple,
+                query_list,
+            )
+
+        for user_id, device_id, algorithm, key_id, key_json in claims:
+            device_results = results.setdefault(user_id, {}).setdefault(device_id, {})
+            device_results[f"{algorithm}:{key_id}"] = json_decoder.decode(key_json)
+            unfulfilled_claim_counts[(user_id, device_id, algorithm)] -= 1
+
+        # Did we get enough OTKs?
+        missing = [
+            (user, device, alg, count)
+            for (user, device, alg), count in unfulfilled_claim_counts.items()
+            if count > 0
+        ]
 
         return results, missing
 
@@ -1216,7 +1303,11 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
             # (see https://www.sqlite.org/lang_update.html#update_from), but we do not
             # have an equivalent of psycopg2's execute_values to do this in one query.
         else:
-            return await self._claim_e2e_fallback_keys_simple(query_list)
+            return await self.db_pool.runInteraction(
+                "_claim_e2e_fallback_keys_simple",
+                self._claim_e2e_fallback_keys_simple_txn,
+                query_list,
+            )
 
     def _claim_e2e_fallback_keys_bulk_txn(
         self,
@@ -1256,14 +1347,17 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
 
         return results
 
-    async def _claim_e2e_fallback_keys_simple(
+    def _claim_e2e_fallback_keys_simple_txn(
         self,
+        txn: LoggingTransaction,
         query_list: Iterable[Tuple[str, str, str, bool]],
     ) -> Dict[str, Dict[str, Dict[str, JsonDict]]]:
-        """Naive, inefficient implementation of claim_e2e_fallback_keys for SQLite."""
+        """Naive implementation of claim_e2e_fallback_keys for SQLite."""
         results: Dict[str, Dict[str, Dict[str, JsonDict]]] = {}
+        used_user_device: Set[Tuple[str, str]] = set()
         for user_id, device_id, algorithm, mark_as_used in query_list:
-            row = await self.db_pool.simple_select_one(
+            row = self.db_pool.simple_select_one_txn(
+                txn,
                 table="e2e_fallback_keys_json",
                 keyvalues={
                     "user_id": user_id,
@@ -1271,7 +1365,6 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
                     "algorithm": algorithm,
                 },
                 retcols=("key_id", "key_json", "used"),
-                desc="_get_fallback_key",
                 allow_none=True,
             )
             if row is None:
@@ -1281,7 +1374,8 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
 
             # Mark fallback key as used if not already.
             if not used and mark_as_used:
-                await self.db_pool.simple_update_one(
+                self.db_pool.simple_update_one_txn(
+                    txn,
                     table="e2e_fallback_keys_json",
                     keyvalues={
                         "user_id": user_id,
@@ -1290,34 +1384,36 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
                         "key_id": key_id,
                     },
                     updatevalues={"used": True},
-                    desc="_get_fallback_key_set_used",
-                )
-                await self.invalidate_cache_and_stream(
-                    "get_e2e_unused_fallback_key_types", (user_id, device_id)
                 )
+                used_user_device.add((user_id, device_id))
 
             device_results = results.setdefault(user_id, {}).setdefault(device_id, {})
             device_results[f"{algorithm}:{key_id}"] = json_decoder.decode(key_json)
 
+        self._invalidate_cache_and_stream_bulk(
+            txn, self.get_e2e_unused_fallback_key_types, used_user_device
+        )
+
         return results
 
     @trace
-    def _claim_e2e_one_time_key_simple(
+    def _claim_e2e_one_time_keys_simple(
         self,
         txn: LoggingTransaction,
-        user_id: str,
-        device_id: str,
-        algorithm: str,
-        count: int,
-    ) -> List[Tuple[str, str]]:
-        """Claim OTK for device for DBs that don't support RETURNING.
+        query_list: Iterable[Tuple[str, str, str, int]],
+    ) -> List[Tuple[str, str, str, str, str]]:
+        """Claim OTKs for DBs that don't support RETURNING.
+
+        Args:
+            query_list: Collection of tuples (user_id, device_id, algorithm, count)
+                as passed to claim_e2e_one_time_keys.
 
         Returns:
-            A tuple of key name (algorithm + key ID) and key JSON, if an
-            OTK was found.
+            A list of tuples (user_id, device_id, algorithm, key_id, key_json)
+            for each OTK claimed.
         """
 
-        # Return the oldest keys from this device (based on `ts_added_ms`).
+        # Return the oldest keys from each device (based on `ts_added_ms`).
         # Doing so means that keys are issued in the same order they were uploaded,
         # which reduces the chances of a client expiring its copy of a (private)
         # key while the public key is still on the server, waiting to be issued.
@@ -1328,27 +1424,36 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
             LIMIT ?
         """
 
-        txn.execute(sql, (user_id, device_id, algorithm, count))
-        otk_rows = list(txn)
-        if not otk_rows:
-            return []
+        claimed: List[Tuple[str, str, str, str, str]] = []
+        seen_user_device: Set[Tuple[str, str]] = set()
+        for user_id, device_id, algorithm, count in query_list:
+            txn.execute(sql, (user_id, device_id, algorithm, count))
+            otk_rows = list(txn)
+            if not otk_rows:
+                continue
 
-        self.db_pool.simple_delete_many_txn(
-            txn,
-            table="e2e_one_time_keys_json",
-            column="key_id",
-            values=[otk_row[0] for otk_row in otk_rows],
-            keyvalues={
-                "user_id": user_id,
-                "device_id": device_id,
-                "algorithm": algorithm,
-            },
-        )
-        self._invalidate_cache_and_stream(
-            txn, self.count_e2e_one_time_keys, (user_id, device_id)
+            self.db_pool.simple_delete_many_txn(
+                txn,
+                table="e2e_one_time_keys_json",
+                column="key_id",
+                values=[otk_row[0] for otk_row in otk_rows],
+                keyvalues={
+                    "user_id": user_id,
+                    "device_id": device_id,
+                    "algorithm": algorithm,
+                },
+            )
+            seen_user_device.add((user_id, device_id))
+            claimed.extend(
+                (user_id, device_id, algorithm, key_id, key_json)
+                for key_id, key_json in otk_rows
+            )
+
+        self._invalidate_cache_and_stream_bulk(
+            txn, self.count_e2e_one_time_keys, seen_user_device
         )
 
-        return [(f"{algorithm}:{key_id}", key_json) for key_id, key_json in otk_rows]
+        return claimed
 
     @trace
     def _claim_e2e_one_time_keys_bulk(
@@ -1372,24 +1477,28 @@ class EndToEndKeyWorkerStore(EndToEndKeyBackgroundStore, CacheInvalidationWorker
         # Doing so means that keys are issued in the same order they were uploaded,
         # which reduces the chances of a client expiring its copy of a (private)
         # key while the public key is still on the server, waiting to be issued.
+        #
+        # For each device we only look at (and lock) as many keys as we need,
+        # using the (user_id, device_id, algorithm, ts_added_ms) index. Keys
+        # that are locked by a concurrent claim are skipped, rather than
+        # waiting for that claim to finish and then finding the keys have been
+        # deleted.
         sql = """
             WITH claims(user_id, device_id, algorithm, claim_count) AS (
                 VALUES ?
-            ), ranked_keys AS (
-                SELECT
-                    user_id, device_id, algorithm, key_id, claim_count,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY (user_id, device_id, algorithm)
-                        ORDER BY ts_added_ms
-                    ) AS r
-                FROM e2e_one_time_keys_json
-                    JOIN claims USING (user_id, device_id, algorithm)
             )
             DELETE FROM e2e_one_time_keys_json k
             WHERE (user_id, device_id, algorithm, key_id) IN (
-                SELECT user_id, device_id, algorithm, key_id
-                FROM ranked_keys
-                WHERE r <= claim_count
+                SELECT claims.user_id, claims.device_id, claims.algorithm, c.key_id
+                FROM claims, LATERAL (
+                    SELECT key_id FROM e2e_one_time_keys_json
+                    WHERE user_id = claims.user_id
+                        AND device_id = claims.device_id
+                        AND algorithm = claims.algorithm
+                    ORDER BY ts_added_ms
+                    LIMIT claims.claim_count
+                    FOR UPDATE SKIP LOCKED
+                ) AS c
             )
             RETURNING user_id, device_id, algorithm, key_id, key_json;
         """
@@ -1191,6 +1191,57 @@ class EventFederationWorkerStore(SignatureWorkerStore, EventsWorkerStore, SQLBas
 
         return [row[0] for row in txn]
 
+    async def get_prev_events_for_rooms(
+        self, room_ids: StrCollection
+    ) -> Dict[str, List[str]]:
+        """
+        Gets a subset of the current forward extremities for each of the given
+        rooms, in a single query per batch of rooms.
+
+        This is the bulk equivalent of `get_prev_events_for_room`, and applies the
+        same limit of 10 extremities per room.
+
+        Args:
+            room_ids: the rooms to fetch the extremities of
+
+        Returns:
+            A map from room ID to the event IDs of (up to 10 of) its forward
+            extremities, newest first. Rooms without any forward extremities are
+            omitted.
+        """
+
+        def _get_prev_events_for_rooms_txn(
+            txn: LoggingTransaction,
+        ) -> Dict[str, List[str]]:
+            results: Dict[str, List[str]] = {}
+            for batch in batch_iter(room_ids, 1000):
+                clause, args = make_in_list_sql_clause(
+                    self.database_engine, "f.room_id", batch
+                )
+                sql = f"""
+                    SELECT room_id, event_id FROM (
+                        SELECT
+                            f.room_id, e.event_id,
+                            ROW_NUMBER() OVER (
+                                PARTITION BY f.room_id ORDER BY e.depth DESC
+                            ) AS r
+                        FROM event_forward_extremities AS f
+                        INNER JOIN events AS e USING (event_id)
+                        WHERE {clause}
+                    ) AS extremities
+                    WHERE r <= 10
+                    ORDER BY room_id, r
+                """
+                txn.execute(sql, args)
+                for room_id, event_id in txn:
+                    results.setdefault(room_id, []).append(event_id)
+
+            return results
+
+        return await self.db_pool.runInteraction(
+            "get_prev_events_for_rooms", _get_prev_events_for_rooms_txn
+        )
+
     async def get_rooms_with_many_extremities(
         self, min_count: int, limit: int, room_id_filter: Iterable[str]
     ) -> List[str]:
@@ -39,7 +39,7 @@ from typing import (
 )
 
 import attr
-from prometheus_client import Counter
+from prometheus_client import Counter, Histogram
 from typing_extensions import TypedDict
 
 import synapse.metrics
@@ -95,6 +95,26 @@ event_counter = Counter(
     ["type", "origin_type", "origin_entity"],
 )
 
+# The number of rooms whose events are persisted in each transaction.
+persist_events_batch_rooms = Histogram(
+    "synapse_storage_events_persist_batch_rooms",
+    "Number of rooms whose events were persisted in a single transaction",
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, "+Inf"),
+)
+
+# The number of events persisted in each transaction.
+persist_events_batch_events = Histogram(
+    "synapse_storage_events_persist_batch_events",
+    "Number of events persisted in a single transaction",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, "+Inf"),
+)
+
+# How long the transaction persisting events took, including the commit.
+persist_events_txn_duration = Histogram(
+    "synapse_storage_events_persist_txn_duration_seconds",
+    "Time taken by each transaction persisting events",
+)
+
 # State event type/key pairs that we need to gather to fill in the
 # `sliding_sync_joined_rooms`/`sliding_sync_membership_snapshots` tables.
 SLIDING_SYNC_RELEVANT_STATE_SET = (
@@ -220,6 +240,27 @@ class NewEventChainLinks:
     links: List[Tuple[int, int]] = attr.Factory(list)
 
 
+@attr.s(slots=True, auto_attribs=True, eq=False)
+class RoomEventsToPersist:
+    """A batch of events in a room to persist, along with the updates to the
+    room's current state and forward extremities.
+
+    Attributes:
+        room_id: The room the events are in.
+        events_and_contexts: The events to persist.
+        state_delta_for_room: The delta to apply to the room state
+        new_forward_extremities: A set of event IDs that are the new forward
+            extremities of the room.
+        new_event_links: The new auth chain links for the events.
+    """
+
+    room_id: str
+    events_and_contexts: List[Tuple[EventBase, EventContext]]
+    state_delta_for_room: Optional[DeltaState]
+    new_forward_extremities: Optional[Set[str]]
+    new_event_links: Dict[str, NewEventChainLinks]
+
+
 class PersistEventsStore:
     """Contains all the functions for writing events to the database.
 
@@ -300,6 +341,51 @@ class PersistEventsStore:
                 a room that has been un-partial stated.
         """
 
+        await self._persist_events_and_state_updates_for_rooms(
+            [
+                RoomEventsToPersist(
+                    room_id=room_id,
+                    events_and_contexts=events_and_contexts,
+                    state_delta_for_room=state_delta_for_room,
+                    new_forward_extremities=new_forward_extremities,
+                    new_event_links=new_event_links,
+                )
+            ],
+            use_negative_stream_ordering=use_negative_stream_ordering,
+            inhibit_local_membership_updates=inhibit_local_membership_updates,
+        )
+
+    @trace
+    async def _persist_events_and_state_updates_for_rooms(
+        self,
+        rooms: Sequence[RoomEventsToPersist],
+        *,
+        use_negative_stream_ordering: bool = False,
+        inhibit_local_membership_updates: bool = False,
+    ) -> None:
+        """Persist events in a number of rooms, alongside updates to the current
+        state and forward extremities tables, in a single transaction.
+
+        Assumes that we are only persisting one batch of events for each room
+        at a time, and that there is at most one batch per room in `rooms`.
+
+        Args:
+            rooms: The batches of events to persist for each room.
+            use_negative_stream_ordering: Whether to start stream_ordering on
+                the negative side and decrement. This should be set as True
+                for backfilled events because backfilled events get a negative
+                stream ordering so they don't come down incremental `/sync`.
+            inhibit_local_membership_updates: Stop the local_current_membership
+                from being updated by these events. This should be set to True
+                for backfilled events because backfilled events in the past do
+                not affect the current local state.
+
+        Raises:
+            PartialStateConflictError: if attempting to persist a partial state event in
+                a room that has been un-partial stated.
+        """
+        num_events = sum(len(room.events_and_contexts) for room in rooms)
+
         # We want to calculate the stream orderings as late as possible, as
         # we only notify after all events with a lesser stream ordering have
         # been persisted. I.e. if we spend 10s inside the with block then
@@ -317,69 +403,98 @@ class PersistEventsStore:
         # Note: Multiple instances of this function cannot be in flight at
         # the same time for the same room.
         if use_negative_stream_ordering:
-            stream_ordering_manager = self._backfill_id_gen.get_next_mult(
-                len(events_and_contexts)
-            )
+            stream_ordering_manager = self._backfill_id_gen.get_next_mult(num_events)
         else:
-            stream_ordering_manager = self._stream_id_gen.get_next_mult(
-                len(events_and_contexts)
-            )
+            stream_ordering_manager = self._stream_id_gen.get_next_mult(num_events)
 
         async with stream_ordering_manager as stream_orderings:
-            for (event, _), stream in zip(events_and_contexts, stream_orderings):
-                # XXX: We can't rely on `stream_ordering`/`instance_name` being correct
-                # at this point. We could be working with events that were previously
-                # persisted as an `outlier` with one `stream_ordering` but are now being
-                # persisted again and de-outliered and are being assigned a different
-                # `stream_ordering` here that won't end up being used.
-                # `_update_outliers_txn()` will fix this discrepancy (always use the
-                # `stream_ordering` from the first time it was persisted).
-                event.internal_metadata.stream_ordering = stream
-                event.internal_metadata.instance_name = self._instance_name
-
-            sliding_sync_table_changes = None
-            if state_delta_for_room is not None:
-                sliding_sync_table_changes = (
-                    await self._calculate_sliding_sync_table_changes(
-                        room_id, events_and_contexts, state_delta_for_room
+            # Hand out the stream orderings to each room in turn, so that the
+            # events in each room are still ordered.
+            stream_orderings_iter = iter(stream_orderings)
+            for room in rooms:
+                for (event, _), stream in zip(
+                    room.events_and_contexts, stream_orderings_iter
+                ):
+                    # XXX: We can't rely on `stream_ordering`/`instance_name` being correct
+                    # at this point. We could be working with events that were previously
+                    # persisted as an `outlier` with one `stream_ordering` but are now being
+                    # persisted again and de-outliered and are being assigned a different
+                    # `stream_ordering` here that won't end up being used.
+                    # `_update_outliers_txn()` will fix this discrepancy (always use the
+                    # `stream_ordering` from the first time it was persisted).
+                    event.internal_metadata.stream_ordering = stream
+                    event.internal_metadata.instance_name = self._instance_name
+
+            sliding_sync_table_changes: Dict[str, SlidingSyncTableChanges] = {}
+            for room in rooms:
+                if room.state_delta_for_room is not None:
+                    sliding_sync_table_changes[
+                        room.room_id
+                    ] = await self._calculate_sliding_sync_table_changes(
+                        room.room_id,
+                        room.events_and_contexts,
+                        room.state_delta_for_room,
                     )
-                )
 
+            start = self._clock.time()
             await self.db_pool.runInteraction(
                 "persist_events",
-                self._persist_events_txn,
-                room_id=room_id,
-                events_and_contexts=events_and_contexts,
+                self._persist_events_for_rooms_txn,
+                rooms=rooms,
                 inhibit_local_membership_updates=inhibit_local_membership_updates,
-                state_delta_for_room=state_delta_for_room,
-                new_forward_extremities=new_forward_extremities,
-                new_event_links=new_event_links,
                 sliding_sync_table_changes=sliding_sync_table_changes,
             )
-            persist_event_counter.inc(len(events_and_contexts))
+            persist_events_txn_duration.observe(self._clock.time() - start)
+            persist_events_batch_rooms.observe(len(rooms))
+            persist_events_batch_events.observe(num_events)
+            persist_event_counter.inc(num_events)
 
             if not use_negative_stream_ordering:
                 # we don't want to set the event_persisted_position to a negative
                 # stream_ordering.
-                synapse.metrics.event_persisted_position.set(stream)
-
-            for event, context in events_and_contexts:
-                if context.app_service:
-                    origin_type = "local"
-                    origin_entity = context.app_service.id
-                elif self.hs.is_mine_id(event.sender):
-                    origin_type = "local"
-                    origin_entity = "*client*"
-                else:
-                    origin_type = "remote"
-                    origin_entity = get_domain_from_id(event.sender)
+                synapse.metrics.event_persisted_position.set(stream_orderings[-1])
+
+            for room in rooms:
+                for event, context in room.events_and_contexts:
+                    if context.app_service:
+                        origin_type = "local"
+                        origin_entity = context.app_service.id
+                    elif self.hs.is_mine_id(event.sender):
+                        origin_type = "local"
+                        origin_entity = "*client*"
+                    else:
+                        origin_type = "remote"
+                        origin_entity = get_domain_from_id(event.sender)
 
-                event_counter.labels(event.type, origin_type, origin_entity).inc()
+                    event_counter.labels(event.type, origin_type, origin_entity).inc()
 
-            if new_forward_extremities:
-                self.store.get_latest_event_ids_in_room.prefill(
-                    (room_id,), frozenset(new_forward_extremities)
-                )
+                if room.new_forward_extremities:
+                    self.store.get_latest_event_ids_in_room.prefill(
+                        (room.room_id,), frozenset(room.new_forward_extremities)
+                    )
+
+    def _persist_events_for_rooms_txn(
+        self,
+        txn: LoggingTransaction,
+        *,
+        rooms: Sequence[RoomEventsToPersist],
+        inhibit_local_membership_updates: bool,
+        sliding_sync_table_changes: Dict[str, SlidingSyncTableChanges],
+    ) -> None:
+        """Persist the events for each of the given rooms in turn. See
+        `_persist_events_txn`.
+        """
+        for room in rooms:
+            self._persist_events_txn(
+                txn,
+                room_id=room.room_id,
+                events_and_contexts=room.events_and_contexts,
+                inhibit_local_membership_updates=inhibit_local_membership_updates,
+                state_delta_for_room=room.state_delta_for_room,
+                new_forward_extremities=room.new_forward_extremities,
+                new_event_links=room.new_event_links,
+                sliding_sync_table_changes=sliding_sync_table_changes.get(room.room_id),
+            )
 
     async def _calculate_sliding_sync_table_changes(
         self,
@@ -1653,6 +1653,27 @@ class EventsWorkerStore(SQLBaseStore):
 
         return {r[0] for r in rows}
 
+    async def have_persisted_events(self, event_ids: Iterable[str]) -> Set[str]:
+        """Given a list of event ids, check which of them are in the events
+        table, including outliers.
+
+        Unlike `have_seen_events` this always hits the database, so can be used
+        to check whether a transaction persisting the events was committed.
+        """
+        rows = cast(
+            List[Tuple[str]],
+            await self.db_pool.simple_select_many_batch(
+                table="events",
+                retcols=("event_id",),
+                column="event_id",
+                iterable=list(event_ids),
+                keyvalues={},
+                desc="have_persisted_events",
+            ),
+        )
+
+        return {r[0] for r in rows}
+
     @trace
     @tag_args
     async def have_seen_events(
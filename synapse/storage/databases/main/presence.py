@@ -195,8 +195,7 @@ class PresenceStore(PresenceBackgroundUpdateStore, CacheInvalidationWorkerStore)
         """Get updates for presence replication stream.
 
         Args:
-            instance_name: The writer we want to fetch updates from. Unused
-                here since there is only ever one writer.
+            instance_name: The writer we want to fetch updates from.
             last_id: The token to fetch updates from. Exclusive.
             current_id: The token to fetch updates up to. Inclusive.
             limit: The requested limit for the number of rows to return. The
@@ -224,11 +223,11 @@ class PresenceStore(PresenceBackgroundUpdateStore, CacheInvalidationWorkerStore)
                     last_federation_update_ts, last_user_sync_ts,
                     status_msg, currently_active
                 FROM presence_stream
-                WHERE ? < stream_id AND stream_id <= ?
+                WHERE ? < stream_id AND stream_id <= ? AND instance_name = ?
                 ORDER BY stream_id ASC
                 LIMIT ?
             """
-            txn.execute(sql, (last_id, current_id, limit))
+            txn.execute(sql, (last_id, current_id, instance_name, limit))
             updates = cast(
                 List[Tuple[int, list]],
                 [(row[0], row[1:]) for row in txn],
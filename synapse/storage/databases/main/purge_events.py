@@ -20,7 +20,7 @@
 #
 
 import logging
-from typing import Any, Set, Tuple, cast
+from typing import Any, List, Optional, Set, Tuple, cast
 
 from synapse.api.errors import SynapseError
 from synapse.storage.database import LoggingTransaction
@@ -32,6 +32,30 @@ from synapse.types import RoomStreamToken
 
 logger = logging.getLogger(__name__)
 
+# The number of events whose rows we delete in each transaction when purging a
+# room.
+PURGE_ROOM_EVENTS_BATCH_SIZE = 1000
+
+# How long to pause between batches of events when purging a room, so that a
+# large purge doesn't overwhelm the database.
+PURGE_ROOM_EVENTS_BATCH_SLEEP_S = 0.1
+
+# Tables which lack an index on room_id but have one on event_id, and which we
+# therefore clear out by event ID when purging a room.
+_PURGE_ROOM_TABLES_BY_EVENT_ID = (
+    "event_auth",
+    "event_edges",
+    "event_json",
+    "event_push_actions_staging",
+    "event_relations",
+    "event_to_state_groups",
+    "event_auth_chains",
+    "event_auth_chain_to_calculate",
+    "redactions",
+    "rejections",
+    "state_events",
+)
+
 
 class PurgeEventsStore(StateGroupWorkerStore, CacheInvalidationWorkerStore):
     async def purge_history(
@@ -342,7 +366,28 @@ class PurgeEventsStore(StateGroupWorkerStore, CacheInvalidationWorkerStore):
             The list of state groups to delete.
         """
 
-        # This first runs the purge transaction with READ_COMMITTED isolation level,
+        # We first delete the rows keyed by event ID in batches, each in its own
+        # transaction, so that we don't hold locks (and block event persistence)
+        # for the entire purge of a large room. The batches are deleted with the
+        # READ_COMMITTED isolation level, and walk the room's events in stream
+        # order, so it is safe to re-run the purge if it gets interrupted.
+        logger.info("[purge] Removing events in batches")
+        last_stream_ordering: Optional[int] = None
+        while True:
+            last_stream_ordering = await self.db_pool.runInteraction(
+                "purge_room_events_batch",
+                self._purge_room_events_batch_txn,
+                room_id=room_id,
+                from_stream_ordering=last_stream_ordering,
+                batch_size=PURGE_ROOM_EVENTS_BATCH_SIZE,
+                isolation_level=IsolationLevel.READ_COMMITTED,
+            )
+            if last_stream_ordering is None:
+                break
+
+            await self._clock.sleep(PURGE_ROOM_EVENTS_BATCH_SLEEP_S)
+
+        # This then runs the purge transaction with READ_COMMITTED isolation level,
         # meaning any new rows in the tables will not trigger a serialization error.
         # We then run the same purge a second time without this isolation level to
         # purge any of those rows which were added during the first.
@@ -364,6 +409,74 @@ class PurgeEventsStore(StateGroupWorkerStore, CacheInvalidationWorkerStore):
 
         logger.info("[purge] Done with main purge")
 
+    def _purge_room_events_batch_txn(
+        self,
+        txn: LoggingTransaction,
+        room_id: str,
+        from_stream_ordering: Optional[int],
+        batch_size: int,
+    ) -> Optional[int]:
+        """Deletes the rows keyed by event ID for a batch of the room's events.
+
+        The events themselves are left in place, and are deleted along with the
+        rest of the room by `_purge_room_txn`.
+
+        Args:
+            room_id: The room being purged.
+            from_stream_ordering: Handle events with a stream ordering after
+                this one, or None to start from the beginning of the room.
+            batch_size: The maximum number of events to handle.
+
+        Returns:
+            The stream ordering of the last event handled, or None if there
+            are no more events in the room.
+        """
+        sql = "SELECT event_id, stream_ordering FROM events WHERE room_id = ?"
+        args: List[Any] = [room_id]
+        if from_stream_ordering is not None:
+            sql += " AND stream_ordering > ?"
+            args.append(from_stream_ordering)
+        sql += " ORDER BY stream_ordering LIMIT ?"
+        args.append(batch_size)
+
+        txn.execute(sql, args)
+        rows = cast(List[Tuple[str, int]], txn.fetchall())
+        if not rows:
+            return None
+
+        event_ids = [event_id for event_id, _ in rows]
+        logger.info("[purge] removing a batch of %i events", len(event_ids))
+
+        referenced_chain_id_tuples = self.db_pool.simple_select_many_txn(
+            txn,
+            table="event_auth_chains",
+            column="event_id",
+            iterable=event_ids,
+            keyvalues={},
+            retcols=("chain_id", "sequence_number"),
+        )
+        txn.execute_batch(
+            """
+            DELETE FROM event_auth_chain_links WHERE
+            origin_chain_id = ? AND origin_sequence_number = ?
+            """,
+            referenced_chain_id_tuples,
+        )
+
+        for table in _PURGE_ROOM_TABLES_BY_EVENT_ID:
+            self.db_pool.simple_delete_many_txn(
+                txn,
+                table=table,
+                column="event_id",
+                values=event_ids,
+                keyvalues={},
+            )
+
+        if len(rows) < batch_size:
+            return None
+
+        return rows[-1][1]
+
     def _purge_room_txn(self, txn: LoggingTransaction, room_id: str) -> None:
         # This collides with event persistence so we cannot write new events and metadata into
         # a room while deleting it or this transaction will fail.
@@ -400,19 +513,7 @@ class PurgeEventsStore(StateGroupWorkerStore, CacheInvalidationWorkerStore):
         )
 
         # Now we delete tables which lack an index on room_id but have one on event_id
-        for table in (
-            "event_auth",
-            "event_edges",
-            "event_json",
-            "event_push_actions_staging",
-            "event_relations",
-            "event_to_state_groups",
-            "event_auth_chains",
-            "event_auth_chain_to_calculate",
-            "redactions",
-            "rejections",
-            "state_events",
-        ):
+        for table in _PURGE_ROOM_TABLES_BY_EVENT_ID:
             logger.info("[purge] removing from %s", table)
 
             txn.execute(
@@ -54,6 +54,7 @@ from synapse.types import (
     JsonMapping,
     MultiWriterStreamToken,
     PersistedPosition,
+    ReadReceipt,
     StrCollection,
 )
 from synapse.util import json_encoder
@@ -355,11 +356,17 @@ class ReceiptsWorkerStore(SQLBaseStore):
                 room_ids, from_key.stream
             )
 
-        results = await self._get_linearized_receipts_for_rooms(
-            room_ids, to_key, from_key=from_key
+        receipts_by_room = await self._get_receipts_for_rooms_in_range(
+            room_ids, to_key, from_key
         )
 
-        return [ev for res in results.values() for ev in res]
+        return [
+            ev
+            for room_id, receipts in receipts_by_room.items()
+            for ev in self._receipts_in_range_to_edus(
+                room_id, receipts, to_key, from_key
+            )
+        ]
 
     async def get_linearized_receipts_for_room(
         self,
@@ -386,105 +393,168 @@ class ReceiptsWorkerStore(SQLBaseStore):
             ):
                 return []
 
-        return await self._get_linearized_receipts_for_room(room_id, to_key, from_key)
+        receipts_by_room = await self._get_receipts_for_rooms_in_range(
+            (room_id,), to_key, from_key
+        )
+
+        return self._receipts_in_range_to_edus(
+            room_id, receipts_by_room.get(room_id, ()), to_key, from_key
+        )
 
-    @cached(tree=True)
-    async def _get_linearized_receipts_for_room(
+    async def _get_receipts_for_rooms_in_range(
         self,
-        room_id: str,
+        room_ids: Collection[str],
         to_key: MultiWriterStreamToken,
-        from_key: Optional[MultiWriterStreamToken] = None,
-    ) -> Sequence[JsonMapping]:
-        """See get_linearized_receipts_for_room"""
-
-        def f(txn: LoggingTransaction) -> List[Tuple[str, str, str, str]]:
-            if from_key:
-                sql = """
-                    SELECT stream_id, instance_name, receipt_type, user_id, event_id, data
-                    FROM receipts_linearized
-                    WHERE room_id = ? AND stream_id > ? AND stream_id <= ?
-                """
-
-                txn.execute(
-                    sql, (room_id, from_key.stream, to_key.get_max_stream_pos())
-                )
+        from_key: Optional[MultiWriterStreamToken],
+    ) -> Mapping[str, Sequence[Tuple[str, int, ReceiptInRoom]]]:
+        """Get the receipts in the given rooms which may fall between the given
+        tokens. The results still need to be filtered with
+        `_receipts_in_range_to_edus`.
+
+        Rooms whose receipts are in the `_get_receipts_in_room` cache are served
+        from there. For the other rooms, we only fetch the receipts in the range
+        from the database if we have a `from_key`, rather than loading every
+        receipt in the room. All the room's receipts are only loaded (and
+        cached) when fetching from the start of the stream.
+        """
+        results: Dict[str, Sequence[Tuple[str, int, ReceiptInRoom]]] = {}
+        missing_room_ids = []
+        for room_id in room_ids:
+            receipts = self._get_receipts_in_room.cache.get_immediate((room_id,), None)
+            if receipts is None:
+                missing_room_ids.append(room_id)
             else:
-                sql = """
-                    SELECT stream_id, instance_name, receipt_type, user_id, event_id, data
-                    FROM receipts_linearized WHERE
-                    room_id = ? AND stream_id <= ?
-                """
+                results[room_id] = receipts
 
-                txn.execute(sql, (room_id, to_key.get_max_stream_pos()))
+        if not missing_room_ids:
+            return results
 
-            return [
-                (receipt_type, user_id, event_id, data)
-                for stream_id, instance_name, receipt_type, user_id, event_id, data in txn
-                if MultiWriterStreamToken.is_stream_position_in_range(
-                    from_key, to_key, instance_name, stream_id
+        if from_key is None:
+            results.update(await self._get_receipts_in_rooms(missing_room_ids))
+        else:
+            results.update(
+                await self.db_pool.runInteraction(
+                    "_get_receipts_for_rooms_in_range",
+                    self._get_receipts_in_rooms_txn,
+                    missing_room_ids,
+                    from_key.stream,
+                    to_key.get_max_stream_pos(),
                 )
-            ]
+            )
 
-        rows = await self.db_pool.runInteraction("get_linearized_receipts_for_room", f)
+        return results
 
-        if not rows:
-            return []
+    @staticmethod
+    def _receipts_in_range_to_edus(
+        room_id: str,
+        receipts: Iterable[Tuple[str, int, ReceiptInRoom]],
+        to_key: MultiWriterStreamToken,
+        from_key: Optional[MultiWriterStreamToken],
+    ) -> List[JsonMapping]:
+        """Converts the receipts in a room that were sent between the given
+        tokens into a receipt EDU.
 
-        content: JsonDict = {}
-        for receipt_type, user_id, event_id, data in rows:
-            content.setdefault(event_id, {}).setdefault(receipt_type, {})[user_id] = (
-                db_to_json(data)
+        Args:
+            room_id: The room the receipts are in.
+            receipts: The receipts in the room, as returned by
+                `_get_receipts_in_room`.
+            to_key: Max stream id of receipts to include.
+            from_key: Min stream id of receipts to include. None includes all
+                receipts up to `to_key`.
+
+        Returns:
+            A list containing the receipt EDU, or an empty list if there are no
+            receipts in range.
+        """
+        receipts_in_range = [
+            receipt
+            for instance_name, stream_id, receipt in receipts
+            if MultiWriterStreamToken.is_stream_position_in_range(
+                from_key, to_key, instance_name, stream_id
             )
+        ]
+        if not receipts_in_range:
+            return []
 
-        return [{"type": EduTypes.RECEIPT, "room_id": room_id, "content": content}]
+        return [
+            {
+                "room_id": room_id,
+                "type": EduTypes.RECEIPT,
+                "content": ReceiptInRoom.merge_to_content(receipts_in_range),
+            }
+        ]
+
+    @cached(max_entries=100000, iterable=True)
+    async def _get_receipts_in_room(
+        self, room_id: str
+    ) -> Sequence[Tuple[str, int, ReceiptInRoom]]:
+        """Get the latest receipts in the room for each user, receipt type and
+        thread, along with the position in the receipts stream they were
+        written at.
+
+        This acts as an in-memory index of receipts per room, which is used to
+        serve receipts to clients for any stream range. Rather than being
+        invalidated, cached entries are updated in place as new receipts are
+        written to the room (including via replication), see
+        `_add_receipt_to_room_cache`. The cache size is measured in receipts.
 
-    @cachedList(
-        cached_method_name="_get_linearized_receipts_for_room",
-        list_name="room_ids",
-        num_args=3,
-    )
-    async def _get_linearized_receipts_for_rooms(
-        self,
-        room_ids: Collection[str],
-        to_key: MultiWriterStreamToken,
-        from_key: Optional[MultiWriterStreamToken] = None,
-    ) -> Mapping[str, Sequence[JsonMapping]]:
+        Returns:
+            A list of tuples of instance name, stream ID and receipt.
+        """
+        receipts_by_room = await self._get_receipts_in_rooms((room_id,))
+        return receipts_by_room[room_id]
+
+    @cachedList(cached_method_name="_get_receipts_in_room", list_name="room_ids")
+    async def _get_receipts_in_rooms(
+        self, room_ids: Collection[str]
+    ) -> Mapping[str, Sequence[Tuple[str, int, ReceiptInRoom]]]:
+        """See `_get_receipts_in_room`."""
         if not room_ids:
             return {}
 
-        def f(
-            txn: LoggingTransaction,
-        ) -> Mapping[str, Sequence[ReceiptInRoom]]:
-            if from_key:
-                sql = """
-                    SELECT stream_id, instance_name, room_id, receipt_type,
-                        user_id, event_id, thread_id, data
-                    FROM receipts_linearized WHERE
-                    stream_id > ? AND stream_id <= ? AND
-                """
-                clause, args = make_in_list_sql_clause(
-                    self.database_engine, "room_id", room_ids
-                )
+        return await self.db_pool.runInteraction(
+            "_get_receipts_in_rooms", self._get_receipts_in_rooms_txn, room_ids
+        )
 
-                txn.execute(
-                    sql + clause,
-                    [from_key.stream, to_key.get_max_stream_pos()] + list(args),
-                )
-            else:
-                sql = """
-                    SELECT stream_id, instance_name, room_id, receipt_type,
-                        user_id, event_id, thread_id, data
-                    FROM receipts_linearized WHERE
-                    stream_id <= ? AND
-                """
+    def _get_receipts_in_rooms_txn(
+        self,
+        txn: LoggingTransaction,
+        room_ids: Collection[str],
+        from_stream_id: Optional[int] = None,
+        to_stream_id: Optional[int] = None,
+    ) -> Mapping[str, Sequence[Tuple[str, int, ReceiptInRoom]]]:
+        """Fetch the receipts in the given rooms, optionally limited to those
+        with a stream ID in the range `(from_stream_id, to_stream_id]`.
 
-                clause, args = make_in_list_sql_clause(
-                    self.database_engine, "room_id", room_ids
-                )
+        Returns:
+            A map from room ID to a list of tuples of instance name, stream ID
+            and receipt.
+        """
+        results: Dict[str, List[Tuple[str, int, ReceiptInRoom]]] = {
+            room_id: [] for room_id in room_ids
+        }
 
-                txn.execute(sql + clause, [to_key.get_max_stream_pos()] + list(args))
+        range_clause = ""
+        range_args: List[int] = []
+        if from_stream_id is not None:
+            range_clause += " AND stream_id > ?"
+            range_args.append(from_stream_id)
+        if to_stream_id is not None:
+            range_clause += " AND stream_id <= ?"
+            range_args.append(to_stream_id)
+
+        for batch in batch_iter(room_ids, 1000):
+            clause, args = make_in_list_sql_clause(
+                self.database_engine, "room_id", batch
+            )
+            sql = f"""
+                SELECT stream_id, instance_name, room_id, receipt_type,
+                    user_id, event_id, thread_id, data
+                FROM receipts_linearized
+                WHERE {clause}{range_clause}
+            """
+            txn.execute(sql, list(args) + range_args)
 
-            results: Dict[str, List[ReceiptInRoom]] = {}
             for (
                 stream_id,
                 instance_name,
@@ -495,41 +565,58 @@ class ReceiptsWorkerStore(SQLBaseStore):
                 thread_id,
                 data,
             ) in txn:
-                if not MultiWriterStreamToken.is_stream_position_in_range(
-                    from_key, to_key, instance_name, stream_id
-                ):
-                    continue
-
-                results.setdefault(room_id, []).append(
-                    ReceiptInRoom(
-                        receipt_type=receipt_type,
-                        user_id=user_id,
-                        event_id=event_id,
-                        thread_id=thread_id,
-                        data=db_to_json(data),
+                results[room_id].append(
+                    (
+                        instance_name,
+                        stream_id,
+                        ReceiptInRoom(
+                            receipt_type=receipt_type,
+                            user_id=user_id,
+                            event_id=event_id,
+                            thread_id=thread_id,
+                            data=db_to_json(data),
+                        ),
                     )
                 )
 
-            return results
+        return results
 
-        txn_results = await self.db_pool.runInteraction(
-            "_get_linearized_receipts_for_rooms", f
+    def _add_receipt_to_room_cache(
+        self,
+        room_id: str,
+        instance_name: str,
+        stream_id: int,
+        receipt: ReceiptInRoom,
+    ) -> None:
+        """Update the cached receipts for the room, if any, with a newly written
+        receipt. This avoids having to reload all the receipts in the room.
+        """
+        receipts = self._get_receipts_in_room.cache.get_immediate(
+            (room_id,), None, update_metrics=False
         )
+        if receipts is None:
+            # Make sure that a lookup that is currently in flight doesn't cache
+            # a result that is missing the new receipt.
+            self._get_receipts_in_room.invalidate((room_id,))
+            return
+
+        updated_receipts = []
+        for entry in receipts:
+            _, existing_stream_id, existing_receipt = entry
+            if (
+                existing_receipt.receipt_type == receipt.receipt_type
+                and existing_receipt.user_id == receipt.user_id
+                and existing_receipt.thread_id == receipt.thread_id
+            ):
+                if existing_stream_id > stream_id:
+                    # We've already got a newer receipt.
+                    return
+                continue
 
-        results: JsonDict = {
-            room_id: {
-                "room_id": room_id,
-                "type": EduTypes.RECEIPT,
-                "content": ReceiptInRoom.merge_to_content(receipts),
-            }
-            for room_id, receipts in txn_results.items()
-        }
+            updated_receipts.append(entry)
 
-        results = {
-            room_id: [results[room_id]] if room_id in results else []
-            for room_id in room_ids
-        }
-        return results
+        updated_receipts.append((instance_name, stream_id, receipt))
+        self._get_receipts_in_room.prefill((room_id,), updated_receipts)
 
     async def get_linearized_receipts_for_events(
         self,
@@ -867,7 +954,6 @@ class ReceiptsWorkerStore(SQLBaseStore):
         self, room_id: str, receipt_type: str, user_id: str
     ) -> None:
         self._get_receipts_for_user_with_orderings.invalidate((user_id, receipt_type))
-        self._get_linearized_receipts_for_room.invalidate((room_id,))
 
         # We use this method to invalidate so that we don't end up with circular
         # dependencies between the receipts and push action stores.
@@ -888,6 +974,18 @@ class ReceiptsWorkerStore(SQLBaseStore):
                 self.invalidate_caches_for_receipt(
                     row.room_id, row.receipt_type, row.user_id
                 )
+                self._add_receipt_to_room_cache(
+                    row.room_id,
+                    instance_name,
+                    token,
+                    ReceiptInRoom(
+                        receipt_type=row.receipt_type,
+                        user_id=row.user_id,
+                        event_id=row.event_id,
+                        thread_id=row.thread_id,
+                        data=row.data,
+                    ),
+                )
                 self._receipts_stream_cache.entity_has_changed(row.room_id, token)
 
         return super().process_replication_rows(stream_name, instance_name, token, rows)
@@ -971,6 +1069,19 @@ class ReceiptsWorkerStore(SQLBaseStore):
         txn.call_after(
             self.invalidate_caches_for_receipt, room_id, receipt_type, user_id
         )
+        txn.call_after(
+            self._add_receipt_to_room_cache,
+            room_id,
+            self._instance_name,
+            stream_id,
+            ReceiptInRoom(
+                receipt_type=receipt_type,
+                user_id=user_id,
+                event_id=event_id,
+                thread_id=thread_id,
+                data=data,
+            ),
+        )
 
         txn.call_after(
             self._receipts_stream_cache.entity_has_changed, room_id, stream_id
@@ -1111,6 +1222,96 @@ class ReceiptsWorkerStore(SQLBaseStore):
 
         return PersistedPosition(self._instance_name, stream_id)
 
+    async def insert_receipts(
+        self, receipts: Sequence[ReadReceipt]
+    ) -> List[Optional[PersistedPosition]]:
+        """Insert a batch of receipts, either from local clients or remote servers,
+        in a single transaction.
+
+        This is the bulk equivalent of `insert_receipt`.
+
+        Returns:
+            For each receipt, the new receipts stream ID and token if the receipt
+            is newer than what was previously persisted, or None otherwise.
+        """
+        assert self._can_write_to_receipts
+
+        if not receipts:
+            return []
+
+        async with self._receipts_id_gen.get_next_mult(len(receipts)) as stream_ids:
+            persisted = await self.db_pool.runInteraction(
+                "insert_receipts",
+                self._insert_receipts_txn,
+                receipts,
+                stream_ids,
+                # Read committed is actually beneficial here because we check for a receipt with
+                # greater stream order, and checking the very latest data at select time is better
+                # than the data at transaction start time.
+                isolation_level=IsolationLevel.READ_COMMITTED,
+            )
+
+        return [
+            PersistedPosition(self._instance_name, stream_id) if is_new else None
+            for stream_id, is_new in zip(stream_ids, persisted)
+        ]
+
+    def _insert_receipts_txn(
+        self,
+        txn: LoggingTransaction,
+        receipts: Sequence[ReadReceipt],
+        stream_ids: Sequence[int],
+    ) -> List[bool]:
+        """Inserts each of the receipts with the corresponding stream ID.
+
+        Returns:
+            Whether each receipt was newer than the currently persisted one, and so
+            was inserted.
+        """
+        persisted = []
+        for receipt, stream_id in zip(receipts, stream_ids):
+            if not receipt.event_ids:
+                persisted.append(False)
+                continue
+
+            if len(receipt.event_ids) == 1:
+                linearized_event_id = receipt.event_ids[0]
+            else:
+                # we need to points in graph -> linearized form.
+                linearized_event_id = self._graph_to_linear(
+                    txn, receipt.room_id, receipt.event_ids
+                )
+
+            event_ts = self._insert_linearized_receipt_txn(
+                txn,
+                receipt.room_id,
+                receipt.receipt_type,
+                receipt.user_id,
+                linearized_event_id,
+                receipt.thread_id,
+                receipt.data,
+                stream_id=stream_id,
+            )
+
+            # If the receipt was older than the currently persisted one, nothing
+            # to do.
+            if event_ts is None:
+                persisted.append(False)
+                continue
+
+            self._insert_graph_receipt_txn(
+                txn,
+                receipt.room_id,
+                receipt.receipt_type,
+                receipt.user_id,
+                receipt.event_ids,
+                receipt.thread_id,
+                receipt.data,
+            )
+            persisted.append(True)
+
+        return persisted
+
     async def _insert_graph_receipt(
         self,
         room_id: str,
@@ -1119,6 +1320,27 @@ class ReceiptsWorkerStore(SQLBaseStore):
         event_ids: List[str],
         thread_id: Optional[str],
         data: JsonDict,
+    ) -> None:
+        await self.db_pool.runInteraction(
+            "insert_graph_receipt",
+            self._insert_graph_receipt_txn,
+            room_id,
+            receipt_type,
+            user_id,
+            event_ids,
+            thread_id,
+            data,
+        )
+
+    def _insert_graph_receipt_txn(
+        self,
+        txn: LoggingTransaction,
+        room_id: str,
+        receipt_type: str,
+        user_id: str,
+        event_ids: List[str],
+        thread_id: Optional[str],
+        data: JsonDict,
     ) -> None:
         assert self._can_write_to_receipts
 
@@ -1133,8 +1355,8 @@ class ReceiptsWorkerStore(SQLBaseStore):
         else:
             keyvalues["thread_id"] = thread_id
 
-        await self.db_pool.simple_upsert(
-            desc="insert_graph_receipt",
+        self.db_pool.simple_upsert_txn(
+            txn,
             table="receipts_graph",
             keyvalues=keyvalues,
             values={
@@ -1144,10 +1366,10 @@ class ReceiptsWorkerStore(SQLBaseStore):
             where_clause=where_clause,
         )
 
-        self._get_receipts_for_user_with_orderings.invalidate((user_id, receipt_type))
-
-        # FIXME: This shouldn't invalidate the whole cache
-        self._get_linearized_receipts_for_room.invalidate((room_id,))
+        txn.call_after(
+            self._get_receipts_for_user_with_orderings.invalidate,
+            (user_id, receipt_type),
+        )
 
 
 class ReceiptsBackgroundUpdateStore(SQLBaseStore):
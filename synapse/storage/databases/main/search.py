@@ -746,54 +746,60 @@ class SearchStore(SearchBackgroundUpdateStore):
         """
 
         def f(txn: LoggingTransaction) -> Set[str]:
-            highlight_words = set()
+            highlight_words: Set[str] = set()
+
+            values = []
             for event in events:
                 # As a hack we simply join values of all possible keys. This is
                 # fine since we're only using them to find possible highlights.
-                values = []
+                event_values = []
                 for key in ("body", "name", "topic"):
                     v = event.content.get(key, None)
                     if v:
                         v = _clean_value_for_search(v)
-                        values.append(v)
-
-                if not values:
-                    continue
-
-                value = " ".join(values)
-
-                # We need to find some values for StartSel and StopSel that
-                # aren't in the value so that we can pick results out.
-                start_sel = "<"
-                stop_sel = ">"
-
-                while start_sel in value:
-                    start_sel += "<"
-                while stop_sel in value:
-                    stop_sel += ">"
-
-                query = (
-                    "SELECT ts_headline(?, websearch_to_tsquery('english', ?), %s)"
-                    % (
-                        _to_postgres_options(
-                            {
-                                "StartSel": start_sel,
-                                "StopSel": stop_sel,
-                                "MaxFragments": "50",
-                            }
-                        )
+                        event_values.append(v)
+
+                if event_values:
+                    values.append(" ".join(event_values))
+
+            if not values:
+                return highlight_words
+
+            # We need to find some values for StartSel and StopSel that
+            # aren't in any of the values so that we can pick results out.
+            start_sel = "<"
+            stop_sel = ">"
+
+            while any(start_sel in value for value in values):
+                start_sel += "<"
+            while any(stop_sel in value for value in values):
+                stop_sel += ">"
+
+            # Generate the headlines for all of the events in one query, rather
+            # than a round trip per event.
+            query = (
+                "SELECT ts_headline(value, websearch_to_tsquery('english', ?), %s)"
+                " FROM unnest(?::text[]) AS value"
+                % (
+                    _to_postgres_options(
+                        {
+                            "StartSel": start_sel,
+                            "StopSel": stop_sel,
+                            "MaxFragments": "50",
+                        }
                     )
                 )
-                txn.execute(query, (value, search_query))
-                (headline,) = txn.fetchall()[0]
-
-                # Now we need to pick the possible highlights out of the haedline
-                # result.
-                matcher_regex = "%s(.*?)%s" % (
-                    re.escape(start_sel),
-                    re.escape(stop_sel),
-                )
+            )
+            txn.execute(query, (search_query, values))
+
+            # Now we need to pick the possible highlights out of the headline
+            # results.
+            matcher_regex = "%s(.*?)%s" % (
+                re.escape(start_sel),
+                re.escape(stop_sel),
+            )
 
+            for (headline,) in txn:
                 res = re.findall(matcher_regex, headline)
                 highlight_words.update([r.lower() for r in res])
 
@@ -61,7 +61,7 @@ from synapse.storage.databases.main.events_worker import EventsWorkerStore
 from synapse.storage.databases.main.roommember import RoomMemberWorkerStore
 from synapse.types import JsonDict, JsonMapping, StateKey, StateMap, StrCollection
 from synapse.types.state import StateFilter
-from synapse.util.caches import intern_string
+from synapse.util.caches import intern_state_key
 from synapse.util.caches.descriptors import cached, cachedList
 from synapse.util.cancellation import cancellable
 from synapse.util.iterutils import batch_iter
@@ -533,7 +533,10 @@ class StateGroupWorkerStore(EventsWorkerStore, SQLBaseStore):
                 (room_id,),
             )
 
-            return {(intern_string(r[0]), intern_string(r[1])): r[2] for r in txn}
+            return {
+                intern_state_key(typ, state_key): event_id
+                for typ, state_key, event_id in txn
+            }
 
         return await self.db_pool.runInteraction(
             "get_partial_current_state_ids", _get_current_state_ids_txn
@@ -599,7 +602,7 @@ class StateGroupWorkerStore(EventsWorkerStore, SQLBaseStore):
             txn.execute(sql, args)
             for row in txn:
                 typ, state_key, event_id = row
-                key = (intern_string(typ), intern_string(state_key))
+                key = intern_state_key(typ, state_key)
                 results[key] = event_id
 
             return results
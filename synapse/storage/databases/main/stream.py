@@ -597,6 +597,7 @@ class StreamWorkerStore(EventsWorkerStore, SQLBaseStore):
         self._instance_name = hs.get_instance_name()
         self._send_federation = hs.should_send_federation()
         self._federation_shard_config = hs.config.worker.federation_shard_config
+        self._event_persisters = hs.config.worker.writers.events
 
         # If we're a process that sends federation we may need to reset the
         # `federation_stream_position` table to match the current sharding
@@ -2268,6 +2269,26 @@ class StreamWorkerStore(EventsWorkerStore, SQLBaseStore):
             # are no rows
             return [], to_key if to_key else from_key, False
 
+        # We can read from a replica of the database if it has caught up with
+        # each event persister's position in the latest token we might return
+        # events up to, and with any events we've backfilled (which may be
+        # returned when paginating backwards).
+        max_key = from_key if direction == Direction.BACKWARDS else to_key
+        allow_replica = max_key is not None and self.db_pool.replica_has_caught_up_to(
+            {
+                # Topological tokens don't have an instance map, so we look
+                # the positions up directly rather than via
+                # `get_stream_pos_for_instance`.
+                "events": {
+                    instance_name: max_key.instance_map.get(
+                        instance_name, max_key.stream
+                    )
+                    for instance_name in self._event_persisters
+                },
+                "backfill": self._backfill_id_gen.get_positions(),
+            }
+        )
+
         rows, token, limited = await self.db_pool.runInteraction(
             "paginate_room_events_by_topological_ordering",
             self._paginate_room_events_by_topological_ordering_txn,
@@ -2277,6 +2298,7 @@ class StreamWorkerStore(EventsWorkerStore, SQLBaseStore):
             direction,
             limit,
             event_filter,
+            allow_replica=allow_replica,
         )
 
         events = await self.get_events_as_list(
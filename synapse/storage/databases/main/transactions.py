@@ -419,6 +419,39 @@ class TransactionWorkerStore(CacheInvalidationWorkerStore):
         event_ids = [row[0] for row in txn]
         return event_ids
 
+    async def get_catch_up_room_count(
+        self,
+        destination: str,
+        last_successful_stream_ordering: int,
+    ) -> int:
+        """
+        Returns the number of rooms that have events that have not yet been sent
+        to the destination. Used for reporting catch-up progress.
+
+        Args:
+            destination: the destination in question
+            last_successful_stream_ordering: the stream_ordering of the
+                most-recently successfully-transmitted event to the destination
+
+        Returns:
+            the number of rooms still to catch up on
+        """
+
+        def _get_catch_up_room_count_txn(txn: LoggingTransaction) -> int:
+            txn.execute(
+                """
+                SELECT COUNT(*) FROM destination_rooms
+                WHERE destination = ?
+                  AND stream_ordering > ?
+                """,
+                (destination, last_successful_stream_ordering),
+            )
+            return cast(Tuple[int], txn.fetchone())[0]
+
+        return await self.db_pool.runInteraction(
+            "get_catch_up_room_count", _get_catch_up_room_count_txn
+        )
+
     async def get_catch_up_outstanding_destinations(
         self, after_destination: Optional[str]
     ) -> List[str]:
@@ -32,7 +32,7 @@ from synapse.storage.database import (
 from synapse.storage.engines import PostgresEngine
 from synapse.types import MutableStateMap, StateMap
 from synapse.types.state import StateFilter
-from synapse.util.caches import intern_string
+from synapse.util.caches import intern_state_key
 
 if TYPE_CHECKING:
     from synapse.server import HomeServer
@@ -214,7 +214,7 @@ class StateGroupBackgroundUpdateStore(SQLBaseStore):
                 txn.execute(sql % (overall_select_clause,), args)
                 for row in txn:
                     typ, state_key, event_id = row
-                    key = (intern_string(typ), intern_string(state_key))
+                    key = intern_state_key(typ, state_key)
                     results[group][key] = event_id
         else:
             max_entries_returned = state_filter.max_entries_returned()
@@ -247,7 +247,7 @@ class StateGroupBackgroundUpdateStore(SQLBaseStore):
                         args,
                     )
                     results[group].update(
-                        ((typ, state_key), event_id)
+                        (intern_state_key(typ, state_key), event_id)
                         for typ, state_key, event_id in txn
                         if (typ, state_key) not in results[group]
                     )
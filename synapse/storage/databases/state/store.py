@@ -19,6 +19,7 @@
 #
 #
 
+import collections
 import logging
 from typing import (
     TYPE_CHECKING,
@@ -33,11 +34,16 @@ from typing import (
 )
 
 import attr
+from prometheus_client import Counter
 
 from synapse.api.constants import EventTypes
 from synapse.events import EventBase
 from synapse.events.snapshot import UnpersistedEventContext, UnpersistedEventContextBase
 from synapse.logging.opentracing import tag_args, trace
+from synapse.metrics.background_process_metrics import (
+    run_as_background_process,
+    wrap_as_background_process,
+)
 from synapse.storage._base import SQLBaseStore
 from synapse.storage.database import (
     DatabasePool,
@@ -49,9 +55,11 @@ from synapse.storage.types import Cursor
 from synapse.storage.util.sequence import build_sequence_generator
 from synapse.types import MutableStateMap, StateKey, StateMap
 from synapse.types.state import StateFilter
+from synapse.util.caches import intern_state_key
 from synapse.util.caches.descriptors import cached
 from synapse.util.caches.dictionary_cache import DictionaryCache
 from synapse.util.cancellation import cancellable
+from synapse.util.iterutils import batch_iter
 
 if TYPE_CHECKING:
     from synapse.server import HomeServer
@@ -61,6 +69,46 @@ logger = logging.getLogger(__name__)
 
 MAX_STATE_DELTA_HOPS = 100
 
+# A state group must have been loaded from the database at least this many
+# times since the last run of the state group snapshotter for it to be
+# considered for re-snapshotting.
+STATE_GROUP_SNAPSHOT_MIN_READS = 10
+
+# Only state groups at least this many hops down a delta chain are
+# re-snapshotted.
+STATE_GROUP_SNAPSHOT_MIN_HOPS = 10
+
+# The maximum number of state groups to re-snapshot in each run.
+STATE_GROUP_SNAPSHOT_BATCH_SIZE = 100
+
+# The maximum number of distinct state groups we track reads for in memory
+# between writes of the counts to the database.
+_MAX_TRACKED_STATE_GROUP_READS = 100000
+
+# How often each worker adds its counts of state group reads to the
+# `state_group_reads` table, and the maximum number of state groups it writes
+# counts for each time.
+_STATE_GROUP_READS_FLUSH_INTERVAL_MS = 60 * 1000
+_MAX_FLUSHED_STATE_GROUP_READS = 1000
+
+# The maximum number of state groups to delete (or de-delta) in a single
+# transaction when purging.
+PURGE_STATE_GROUPS_BATCH_SIZE = 100
+
+# How long to pause between batches when purging state groups, so that a large
+# purge doesn't overwhelm the database.
+PURGE_STATE_GROUPS_BATCH_SLEEP_S = 0.1
+
+state_groups_snapshotted_counter = Counter(
+    "synapse_storage_state_groups_snapshotted",
+    "Number of frequently read state groups rewritten without their delta chain",
+)
+
+
+def _state_key_type(state_key: StateKey) -> str:
+    """Returns the event type of the given (type, state_key) pair."""
+    return state_key[0]
+
 
 @attr.s(slots=True, frozen=True, auto_attribs=True)
 class _GetStateGroupDelta:
@@ -115,15 +163,22 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
         # We size the non-members cache to be smaller than the members cache as the
         # vast majority of state in Matrix (today) is member events.
 
+        #
+        # Both caches group their entries by event type, so that they can track
+        # that they have all the state of a particular type for a group (e.g.
+        # all the `m.space.child` events) without having to fetch everything.
+
         self._state_group_cache: DictionaryCache[int, StateKey, str] = DictionaryCache(
             "*stateGroupCache*",
             # TODO: this hasn't been tuned yet
             50000,
+            dict_key_type=_state_key_type,
         )
         self._state_group_members_cache: DictionaryCache[int, StateKey, str] = (
             DictionaryCache(
                 "*stateGroupMembersCache*",
                 500000,
+                dict_key_type=_state_key_type,
             )
         )
 
@@ -140,6 +195,36 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
             id_column="id",
         )
 
+        # The number of times each state group has been loaded from the
+        # database by this worker since the counts were last added to the
+        # `state_group_reads` table. Every worker tracks these, so that the
+        # snapshotter sees the reads across all workers.
+        self._state_group_db_reads: "collections.Counter[int]" = collections.Counter()
+
+        snapshot_interval_ms = hs.config.server.state_group_snapshot_interval_ms
+        self._track_state_group_reads = bool(snapshot_interval_ms)
+        if self._track_state_group_reads:
+            self._clock.looping_call(
+                run_as_background_process,
+                _STATE_GROUP_READS_FLUSH_INTERVAL_MS,
+                "flush_state_group_reads",
+                self._flush_state_group_reads,
+            )
+
+        if hs.config.worker.run_background_tasks and snapshot_interval_ms:
+            self._clock.looping_call(
+                self._snapshot_frequently_read_state_groups, snapshot_interval_ms
+            )
+
+        if hs.config.worker.run_background_tasks:
+            # Finish off any purges of state groups that were interrupted.
+            self._clock.call_later(
+                0,
+                run_as_background_process,
+                "resume_pending_state_group_purges",
+                self._resume_pending_state_group_purges,
+            )
+
     @cached(max_entries=10000, iterable=True)
     async def get_state_group_delta(self, state_group: int) -> _GetStateGroupDelta:
         """Given a state group try to return a previous group and a delta between
@@ -174,7 +259,7 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
             return _GetStateGroupDelta(
                 prev_group,
                 {
-                    (event_type, state_key): event_id
+                    intern_state_key(event_type, state_key): event_id
                     for event_type, state_key, event_id in delta_ids
                 },
             )
@@ -253,10 +338,29 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
         missing_types = False
 
         if state_filter.has_wildcards():
-            # We don't know if we fetched all the state keys for the types in
-            # the filter that are wildcards, so we have to assume that we may
-            # have missed some.
-            missing_types = True
+            if state_filter.include_others:
+                # We don't have the full dict, so we can't know that we have
+                # all the other state.
+                return state_filter.filter_state(state_dict_ids), False
+
+            # We may still have all the state for the types in the filter that
+            # are wildcards.
+            wildcard_state = cache.get_for_types(group, state_filter.wildcard_types())
+            if wildcard_state is None:
+                return state_filter.filter_state(state_dict_ids), False
+
+            # ... in which case we just need to check the concrete types.
+            concrete_types = state_filter.concrete_types()
+            cache_entry = cache.get(group, dict_keys=concrete_types)
+            state_dict_ids = {**cache_entry.value, **wildcard_state}
+            if not cache_entry.full:
+                for key in concrete_types:
+                    if (
+                        key not in state_dict_ids
+                        and key not in cache_entry.known_absent
+                    ):
+                        missing_types = True
+                        break
         else:
             # There aren't any wild cards, so `concrete_types()` returns the
             # complete list of event types we're wanting.
@@ -309,11 +413,22 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
         if not incomplete_groups:
             return state
 
+        if (
+            self._track_state_group_reads
+            and len(self._state_group_db_reads) < _MAX_TRACKED_STATE_GROUP_READS
+        ):
+            self._state_group_db_reads.update(incomplete_groups)
+
         cache_sequence_nm = self._state_group_cache.sequence
         cache_sequence_m = self._state_group_members_cache.sequence
 
-        # Help the cache hit ratio by expanding the filter a bit
-        db_state_filter = state_filter.return_expanded()
+        # Help the cache hit ratio by expanding the filter a bit. There's no
+        # need if the only wildcards are for particular types, since the caches
+        # track whether they have all the state of a type.
+        if state_filter.include_others:
+            db_state_filter = state_filter.return_expanded()
+        else:
+            db_state_filter = state_filter
 
         group_to_state_dict = await self._get_state_groups_from_groups(
             list(incomplete_groups), state_filter=db_state_filter
@@ -398,19 +513,10 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
         # but can be an underestimate (e.g. when we have wild cards)
 
         member_filter, non_member_filter = state_filter.get_member_split()
-        if member_filter.is_full():
-            # We fetched all member events
-            member_types = None
-        else:
-            # `concrete_types()` will only return a subset when there are wild
-            # cards in the filter, but that's fine.
-            member_types = member_filter.concrete_types()
-
-        if non_member_filter.is_full():
-            # We fetched all non member events
-            non_member_types = None
-        else:
-            non_member_types = non_member_filter.concrete_types()
+        member_types, member_wildcard_types = _get_fetched_types(member_filter)
+        non_member_types, non_member_wildcard_types = _get_fetched_types(
+            non_member_filter
+        )
 
         for group, group_state_dict in group_to_state_dict.items():
             state_dict_members = {}
@@ -427,6 +533,7 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
                 key=group,
                 value=state_dict_members,
                 fetched_keys=member_types,
+                fetched_types=member_wildcard_types,
             )
 
             self._state_group_cache.update(
@@ -434,6 +541,7 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
                 key=group,
                 value=state_dict_non_members,
                 fetched_keys=non_member_types,
+                fetched_types=non_member_wildcard_types,
             )
 
     @trace
@@ -731,46 +839,101 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
         """Deletes no longer referenced state groups and de-deltas any state
         groups that reference them.
 
+        The state groups are first recorded in `state_groups_pending_purge`, and
+        are then deleted in batches. If the purge is interrupted, the remaining
+        state groups are deleted the next time this is called for the room, or
+        when the process that runs background tasks restarts.
+
         Args:
             room_id: The room the state groups belong to (must all be in the
                 same room).
             state_groups_to_delete: Set of all state groups to delete.
         """
 
+        logger.info(
+            "[purge] found %i state groups to delete", len(state_groups_to_delete)
+        )
+
         await self.db_pool.runInteraction(
-            "purge_unreferenced_state_groups",
-            self._purge_unreferenced_state_groups,
+            "purge_unreferenced_state_groups_record_pending",
+            self._record_state_groups_pending_purge_txn,
             room_id,
             state_groups_to_delete,
         )
 
-    def _purge_unreferenced_state_groups(
-        self,
-        txn: LoggingTransaction,
-        room_id: str,
-        state_groups_to_delete: Collection[int],
+        await self._purge_pending_state_groups(room_id)
+
+    def _record_state_groups_pending_purge_txn(
+        self, txn: LoggingTransaction, room_id: str, state_groups: Collection[int]
     ) -> None:
-        logger.info(
-            "[purge] found %i state groups to delete", len(state_groups_to_delete)
+        txn.execute_batch(
+            """
+            INSERT INTO state_groups_pending_purge (state_group, room_id)
+            VALUES (?, ?)
+            ON CONFLICT (state_group) DO NOTHING
+            """,
+            [(sg, room_id) for sg in state_groups],
+        )
+
+    async def _resume_pending_state_group_purges(self) -> None:
+        """Delete any state groups left over from interrupted purges."""
+
+        def _get_rooms_with_state_groups_pending_purge_txn(
+            txn: LoggingTransaction,
+        ) -> List[str]:
+            txn.execute("SELECT DISTINCT room_id FROM state_groups_pending_purge")
+            return [room_id for (room_id,) in txn]
+
+        room_ids = await self.db_pool.runInteraction(
+            "get_rooms_with_state_groups_pending_purge",
+            _get_rooms_with_state_groups_pending_purge_txn,
+        )
+
+        for room_id in room_ids:
+            logger.info("[purge] resuming purge of state groups in %s", room_id)
+            await self._purge_pending_state_groups(room_id)
+
+    async def _purge_pending_state_groups(self, room_id: str) -> None:
+        """De-deltas the state groups that reference the state groups pending
+        purge for the given room, and then deletes them.
+
+        This is done in a series of small transactions, with a pause between
+        them, so as not to hold locks on the state tables for too long. It is
+        safe to stop part way through: we first remove any references to the
+        state groups we are deleting, the state groups themselves are never
+        referenced by events, and each batch is removed from
+        `state_groups_pending_purge` as it is deleted.
+        """
+        state_groups_to_delete = set(
+            await self.db_pool.simple_select_onecol(
+                table="state_groups_pending_purge",
+                keyvalues={"room_id": room_id},
+                retcol="state_group",
+                desc="get_state_groups_pending_purge",
+            )
         )
+        if not state_groups_to_delete:
+            return
 
         rows = cast(
             List[Tuple[int]],
-            self.db_pool.simple_select_many_txn(
-                txn,
+            await self.db_pool.simple_select_many_batch(
                 table="state_group_edges",
                 column="prev_state_group",
                 iterable=state_groups_to_delete,
                 keyvalues={},
                 retcols=("state_group",),
+                desc="purge_unreferenced_state_groups_get_edges",
             ),
         )
 
-        remaining_state_groups = {
-            state_group
-            for (state_group,) in rows
-            if state_group not in state_groups_to_delete
-        }
+        remaining_state_groups = sorted(
+            {
+                state_group
+                for (state_group,) in rows
+                if state_group not in state_groups_to_delete
+            }
+        )
 
         logger.info(
             "[purge] de-delta-ing %i remaining state groups",
@@ -779,30 +942,42 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
 
         # Now we turn the state groups that reference to-be-deleted state
         # groups to non delta versions.
-        for sg in remaining_state_groups:
-            logger.info("[purge] de-delta-ing remaining state group %s", sg)
-            curr_state_by_group = self._get_state_groups_from_groups_txn(txn, [sg])
-            curr_state = curr_state_by_group[sg]
-
-            self.db_pool.simple_delete_txn(
-                txn, table="state_groups_state", keyvalues={"state_group": sg}
+        for i, batch in enumerate(
+            batch_iter(remaining_state_groups, PURGE_STATE_GROUPS_BATCH_SIZE)
+        ):
+            if i:
+                await self._clock.sleep(PURGE_STATE_GROUPS_BATCH_SLEEP_S)
+
+            await self.db_pool.runInteraction(
+                "purge_unreferenced_state_groups_de_delta",
+                self._de_delta_state_groups_txn,
+                room_id,
+                batch,
             )
 
-            self.db_pool.simple_delete_txn(
-                txn, table="state_group_edges", keyvalues={"state_group": sg}
+        logger.info("[purge] removing redundant state groups")
+        for i, batch in enumerate(
+            batch_iter(sorted(state_groups_to_delete), PURGE_STATE_GROUPS_BATCH_SIZE)
+        ):
+            if i:
+                await self._clock.sleep(PURGE_STATE_GROUPS_BATCH_SLEEP_S)
+
+            await self.db_pool.runInteraction(
+                "purge_unreferenced_state_groups",
+                self._purge_unreferenced_state_groups_txn,
+                batch,
             )
 
-            self.db_pool.simple_insert_many_txn(
-                txn,
-                table="state_groups_state",
-                keys=("state_group", "room_id", "type", "state_key", "event_id"),
-                values=[
-                    (sg, room_id, key[0], key[1], state_id)
-                    for key, state_id in curr_state.items()
-                ],
-            )
+    def _de_delta_state_groups_txn(
+        self, txn: LoggingTransaction, room_id: str, state_groups: Collection[int]
+    ) -> None:
+        for sg in state_groups:
+            logger.info("[purge] de-delta-ing remaining state group %s", sg)
+            self._de_delta_state_group_txn(txn, room_id, sg)
 
-        logger.info("[purge] removing redundant state groups")
+    def _purge_unreferenced_state_groups_txn(
+        self, txn: LoggingTransaction, state_groups_to_delete: Collection[int]
+    ) -> None:
         txn.execute_batch(
             "DELETE FROM state_groups_state WHERE state_group = ?",
             [(sg,) for sg in state_groups_to_delete],
@@ -811,6 +986,137 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
             "DELETE FROM state_groups WHERE id = ?",
             [(sg,) for sg in state_groups_to_delete],
         )
+        txn.execute_batch(
+            "DELETE FROM state_groups_pending_purge WHERE state_group = ?",
+            [(sg,) for sg in state_groups_to_delete],
+        )
+
+    def _de_delta_state_group_txn(
+        self, txn: LoggingTransaction, room_id: str, state_group: int
+    ) -> None:
+        """Rewrite the given state group to store its full state, rather than a
+        delta against a previous state group.
+        """
+        curr_state_by_group = self._get_state_groups_from_groups_txn(txn, [state_group])
+        curr_state = curr_state_by_group[state_group]
+
+        self.db_pool.simple_delete_txn(
+            txn, table="state_groups_state", keyvalues={"state_group": state_group}
+        )
+
+        self.db_pool.simple_delete_txn(
+            txn, table="state_group_edges", keyvalues={"state_group": state_group}
+        )
+
+        self.db_pool.simple_insert_many_txn(
+            txn,
+            table="state_groups_state",
+            keys=("state_group", "room_id", "type", "state_key", "event_id"),
+            values=[
+                (state_group, room_id, key[0], key[1], state_id)
+                for key, state_id in curr_state.items()
+            ],
+        )
+
+        txn.call_after(self.get_state_group_delta.invalidate, (state_group,))
+
+    async def _flush_state_group_reads(self) -> None:
+        """Add the counts of the state groups this worker has loaded from the
+        database to the `state_group_reads` table, for the snapshotter to use.
+        """
+        reads = self._state_group_db_reads
+        self._state_group_db_reads = collections.Counter()
+
+        if not reads:
+            return
+
+        sql = """
+            INSERT INTO state_group_reads (state_group, reads) VALUES (?, ?)
+            ON CONFLICT (state_group)
+            DO UPDATE SET reads = state_group_reads.reads + EXCLUDED.reads
+        """
+
+        def _flush_state_group_reads_txn(txn: LoggingTransaction) -> None:
+            txn.execute_batch(sql, reads.most_common(_MAX_FLUSHED_STATE_GROUP_READS))
+
+        await self.db_pool.runInteraction(
+            "flush_state_group_reads", _flush_state_group_reads_txn
+        )
+
+    @wrap_as_background_process("snapshot_frequently_read_state_groups")
+    async def _snapshot_frequently_read_state_groups(self) -> None:
+        """Rewrite state groups that are frequently loaded from the database,
+        and which sit at the end of long delta chains, to store their full
+        state.
+
+        Loading such a state group means walking the whole chain of deltas,
+        so storing a snapshot makes subsequent loads much cheaper at the cost
+        of some extra rows in `state_groups_state`.
+        """
+        # Make sure our own reads are counted.
+        await self._flush_state_group_reads()
+
+        def _get_frequently_read_state_groups_txn(
+            txn: LoggingTransaction,
+        ) -> List[int]:
+            txn.execute(
+                """
+                SELECT state_group FROM state_group_reads
+                WHERE reads >= ?
+                ORDER BY reads DESC
+                LIMIT ?
+                """,
+                (STATE_GROUP_SNAPSHOT_MIN_READS, STATE_GROUP_SNAPSHOT_BATCH_SIZE),
+            )
+            state_groups = [state_group for (state_group,) in txn]
+
+            # Start counting afresh for the next run.
+            txn.execute("DELETE FROM state_group_reads")
+
+            return state_groups
+
+        candidates = await self.db_pool.runInteraction(
+            "get_frequently_read_state_groups", _get_frequently_read_state_groups_txn
+        )
+
+        for state_group in candidates:
+            snapshotted = await self.db_pool.runInteraction(
+                "snapshot_state_group", self._snapshot_state_group_txn, state_group
+            )
+            if snapshotted:
+                state_groups_snapshotted_counter.inc()
+
+    def _snapshot_state_group_txn(
+        self, txn: LoggingTransaction, state_group: int
+    ) -> bool:
+        """Rewrite the given state group to store its full state, if it is far
+        enough down a delta chain.
+
+        Returns:
+            True if the state group was rewritten.
+        """
+        room_id = self.db_pool.simple_select_one_onecol_txn(
+            txn,
+            table="state_groups",
+            keyvalues={"id": state_group},
+            retcol="room_id",
+            allow_none=True,
+        )
+        if room_id is None:
+            # The state group has been deleted in the meantime.
+            return False
+
+        hops = self._count_state_group_hops_txn(txn, state_group)
+        if hops < STATE_GROUP_SNAPSHOT_MIN_HOPS:
+            return False
+
+        logger.debug(
+            "Snapshotting state group %s, which is %i hops down a delta chain",
+            state_group,
+            hops,
+        )
+        self._de_delta_state_group_txn(txn, room_id, state_group)
+        return True
 
     @trace
     @tag_args
@@ -841,41 +1147,87 @@ class StateGroupDataStore(StateBackgroundUpdateStore, SQLBaseStore):
         return dict(rows)
 
     async def purge_room_state(self, room_id: str) -> None:
-        return await self.db_pool.runInteraction(
-            "purge_room_state",
-            self._purge_room_state_txn,
-            room_id,
-        )
+        """Deletes all state groups for the given room.
+
+        The state groups are deleted in batches, each in its own transaction,
+        so that purging a large room does not hold locks on the state tables
+        for long periods. If interrupted, calling this again carries on where
+        the previous call left off.
+        """
+        while True:
+            deleted = await self.db_pool.runInteraction(
+                "purge_room_state",
+                self._purge_room_state_txn,
+                room_id,
+                PURGE_STATE_GROUPS_BATCH_SIZE,
+            )
+            if deleted < PURGE_STATE_GROUPS_BATCH_SIZE:
+                break
+
+            await self._clock.sleep(PURGE_STATE_GROUPS_BATCH_SLEEP_S)
 
     def _purge_room_state_txn(
         self,
         txn: LoggingTransaction,
         room_id: str,
-    ) -> None:
-        # Delete all edges that reference a state group linked to room_id
-        logger.info("[purge] removing %s from state_group_edges", room_id)
-        txn.execute(
-            """
-            DELETE FROM state_group_edges AS sge WHERE sge.state_group IN (
-                SELECT id FROM state_groups AS sg WHERE sg.room_id = ?
-            )""",
-            (room_id,),
-        )
+        batch_size: int,
+    ) -> int:
+        """Deletes a batch of the state groups for the given room.
 
-        # state_groups_state table has a room_id column but no index on it, unlike state_groups,
-        # so we delete them by matching the room_id through the state_groups table.
-        logger.info("[purge] removing %s from state_groups_state", room_id)
+        Returns:
+            The number of state groups deleted.
+        """
         txn.execute(
-            """
-            DELETE FROM state_groups_state AS sgs WHERE sgs.state_group IN (
-                SELECT id FROM state_groups AS sg WHERE sg.room_id = ?
-            )""",
-            (room_id,),
+            "SELECT id FROM state_groups WHERE room_id = ? ORDER BY id LIMIT ?",
+            (room_id, batch_size),
         )
+        state_groups = [sg for (sg,) in txn]
+        if not state_groups:
+            return 0
 
-        logger.info("[purge] removing %s from state_groups", room_id)
-        self.db_pool.simple_delete_txn(
-            txn,
-            table="state_groups",
-            keyvalues={"room_id": room_id},
+        logger.info(
+            "[purge] removing %i state groups of %s", len(state_groups), room_id
         )
+
+        # Delete all edges that reference one of the state groups, then the
+        # state itself and finally the state groups.
+        for table, column in (
+            ("state_group_edges", "state_group"),
+            ("state_groups_state", "state_group"),
+            ("state_groups", "id"),
+            ("state_groups_pending_purge", "state_group"),
+        ):
+            self.db_pool.simple_delete_many_txn(
+                txn,
+                table=table,
+                column=column,
+                values=state_groups,
+                keyvalues={},
+            )
+
+        return len(state_groups)
+
+
+def _get_fetched_types(
+    state_filter: StateFilter,
+) -> Tuple[Optional[List[StateKey]], Optional[List[str]]]:
+    """Work out what was fetched from the database for the given filter, in
+    the form expected by `DictionaryCache.update`.
+
+    Returns:
+        A tuple of the (type, state_key) pairs that were fetched (or None if
+        everything was fetched), and the event types for which all state keys
+        were fetched (or None if we can't tell).
+    """
+    if state_filter.is_full():
+        return None, None
+
+    # `concrete_types()` will only return a subset when there are wild
+    # cards in the filter, but that's fine.
+    concrete_types = state_filter.concrete_types()
+
+    if state_filter.include_others:
+        # We fetched some other state too, but we can't tell what.
+        return concrete_types, None
+
+    return concrete_types, state_filter.wildcard_types()
@@ -0,0 +1,21 @@
+--
+-- This file is licensed under the Affero General Public License (AGPL) version 3.
+--
+-- Copyright (C) 2026 New Vector, Ltd
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU Affero General Public License as
+-- published by the Free Software Foundation, either version 3 of the
+-- License, or (at your option) any later version.
+--
+-- See the GNU Affero General Public License for more details:
+-- <https://www.gnu.org/licenses/agpl-3.0.html>.
+
+
+-- The number of times each state group has been loaded from the database,
+-- summed across all workers, since the state group snapshotter last ran. Used
+-- to find state groups that are worth rewriting to store their full state.
+CREATE TABLE IF NOT EXISTS state_group_reads (
+    state_group BIGINT NOT NULL PRIMARY KEY,
+    reads BIGINT NOT NULL
+);
@@ -0,0 +1,23 @@
+--
+-- This file is licensed under the Affero General Public License (AGPL) version 3.
+--
+-- Copyright (C) 2026 New Vector, Ltd
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU Affero General Public License as
+-- published by the Free Software Foundation, either version 3 of the
+-- License, or (at your option) any later version.
+--
+-- See the GNU Affero General Public License for more details:
+-- <https://www.gnu.org/licenses/agpl-3.0.html>.
+
+
+-- State groups that a purge of room history has found to be unreferenced, and
+-- which are still to be deleted. The state groups are deleted in batches, so
+-- this lets an interrupted purge carry on where it stopped.
+CREATE TABLE IF NOT EXISTS state_groups_pending_purge (
+    state_group BIGINT NOT NULL PRIMARY KEY,
+    room_id TEXT NOT NULL
+);
+
+CREATE INDEX state_groups_pending_purge_room_id ON state_groups_pending_purge(room_id);
@@ -64,6 +64,10 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# How often writers to a stream check whether their row in `stream_positions`
+# needs refreshing, in milliseconds.
+STREAM_POSITIONS_REFRESH_INTERVAL_MS = 5 * 1000
+
 
 class IdGenerator:
     def __init__(
@@ -243,6 +247,15 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
         # position beyond the minimum stream ID in this list.
         self._in_flight_fetches: SortedList[int] = SortedList()
 
+        # Stream IDs that we have reserved from the sequence but not yet handed
+        # out. When `stream_id_block_size` is configured we fetch IDs from the
+        # sequence in blocks, and hand out the rest of the block locally without
+        # going to the database. We can't advance the local current position
+        # past any of these, so if the stream moves past them while we're not
+        # writing anything we drop them (see `_drop_stale_reserved_ids`).
+        self._reserved_ids: SortedList[int] = SortedList()
+        self._id_block_size = db.hs.config.worker.stream_id_block_size
+
         # Set of local IDs that we've processed that are larger than the current
         # position, due to there being smaller unpersisted IDs.
         self._finished_ids: Set[int] = set()
@@ -327,6 +340,22 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
             # position with the current minimum.
             self._current_positions[self._instance_name] = self._persisted_upto_position
 
+        # The position we last wrote to our row in `stream_positions`.
+        self._last_written_stream_position: Optional[int] = None
+
+        if self._instance_name in self._writers:
+            # Our row in `stream_positions` is otherwise only updated when we
+            # write to the stream, so it falls behind while other writers carry
+            # on and we don't. Anything comparing the table against a stream
+            # token (e.g. to check if a read replica has caught up) would then
+            # think we're behind.
+            db.hs.get_clock().looping_call(
+                run_as_background_process,
+                STREAM_POSITIONS_REFRESH_INTERVAL_MS,
+                "refresh_stream_positions",
+                self._refresh_stream_positions_table,
+            )
+
     def _load_current_ids(
         self,
         db_conn: LoggingDatabaseConnection,
@@ -475,6 +504,12 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
         return stream_ids[0]
 
     def _load_next_mult_id_txn(self, txn: Cursor, n: int) -> List[int]:
+        # If we have enough stream IDs reserved from a previous fetch then use
+        # them.
+        stream_ids = self._get_reserved_ids(n)
+        if stream_ids is not None:
+            return stream_ids
+
         # We need to track that we've requested some more stream IDs, and what
         # the current max allocated stream ID is. This is to prevent a race
         # where we've been allocated stream IDs but they have not yet been added
@@ -485,9 +520,15 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
             self._in_flight_fetches.add(current_max)
 
         try:
-            stream_ids = self._sequence_gen.get_next_mult_txn(txn, n)
+            stream_ids = sorted(
+                self._sequence_gen.get_next_mult_txn(txn, max(n, self._id_block_size))
+            )
 
             with self._lock:
+                # Keep any extra IDs we fetched for future calls.
+                self._reserved_ids.update(stream_ids[n:])
+                stream_ids = stream_ids[:n]
+
                 self._unfinished_ids.update(stream_ids)
                 self._max_seen_allocated_stream_id = max(
                     self._max_seen_allocated_stream_id, self._unfinished_ids[-1]
@@ -498,6 +539,27 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
 
         return stream_ids
 
+    def _get_reserved_ids(self, n: int) -> Optional[List[int]]:
+        """Hand out `n` of the stream IDs we have already reserved from the
+        sequence, if we have enough of them.
+
+        Returns:
+            The stream IDs, or None if we need to fetch more from the database.
+        """
+        with self._lock:
+            if len(self._reserved_ids) < n:
+                return None
+
+            stream_ids = list(self._reserved_ids.islice(stop=n))
+            del self._reserved_ids[:n]
+
+            self._unfinished_ids.update(stream_ids)
+            self._max_seen_allocated_stream_id = max(
+                self._max_seen_allocated_stream_id, self._unfinished_ids[-1]
+            )
+
+        return stream_ids
+
     def get_next(self) -> AsyncContextManager[int]:
         # If we have a list of instances that are allowed to write to this
         # stream, make sure we're in it.
@@ -604,58 +666,97 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
             self._unfinished_ids.difference_update(next_ids)
             self._finished_ids.update(next_ids)
 
-            new_cur: Optional[int] = None
-
-            if self._unfinished_ids or self._in_flight_fetches:
-                # If there are unfinished IDs then the new position will be the
-                # largest finished ID strictly less than the minimum unfinished
-                # ID.
-
-                # The minimum unfinished ID needs to take account of both
-                # `_unfinished_ids` and `_in_flight_fetches`.
-                if self._unfinished_ids and self._in_flight_fetches:
-                    # `_in_flight_fetches` stores the maximum safe stream ID, so
-                    # we add one to make it equivalent to the minimum unsafe ID.
-                    min_unfinished = min(
-                        self._unfinished_ids[0], self._in_flight_fetches[0] + 1
-                    )
-                elif self._in_flight_fetches:
-                    min_unfinished = self._in_flight_fetches[0] + 1
-                else:
-                    min_unfinished = self._unfinished_ids[0]
-
-                finished = set()
-                for s in self._finished_ids:
-                    if s < min_unfinished:
-                        if new_cur is None or new_cur < s:
-                            new_cur = s
-                    else:
-                        finished.add(s)
-
-                # We clear these out since they're now all less than the new
-                # position.
-                self._finished_ids = finished
-            else:
-                # There are no unfinished IDs so the new position is simply the
-                # largest finished one.
-                new_cur = max(self._finished_ids)
-
-                # We clear these out since they're now all less than the new
-                # position.
-                self._finished_ids.clear()
-
-            if new_cur:
-                curr = self._current_positions.get(self._instance_name, 0)
-                self._current_positions[self._instance_name] = max(curr, new_cur)
-                self._max_position_of_local_instance = max(
-                    curr, new_cur, self._max_position_of_local_instance
-                )
+            self._drop_stale_reserved_ids()
+            self._advance_local_position()
 
             # TODO Can we call this for just the last position or somehow batch
             # _add_persisted_position.
             for next_id in next_ids:
                 self._add_persisted_position(next_id)
 
+    def _advance_local_position(self) -> None:
+        """Advance the current position of the local instance past any
+        finished IDs, if possible.
+        """
+
+        # We require that the lock is locked by caller
+        assert self._lock.locked()
+
+        if not self._finished_ids:
+            return
+
+        new_cur: Optional[int] = None
+
+        if self._unfinished_ids or self._in_flight_fetches or self._reserved_ids:
+            # If there are unfinished IDs then the new position will be the
+            # largest finished ID strictly less than the minimum unfinished
+            # ID.
+
+            # The minimum unfinished ID needs to take account of
+            # `_unfinished_ids`, `_in_flight_fetches` and `_reserved_ids`.
+            candidates = []
+            if self._unfinished_ids:
+                candidates.append(self._unfinished_ids[0])
+            if self._in_flight_fetches:
+                # `_in_flight_fetches` stores the maximum safe stream ID, so
+                # we add one to make it equivalent to the minimum unsafe ID.
+                candidates.append(self._in_flight_fetches[0] + 1)
+            if self._reserved_ids:
+                candidates.append(self._reserved_ids[0])
+            min_unfinished = min(candidates)
+
+            finished = set()
+            for s in self._finished_ids:
+                if s < min_unfinished:
+                    if new_cur is None or new_cur < s:
+                        new_cur = s
+                else:
+                    finished.add(s)
+
+            # We clear these out since they're now all less than the new
+            # position.
+            self._finished_ids = finished
+        else:
+            # There are no unfinished IDs so the new position is simply the
+            # largest finished one.
+            new_cur = max(self._finished_ids)
+
+            # We clear these out since they're now all less than the new
+            # position.
+            self._finished_ids.clear()
+
+        if new_cur:
+            curr = self._current_positions.get(self._instance_name, 0)
+            self._current_positions[self._instance_name] = max(curr, new_cur)
+            self._max_position_of_local_instance = max(
+                curr, new_cur, self._max_position_of_local_instance
+            )
+
+    def _drop_stale_reserved_ids(self) -> bool:
+        """Drop the stream IDs we have reserved but not used, if the stream
+        has moved past them and we're not currently writing anything.
+
+        Unused reserved IDs stop our position from advancing, so holding on to
+        them while idle would hold up the stream for everyone else.
+
+        Returns:
+            True if any reserved IDs were dropped.
+        """
+
+        # We require that the lock is locked by caller
+        assert self._lock.locked()
+
+        if (
+            not self._reserved_ids
+            or self._unfinished_ids
+            or self._in_flight_fetches
+            or self._reserved_ids[0] > self._max_seen_allocated_stream_id
+        ):
+            return False
+
+        self._reserved_ids.clear()
+        return True
+
     def get_current_token(self) -> int:
         return self.get_persisted_upto_position()
 
@@ -712,6 +813,9 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
                 self._max_seen_allocated_stream_id, new_id
             )
 
+            if self._drop_stale_reserved_ids():
+                self._advance_local_position()
+
             self._add_persisted_position(new_id)
 
     def get_persisted_upto_position(self) -> int:
@@ -762,9 +866,14 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
 
         if not self._unfinished_ids and not self._in_flight_fetches:
             # If we don't have anything in flight, it's safe to advance to the
-            # max seen stream ID.
+            # max seen stream ID (but not past any IDs we've reserved and will
+            # hand out later).
+            max_safe_position = self._max_seen_allocated_stream_id
+            if self._reserved_ids:
+                max_safe_position = min(max_safe_position, self._reserved_ids[0] - 1)
+
             self._max_position_of_local_instance = max(
-                self._max_seen_allocated_stream_id, self._max_position_of_local_instance
+                max_safe_position, self._max_position_of_local_instance
             )
 
         # We now iterate through the seen positions, discarding those that are
@@ -812,6 +921,24 @@ class MultiWriterIdGenerator(AbstractStreamIdGenerator):
         pos = self.get_current_token_for_writer(self._instance_name)
         txn.execute(sql, (self._stream_name, self._instance_name, pos))
 
+        self._last_written_stream_position = pos
+
+    async def _refresh_stream_positions_table(self) -> None:
+        """Update our row in the `stream_positions` table if our position has
+        moved on since we last wrote it, e.g. because other writers have written
+        to the stream while we were idle.
+        """
+
+        pos = self.get_current_token_for_writer(self._instance_name)
+        if pos == self._last_written_stream_position:
+            return
+
+        await self._db.runInteraction(
+            "MultiWriterIdGenerator._refresh_stream_positions_table",
+            self._update_stream_positions_table_txn,
+            db_autocommit=True,
+        )
+
     async def get_max_allocated_token(self) -> int:
         return await self._db.runInteraction(
             "get_max_allocated_token", self._sequence_gen.get_max_allocated
@@ -850,14 +977,18 @@ class _MultiWriterCtxManager:
     stream_ids: List[int] = attr.Factory(list)
 
     async def __aenter__(self) -> Union[int, List[int]]:
-        # It's safe to run this in autocommit mode as fetching values from a
-        # sequence ignores transaction semantics anyway.
-        self.stream_ids = await self.id_gen._db.runInteraction(
-            "_load_next_mult_id",
-            self.id_gen._load_next_mult_id_txn,
-            self.multiple_ids or 1,
-            db_autocommit=True,
-        )
+        # Avoid going to the database if we have enough stream IDs reserved.
+        stream_ids = self.id_gen._get_reserved_ids(self.multiple_ids or 1)
+        if stream_ids is None:
+            # It's safe to run this in autocommit mode as fetching values from a
+            # sequence ignores transaction semantics anyway.
+            stream_ids = await self.id_gen._db.runInteraction(
+                "_load_next_mult_id",
+                self.id_gen._load_next_mult_id_txn,
+                self.multiple_ids or 1,
+                db_autocommit=True,
+            )
+        self.stream_ids = stream_ids
 
         if self.multiple_ids is None:
             return self.stream_ids[0] * self.id_gen._return_factor
@@ -185,10 +185,10 @@ class StateFilter:
         the returned filter.
 
         This helps the caching as the DictionaryCache knows if it has *all* the
-        state, but does not know if it has all of the keys of a particular type,
-        which makes wildcard lookups expensive unless we have a complete cache.
-        Hence, if we are doing a wildcard lookup, populate the cache fully so
-        that we can do an efficient lookup next time.
+        state, or all of the keys of particular types, but cannot know if it has
+        all of the "other" state unless it has a complete cache. Hence, if we
+        are doing a lookup that includes other state, populate the cache fully
+        so that we can do an efficient lookup next time.
 
         Note that since we have two caches, one for membership events and one for
         other events, we can be a bit more clever than simply returning
@@ -70,9 +70,9 @@ class BatchingQueue(Generic[V, R]):
     with all pending work (for a given key).
 
     The provided processing function will only be called once at a time for each
-    key. It will be called the next reactor tick after `add_to_queue` has been
-    called, and will keep being called until the queue has been drained (for the
-    given key).
+    key. It will be called the next reactor tick (or after `batch_delay_s`, if
+    given) after `add_to_queue` has been called, and will keep being called until
+    the queue has been drained (for the given key).
 
     If the processing function raises an exception then the exception is proxied
     through to the callers waiting on that batch of work.
@@ -88,6 +88,9 @@ class BatchingQueue(Generic[V, R]):
         clock: The clock to use to schedule work.
         process_batch_callback: The callback to to be run to process a batch of
             work.
+        batch_delay_s: How long to wait for more work to be added to the queue
+            before processing a batch, in seconds. Defaults to waiting a single
+            reactor tick.
     """
 
     def __init__(
@@ -95,9 +98,11 @@ class BatchingQueue(Generic[V, R]):
         name: str,
         clock: Clock,
         process_batch_callback: Callable[[List[V]], Awaitable[R]],
+        batch_delay_s: float = 0,
     ):
         self._name = name
         self._clock = clock
+        self._batch_delay_s = batch_delay_s
 
         # The set of keys currently being processed.
         self._processing_keys: Set[Hashable] = set()
@@ -157,7 +162,7 @@ class BatchingQueue(Generic[V, R]):
                 # pattern is to call `add_to_queue` multiple times at once, and
                 # deferring to the next reactor tick allows us to batch all of
                 # those up.
-                await self._clock.sleep(0)
+                await self._clock.sleep(self._batch_delay_s)
 
                 next_values = self._next_values.pop(key, [])
                 if not next_values:
@@ -24,7 +24,7 @@ import logging
 import typing
 from enum import Enum, auto
 from sys import intern
-from typing import Any, Callable, Dict, List, Optional, Sized, TypeVar
+from typing import Any, Callable, Dict, List, Optional, Sized, Tuple, TypeVar
 
 import attr
 from prometheus_client import REGISTRY
@@ -252,6 +252,34 @@ def intern_string(string: T) -> T:
         return string
 
 
+# The maximum number of (type, state_key) pairs to keep in the intern table. When
+# the table is full it is emptied, which loses some sharing between state maps
+# but stops the table growing without bound.
+STATE_KEY_INTERN_TABLE_MAX_SIZE = 500000
+
+_interned_state_keys: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+
+def intern_state_key(typ: str, state_key: str) -> Tuple[str, str]:
+    """Returns a shared `(type, state_key)` tuple for the given pair.
+
+    The same pairs turn up in a great many state maps (e.g. every state group
+    in a room has an entry for each member), so sharing a single tuple between
+    them rather than allocating one per map saves a lot of memory in large
+    rooms.
+    """
+    key = (intern_string(typ), intern_string(state_key))
+    interned = _interned_state_keys.get(key)
+    if interned is not None:
+        return interned
+
+    if len(_interned_state_keys) >= STATE_KEY_INTERN_TABLE_MAX_SIZE:
+        _interned_state_keys.clear()
+
+    _interned_state_keys[key] = key
+    return key
+
+
 def intern_dict(dictionary: Dict[str, Any]) -> Dict[str, Any]:
     """Takes a dictionary and interns well known keys and their values"""
     return {
@@ -21,7 +21,19 @@
 import enum
 import logging
 import threading
-from typing import Dict, Generic, Iterable, Optional, Set, Tuple, TypeVar, Union
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import attr
 from typing_extensions import Literal
@@ -68,6 +80,13 @@ class _FullCacheKey(enum.Enum):
     KEY = object()
 
 
+@attr.s(slots=True, frozen=True, auto_attribs=True)
+class _TypeCacheKey:
+    """The key we use to cache all the entries in the dict of a given type."""
+
+    dict_key_type: Hashable
+
+
 class _Sentinel(enum.Enum):
     # defining a sentinel in this way allows mypy to correctly handle the
     # type of a dictionary lookup.
@@ -116,16 +135,28 @@ class DictionaryCache(Generic[KT, DKT, DV]):
     ... then the cache entry for the complete dict will expire first,
     followed by the cache entry for the '1' dict key, and finally that
     for the '2' dict key.
+
+    If a `dict_key_type` function is given, the dict keys are grouped into
+    types, and the cache can also track that it has *all* the dict keys of a
+    given type (see `get_for_types`), without needing the complete dict.
     """
 
-    def __init__(self, name: str, max_entries: int = 1000):
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1000,
+        dict_key_type: Optional[Callable[[DKT], Hashable]] = None,
+    ):
         # We use a single LruCache to store two different types of entries:
         #   1. Map from (key, dict_key) -> dict value (or sentinel, indicating
         #      the key doesn't exist in the dict); and
-        #   2. Map from (key, _FullCacheKey.KEY) -> full dict.
+        #   2. Map from (key, _FullCacheKey.KEY) -> full dict; and
+        #   3. Map from (key, _TypeCacheKey(type)) -> all the dict entries of
+        #      the given type.
         #
-        # The former is used when explicit keys of the dictionary are looked up,
-        # and the latter when the full dictionary is requested.
+        # The first is used when explicit keys of the dictionary are looked up,
+        # the second when the full dictionary is requested, and the third when
+        # all the keys of particular types are requested.
         #
         # If when explicit keys are requested and not in the cache, we then look
         # to see if we have the full dict and use that if we do. If found in the
@@ -138,8 +169,9 @@ class DictionaryCache(Generic[KT, DKT, DV]):
         # Typing:
         #     * A key of `(KT, DKT)` has a value of `_PerKeyValue`
         #     * A key of `(KT, _FullCacheKey.KEY)` has a value of `Dict[DKT, DV]`
+        #     * A key of `(KT, _TypeCacheKey)` has a value of `Dict[DKT, DV]`
         self.cache: LruCache[
-            Tuple[KT, Union[DKT, Literal[_FullCacheKey.KEY]]],
+            Tuple[KT, Union[DKT, Literal[_FullCacheKey.KEY], _TypeCacheKey]],
             Union[_PerKeyValue, Dict[DKT, DV]],
         ] = LruCache(
             max_size=max_entries,
@@ -150,6 +182,7 @@ class DictionaryCache(Generic[KT, DKT, DV]):
 
         self.name = name
         self.sequence = 0
+        self._dict_key_type = dict_key_type
         self.thread: Optional[threading.Thread] = None
 
     def check_thread(self) -> None:
@@ -208,6 +241,13 @@ class DictionaryCache(Generic[KT, DKT, DV]):
         if not missing:
             return DictionaryEntry(False, known_absent, values)
 
+        # Dict keys covered by a cache entry for their type aren't also cached
+        # individually (see `update`), so look for them there.
+        if self._dict_key_type is not None:
+            missing = self._get_from_type_entries(key, missing, values, known_absent)
+            if not missing:
+                return DictionaryEntry(False, known_absent, values)
+
         # We are missing some keys, so check if we happen to have the full dict in
         # the cache.
         #
@@ -237,6 +277,41 @@ class DictionaryCache(Generic[KT, DKT, DV]):
 
         return DictionaryEntry(True, set(), values)
 
+    def _get_from_type_entries(
+        self,
+        key: KT,
+        dict_keys: List[DKT],
+        values: Dict[DKT, DV],
+        known_absent: Set[DKT],
+    ) -> List[DKT]:
+        """Look up the given dict keys in the cache entries holding all the
+        dict entries of their type, adding those found to `values` and
+        `known_absent`.
+
+        Returns:
+            The dict keys whose type doesn't have a cache entry.
+        """
+        assert self._dict_key_type is not None
+
+        missing = []
+        for dict_key in dict_keys:
+            entry = self.cache.get(
+                (key, _TypeCacheKey(self._dict_key_type(dict_key))), None
+            )
+            if entry is None:
+                missing.append(dict_key)
+                continue
+
+            assert isinstance(entry, dict)
+
+            value = entry.get(dict_key, _Sentinel.sentinel)
+            if value is _Sentinel.sentinel:
+                known_absent.add(dict_key)
+            else:
+                values[dict_key] = value
+
+        return missing
+
     def _get_full_dict(
         self,
         key: KT,
@@ -251,6 +326,50 @@ class DictionaryCache(Generic[KT, DKT, DV]):
 
         return DictionaryEntry(False, set(), {})
 
+    def get_for_types(
+        self, key: KT, dict_key_types: Iterable[Hashable]
+    ) -> Optional[Dict[DKT, DV]]:
+        """Fetch all the dict entries of the given types.
+
+        Args:
+            key
+            dict_key_types: The types of dict key to fetch, as returned by the
+                `dict_key_type` function given to the constructor.
+
+        Returns:
+            The dict entries of the given types, or None if we don't know
+            that we have all of them cached.
+        """
+        assert self._dict_key_type is not None
+
+        # If we have the full dict then we can answer from that. As with
+        # looking up explicit keys, this doesn't count as an access of the full
+        # dict.
+        full_entry = self.cache.get(
+            (key, _FullCacheKey.KEY),
+            _Sentinel.sentinel,
+            update_last_access=False,
+        )
+        if full_entry is not _Sentinel.sentinel:
+            assert isinstance(full_entry, dict)
+            dict_key_types = set(dict_key_types)
+            return {
+                dict_key: value
+                for dict_key, value in full_entry.items()
+                if self._dict_key_type(dict_key) in dict_key_types
+            }
+
+        values: Dict[DKT, DV] = {}
+        for dict_key_type in dict_key_types:
+            entry = self.cache.get((key, _TypeCacheKey(dict_key_type)), None)
+            if entry is None:
+                return None
+
+            assert isinstance(entry, dict)
+            values.update(entry)
+
+        return values
+
     def invalidate(self, key: KT) -> None:
         self.check_thread()
 
@@ -276,6 +395,7 @@ class DictionaryCache(Generic[KT, DKT, DV]):
         key: KT,
         value: Dict[DKT, DV],
         fetched_keys: Optional[Iterable[DKT]] = None,
+        fetched_types: Optional[Iterable[Hashable]] = None,
     ) -> None:
         """Updates the entry in the cache.
 
@@ -298,6 +418,10 @@ class DictionaryCache(Generic[KT, DKT, DV]):
                 If None, this is the complete value for key K. Otherwise, it
                 is used to infer a list of keys which we know don't exist in
                 the full dict.
+            fetched_types: The types of dict key for which *all* the keys were
+                fetched from the database. Only used if `fetched_keys` is not
+                None, and requires `dict_key_type` to have been given to the
+                constructor.
         """
         self.check_thread()
         if self.sequence == sequence:
@@ -305,8 +429,29 @@ class DictionaryCache(Generic[KT, DKT, DV]):
             # number that the cache had before the SELECT was started (SYN-369)
             if fetched_keys is None:
                 self.cache[(key, _FullCacheKey.KEY)] = value
-            else:
+            elif fetched_types is None:
                 self._update_subset(key, value, fetched_keys)
+            else:
+                # The dict keys of the fetched types are held by the cache
+                # entries for their types, so we don't also cache them
+                # individually: that would store (and count towards the size
+                # of the cache) each of them twice.
+                assert self._dict_key_type is not None
+                fetched_types = set(fetched_types)
+                self._update_types(key, value, fetched_types)
+                self._update_subset(
+                    key,
+                    {
+                        dict_key: dict_value
+                        for dict_key, dict_value in value.items()
+                        if self._dict_key_type(dict_key) not in fetched_types
+                    },
+                    [
+                        dict_key
+                        for dict_key in fetched_keys
+                        if self._dict_key_type(dict_key) not in fetched_types
+                    ],
+                )
 
     def _update_subset(
         self, key: KT, value: Dict[DKT, DV], fetched_keys: Iterable[DKT]
@@ -328,3 +473,28 @@ class DictionaryCache(Generic[KT, DKT, DV]):
                 continue
 
             self.cache[(key, dict_key)] = _PerKeyValue(_Sentinel.sentinel)
+
+    def _update_types(
+        self, key: KT, value: Dict[DKT, DV], fetched_types: Iterable[Hashable]
+    ) -> None:
+        """Add entries to the cache holding all the dict entries of each of the
+        given types.
+
+        Args:
+            key: top-level cache key
+            value: The dictionary with all the values that we should cache
+            fetched_types: The types of dict key for which `value` contains
+                all the keys.
+        """
+        assert self._dict_key_type is not None
+
+        values_by_type: Dict[Hashable, Dict[DKT, DV]] = {
+            dict_key_type: {} for dict_key_type in fetched_types
+        }
+        for dict_key, dict_value in value.items():
+            type_values = values_by_type.get(self._dict_key_type(dict_key))
+            if type_values is not None:
+                type_values[dict_key] = dict_value
+
+        for dict_key_type, type_values in values_by_type.items():
+            self.cache[(key, _TypeCacheKey(dict_key_type))] = type_values
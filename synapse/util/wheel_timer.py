@@ -102,9 +102,18 @@ class WheelTimer(Generic[T]):
         """
         now_key = int(now / self.bucket_size)
 
+        # Work out how many of the buckets are due and drop them in one go,
+        # rather than popping them off the front of the list one at a time.
+        num_due = 0
+        for entry in self.entries:
+            if entry.end_key > now_key:
+                break
+            num_due += 1
+
         ret: List[T] = []
-        while self.entries and self.entries[0].end_key <= now_key:
-            ret.extend(self.entries.pop(0).elements)
+        for entry in self.entries[:num_due]:
+            ret.extend(entry.elements)
+        del self.entries[:num_due]
 
         return ret
 
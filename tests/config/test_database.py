@@ -20,7 +20,8 @@
 
 import yaml
 
-from synapse.config.database import DatabaseConfig
+from synapse.config._base import ConfigError
+from synapse.config.database import DatabaseConfig, DatabaseConnectionConfig
 
 from tests import unittest
 
@@ -37,3 +38,25 @@ class DatabaseConfigTestCase(unittest.TestCase):
         }
 
         self.assertEqual(conf["database"], expected_database_conf)
+
+    def test_replica_inherits_args(self) -> None:
+        """The replica connection args are merged on top of the primary's."""
+        db_config = DatabaseConnectionConfig(
+            "master",
+            {
+                "name": "psycopg2",
+                "args": {"user": "synapse", "host": "primary"},
+                "replica": {"args": {"host": "replica"}},
+            },
+        )
+
+        assert db_config.replica is not None
+        self.assertEqual(
+            db_config.replica.config["args"], {"user": "synapse", "host": "replica"}
+        )
+
+    def test_replica_requires_postgres(self) -> None:
+        with self.assertRaises(ConfigError):
+            DatabaseConnectionConfig(
+                "master", {"name": "sqlite3", "replica": {"args": {}}}
+            )
@@ -18,7 +18,7 @@
 # [This file includes modifications made by New Vector Limited]
 #
 #
-from typing import Any, Mapping, Optional
+from typing import Any, Dict, List, Mapping, Optional
 from unittest.mock import Mock
 
 from immutabledict import immutabledict
@@ -330,3 +330,42 @@ class WorkerDutyConfigTestCase(TestCase):
         )
         self.assertTrue(worker2_config.should_notify_appservices)
         self.assertFalse(worker2_config.should_update_user_directory)
+
+    def test_federation_sender_consistent_hashing(self) -> None:
+        """
+        Tests that with consistent hashing enabled, adding a federation sender only
+        moves a small proportion of destinations, and only to the new sender.
+        """
+        destinations = [f"server{i}.example.com" for i in range(1000)]
+
+        def assignments(instances: List[str]) -> Dict[str, str]:
+            worker_config = self._make_worker_config(
+                worker_app="synapse.app.generic_worker",
+                worker_name="federation_sender1",
+                extras={
+                    "federation_sender_instances": instances,
+                    "federation_sender_consistent_hashing": True,
+                    "instance_map": {"main": {"host": "127.0.0.1", "port": 0}},
+                },
+            )
+            shard_config = worker_config.federation_shard_config
+            return {
+                destination: next(
+                    instance
+                    for instance in instances
+                    if shard_config.should_handle(instance, destination)
+                )
+                for destination in destinations
+            }
+
+        before = assignments(["sender1", "sender2", "sender3"])
+        after = assignments(["sender1", "sender2", "sender3", "sender4"])
+
+        moved = [d for d in destinations if before[d] != after[d]]
+
+        # Every destination that moved should have moved to the new sender...
+        self.assertTrue(all(after[d] == "sender4" for d in moved))
+
+        # ... and the new sender should have picked up roughly a quarter of them.
+        self.assertGreater(len(moved), 150)
+        self.assertLess(len(moved), 350)
@@ -110,6 +110,9 @@ class TestEventContext(unittest.HomeserverTestCase):
         )
         self.assertEqual(context.state_group_deltas, d_context.state_group_deltas)
         self.assertEqual(context.app_service, d_context.app_service)
+        self.assertEqual(
+            context.state_from_prev_events, d_context.state_from_prev_events
+        )
 
         self.assertEqual(
             self.get_success(context.get_current_state_ids()),
@@ -343,11 +343,12 @@ class FederationCatchUpTestCases(FederatingHomeserverTestCase):
 
         # ASSERT, noticing in particular:
         # - event 3 not sent out, because event 5 replaces it
-        # - order is least recent first, so event 5 comes after event 4
+        # - rooms with the most recent activity are prioritised, so event 5
+        #   comes before event 4
         # - catch-up is completed
         self.assertEqual(len(sent_pdus), 2)
-        self.assertEqual(sent_pdus[0].event_id, event_id_4)
-        self.assertEqual(sent_pdus[1].event_id, event_id_5)
+        self.assertEqual(sent_pdus[0].event_id, event_id_5)
+        self.assertEqual(sent_pdus[1].event_id, event_id_4)
         self.assertFalse(per_dest_queue._catching_up)
         self.assertEqual(
             per_dest_queue._last_successful_stream_ordering,
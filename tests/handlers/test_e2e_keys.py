@@ -26,6 +26,7 @@ from unittest import mock
 from parameterized import parameterized
 from signedjson import key as key, sign as sign
 
+from twisted.internet import defer
 from twisted.test.proto_helpers import MemoryReactor
 
 from synapse.api.constants import RoomEncryptionAlgorithms
@@ -57,6 +58,53 @@ class E2eKeysHandlerTestCase(unittest.HomeserverTestCase):
         res = self.get_success(self.handler.query_local_devices({local_user: None}))
         self.assertDictEqual(res, {local_user: {}})
 
+    def test_query_local_devices_reflects_updates(self) -> None:
+        """Updates to a device are reflected in subsequent queries, even though
+        the device keys are cached.
+        """
+        local_user = "@boris:" + self.hs.hostname
+        device_id = "xyz"
+        device_keys = {
+            "user_id": local_user,
+            "device_id": device_id,
+            "algorithms": ["m.olm.curve25519-aes-sha2"],
+            "keys": {"ed25519:xyz": "base64+ed25519+key"},
+            "signatures": {local_user: {"ed25519:xyz": "base64+signature"}},
+        }
+
+        device_handler = self.hs.get_device_handler()
+        assert isinstance(device_handler, DeviceHandler)
+        self.get_success(
+            device_handler.check_device_registered(
+                local_user, device_id, initial_device_display_name="old name"
+            )
+        )
+        self.get_success(
+            self.handler.upload_keys_for_user(
+                local_user, device_id, {"device_keys": device_keys}
+            )
+        )
+
+        res = self.get_success(self.handler.query_local_devices({local_user: None}))
+        self.assertEqual(
+            res[local_user][device_id]["unsigned"], {"device_display_name": "old name"}
+        )
+
+        # Renaming the device should invalidate the cached keys.
+        self.get_success(
+            device_handler.update_device(
+                local_user, device_id, {"display_name": "new name"}
+            )
+        )
+
+        res = self.get_success(
+            self.handler.query_local_devices({local_user: [device_id, "unknown"]})
+        )
+        self.assertEqual(list(res[local_user]), [device_id])
+        self.assertEqual(
+            res[local_user][device_id]["unsigned"], {"device_display_name": "new name"}
+        )
+
     def test_reupload_one_time_keys(self) -> None:
         """we should be able to re-upload the same keys"""
         local_user = "@boris:" + self.hs.hostname
@@ -1168,6 +1216,51 @@ class E2eKeysHandlerTestCase(unittest.HomeserverTestCase):
             },
         )
 
+    def test_query_devices_remote_deduplicates_requests(self) -> None:
+        """Concurrent identical queries for the keys of remote users only result
+        in a single request to the remote server.
+        """
+        remote_user_id = "@test:other"
+        local_user_id = "@test:test"
+
+        remote_response: "defer.Deferred[JsonDict]" = defer.Deferred()
+        self.hs.get_federation_client().query_client_keys = mock.Mock(  # type: ignore[method-assign]
+            return_value=remote_response
+        )
+
+        e2e_handler = self.hs.get_e2e_keys_handler()
+
+        query_deferreds = [
+            defer.ensureDeferred(
+                e2e_handler.query_devices(
+                    {"device_keys": {remote_user_id: []}},
+                    timeout=10,
+                    from_user_id=local_user_id,
+                    from_device_id=device_id,
+                )
+            )
+            for device_id in ("device_1", "device_2")
+        ]
+
+        # Both queries should now be waiting on the same remote request.
+        self.pump()
+        for query_deferred in query_deferreds:
+            self.assertFalse(query_deferred.called)
+
+        remote_response.callback(
+            {"device_keys": {remote_user_id: {"abc": {"device_id": "abc"}}}}
+        )
+
+        for query_deferred in query_deferreds:
+            query_result = self.get_success(query_deferred)
+            self.assertEqual(query_result["failures"], {})
+            self.assertEqual(
+                query_result["device_keys"],
+                {remote_user_id: {"abc": {"device_id": "abc"}}},
+            )
+
+        self.hs.get_federation_client().query_client_keys.assert_called_once()  # type: ignore[attr-defined]
+
     def test_has_different_keys(self) -> None:
         """check that has_different_keys returns True when the keys provided are different to what
         is in the database."""
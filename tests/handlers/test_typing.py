@@ -32,7 +32,11 @@ from twisted.web.resource import Resource
 from synapse.api.constants import EduTypes
 from synapse.api.errors import AuthError
 from synapse.federation.transport.server import TransportLayerServer
-from synapse.handlers.typing import FORGET_TIMEOUT, TypingWriterHandler
+from synapse.handlers.typing import (
+    FEDERATION_TIMEOUT,
+    FORGET_TIMEOUT,
+    TypingWriterHandler,
+)
 from synapse.http.federation.matrix_federation_agent import MatrixFederationAgent
 from synapse.server import HomeServer
 from synapse.types import JsonDict, Requester, StreamKeyType, UserID, create_requester
@@ -338,6 +342,34 @@ class TypingNotificationsTestCase(unittest.HomeserverTestCase):
         self.assertEqual(events[0], [])
         self.assertEqual(events[1], 0)
 
+    def test_remote_typing_forgotten_after_timeout(self) -> None:
+        """Remote users that have stopped typing are dropped from the handler's
+        per-member state once their timer fires.
+        """
+        self.room_members = [U_APPLE, U_ONION]
+
+        for txn_id, typing in (("1000000", True), ("1000001", False)):
+            channel = self.make_request(
+                "PUT",
+                f"/_matrix/federation/v1/send/{txn_id}",
+                _make_edu_transaction_json(
+                    EduTypes.TYPING,
+                    content={
+                        "room_id": ROOM_ID,
+                        "user_id": U_ONION.to_string(),
+                        "typing": typing,
+                    },
+                ),
+                federation_auth_origin=b"farm",
+            )
+            self.assertEqual(channel.code, 200)
+
+        self.assertEqual(len(self.handler._member_typing_until), 1)
+
+        self.reactor.advance(FEDERATION_TIMEOUT / 1000 + 10)
+
+        self.assertEqual(self.handler._member_typing_until, {})
+
     # Enable federation sending on the main process.
     @override_config({"federation_sender_instances": None})
     def test_stopped_typing(self) -> None:
@@ -0,0 +1,96 @@
+#
+# This file is licensed under the Affero General Public License (AGPL) version 3.
+#
+# Copyright (C) 2026 New Vector, Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# See the GNU Affero General Public License for more details:
+# <https://www.gnu.org/licenses/agpl-3.0.html>.
+#
+#
+import logging
+
+from synapse.api.constants import PresenceState
+from synapse.handlers.presence import PresenceHandler
+from synapse.types import UserID
+
+from tests.replication._base import BaseMultiWorkerStreamTestCase
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceShardTestCase(BaseMultiWorkerStreamTestCase):
+    """Checks presence sharding works"""
+
+    def default_config(self) -> dict:
+        conf = super().default_config()
+        conf["stream_writers"] = {"presence": ["master", "worker1"]}
+        conf["instance_map"] = {
+            "main": {"host": "testserv", "port": 8765},
+            "worker1": {"host": "testserv", "port": 1001},
+        }
+        return conf
+
+    def test_set_state_is_routed_to_writer(self) -> None:
+        """Setting the presence of a user handled by another presence writer
+        proxies the update to that writer, and the new state is replicated
+        back to the other writers.
+        """
+        worker1 = self.make_worker_hs(
+            "synapse.app.generic_worker",
+            {"worker_name": "worker1"},
+        )
+
+        main_presence_handler = self.hs.get_presence_handler()
+        worker_presence_handler = worker1.get_presence_handler()
+        assert isinstance(main_presence_handler, PresenceHandler)
+        assert isinstance(worker_presence_handler, PresenceHandler)
+
+        # Find a user handled by each of the presence writers.
+        shard_config = self.hs.config.worker.presence_shard_config
+        user_ids = [f"@user{i}:test" for i in range(50)]
+        main_user_id = next(
+            user_id
+            for user_id in user_ids
+            if shard_config.get_instance(user_id) == "master"
+        )
+        worker_user_id = next(
+            user_id
+            for user_id in user_ids
+            if shard_config.get_instance(user_id) == "worker1"
+        )
+
+        # Set the presence of both users via the main process.
+        for user_id in (main_user_id, worker_user_id):
+            self.get_success(
+                main_presence_handler.set_state(
+                    UserID.from_string(user_id),
+                    None,
+                    {"presence": PresenceState.ONLINE},
+                )
+            )
+        self.replicate()
+
+        # Each update should have been persisted by the writer for that user.
+        rows = self.get_success(
+            self.hs.get_datastores().main.db_pool.simple_select_list(
+                table="presence_stream",
+                keyvalues=None,
+                retcols=("user_id", "instance_name"),
+            )
+        )
+        self.assertCountEqual(
+            rows, [(main_user_id, "master"), (worker_user_id, "worker1")]
+        )
+
+        # Both writers should know about the new state of both users.
+        for presence_handler in (main_presence_handler, worker_presence_handler):
+            for user_id in (main_user_id, worker_user_id):
+                state = self.get_success(
+                    presence_handler.get_state(UserID.from_string(user_id))
+                )
+                self.assertEqual(state.state, PresenceState.ONLINE)
@@ -135,7 +135,8 @@ class BackgroundUpdatesTestCase(unittest.HomeserverTestCase):
 
         # Background updates should be enabled, but none should be running.
         self.assertDictEqual(
-            channel.json_body, {"current_updates": {}, "enabled": True}
+            channel.json_body,
+            {"concurrent_updates": {}, "current_updates": {}, "enabled": True},
         )
 
     def test_status_bg_update(self) -> None:
@@ -159,6 +160,7 @@ class BackgroundUpdatesTestCase(unittest.HomeserverTestCase):
         self.assertDictEqual(
             channel.json_body,
             {
+                "concurrent_updates": {},
                 "current_updates": {
                     "master": {
                         "name": "test_update",
@@ -214,6 +216,7 @@ class BackgroundUpdatesTestCase(unittest.HomeserverTestCase):
         self.assertDictEqual(
             channel.json_body,
             {
+                "concurrent_updates": {},
                 "current_updates": {
                     "master": {
                         "name": "test_update",
@@ -243,6 +246,7 @@ class BackgroundUpdatesTestCase(unittest.HomeserverTestCase):
         self.assertDictEqual(
             channel.json_body,
             {
+                "concurrent_updates": {},
                 "current_updates": {
                     "master": {
                         "name": "test_update",
@@ -282,6 +286,7 @@ class BackgroundUpdatesTestCase(unittest.HomeserverTestCase):
         self.assertDictEqual(
             channel.json_body,
             {
+                "concurrent_updates": {},
                 "current_updates": {
                     "master": {
                         "name": "test_update",
@@ -259,6 +259,53 @@ class ReceiptsTestCase(unittest.HomeserverTestCase):
         self.assertEqual(channel.code, HTTPStatus.BAD_REQUEST)
         self.assertEqual(channel.json_body["errcode"], "M_NOT_JSON", channel.json_body)
 
+    @unittest.override_config({"receipts_coalescing_window": "250ms"})
+    def test_receipts_are_coalesced(self) -> None:
+        """Receipts sent by a user in quick succession are persisted as a single
+        receipt for the latest event.
+        """
+        store = self.hs.get_datastores().main
+
+        # Send two messages as the first user.
+        event_id_1 = self.helper.send(self.room_id, body="hello", tok=self.tok)[
+            "event_id"
+        ]
+        event_id_2 = self.helper.send(self.room_id, body="world", tok=self.tok)[
+            "event_id"
+        ]
+
+        stream_id_before = store.get_max_receipt_stream_id().stream
+
+        # Send a read receipt for each message without waiting for the first
+        # request to complete.
+        channels = [
+            self.make_request(
+                "POST",
+                f"/rooms/{self.room_id}/receipt/{ReceiptTypes.READ}/{event_id}",
+                {},
+                access_token=self.tok2,
+                await_result=False,
+            )
+            for event_id in (event_id_1, event_id_2)
+        ]
+
+        # Neither request completes until the coalescing window has passed.
+        self.reactor.advance(0.1)
+        for channel in channels:
+            self.assertFalse(channel.is_finished())
+
+        self.reactor.advance(0.2)
+        for channel in channels:
+            channel.await_result()
+            self.assertEqual(channel.code, 200)
+
+        # Only the receipt for the second message was persisted.
+        receipts = self.get_success(
+            store.get_receipts_for_user(self.user2, [ReceiptTypes.READ])
+        )
+        self.assertEqual(receipts, {self.room_id: event_id_2})
+        self.assertEqual(store.get_max_receipt_stream_id().stream, stream_id_before + 1)
+
     def _get_read_receipt(self) -> Optional[JsonDict]:
         """Syncs and returns the read receipt."""
 
@@ -19,6 +19,8 @@
 #
 #
 
+from unittest.mock import patch
+
 from twisted.test.proto_helpers import MemoryReactor
 
 from synapse.rest import admin
@@ -172,3 +174,99 @@ class DeviceInboxBackgroundUpdateStoreTestCase(HomeserverTestCase):
         )
         self.assertEqual(1, len(res))
         self.assertEqual(res[0], "cur_device")
+
+
+class DeviceInboxAcknowledgementTestCase(HomeserverTestCase):
+    def prepare(self, reactor: MemoryReactor, clock: Clock, hs: HomeServer) -> None:
+        self.store = hs.get_datastores().main
+        self.user_id = "@user:test"
+        self.get_success(self.store.store_device(self.user_id, "device", None))
+
+    def _send_message(self) -> int:
+        return self.get_success(
+            self.store.add_messages_to_device_inbox(
+                {
+                    self.user_id: {
+                        "device": {
+                            "type": "m.test",
+                            "sender": "@sender:test",
+                            "content": {},
+                        }
+                    }
+                },
+                {},
+            )
+        )
+
+    def test_acknowledged_messages_are_deleted_in_background(self) -> None:
+        """Test that acknowledged to-device messages are no longer returned, and
+        get deleted in the background.
+        """
+        first_stream_id = self._send_message()
+        last_stream_id = self._send_message()
+
+        self.store.acknowledge_messages_for_device(
+            self.user_id, "device", first_stream_id
+        )
+
+        # Only the unacknowledged message is returned, even when asking from the
+        # start of the stream.
+        messages, _ = self.get_success(
+            self.store.get_messages_for_device(
+                self.user_id, "device", 0, last_stream_id
+            )
+        )
+        self.assertEqual(len(messages), 1)
+
+        # The acknowledged message gets deleted in the background.
+        self.reactor.advance(60)
+
+        stream_ids = self.get_success(
+            self.store.db_pool.simple_select_onecol(
+                table="device_inbox",
+                keyvalues={"user_id": self.user_id},
+                retcol="stream_id",
+            )
+        )
+        self.assertEqual(stream_ids, [last_stream_id])
+        self.assertEqual(self.store._pending_device_inbox_acks, {})
+
+    def test_acknowledged_messages_deleted_in_bounded_batches(self) -> None:
+        """Test that acknowledged messages are deleted in limited batches,
+        starting from where we last deleted up to for the device.
+        """
+        first_stream_id = self._send_message()
+        self.store.acknowledge_messages_for_device(
+            self.user_id, "device", first_stream_id
+        )
+        self.get_success(self.store._delete_acknowledged_device_messages())
+
+        last_stream_id = self._send_message()
+        self.store.acknowledge_messages_for_device(
+            self.user_id, "device", last_stream_id
+        )
+
+        with patch.object(
+            self.store,
+            "delete_messages_for_device_between",
+            wraps=self.store.delete_messages_for_device_between,
+        ) as mock_delete:
+            self.get_success(self.store._delete_acknowledged_device_messages())
+
+        mock_delete.assert_called_once_with(
+            self.user_id,
+            "device",
+            from_stream_id=first_stream_id,
+            to_stream_id=last_stream_id,
+            limit=1000,
+        )
+
+        stream_ids = self.get_success(
+            self.store.db_pool.simple_select_onecol(
+                table="device_inbox",
+                keyvalues={"user_id": self.user_id},
+                retcol="stream_id",
+            )
+        )
+        self.assertEqual(stream_ids, [])
+        self.assertEqual(self.store._pending_device_inbox_acks, {})
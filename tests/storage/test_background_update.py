@@ -19,7 +19,7 @@
 #
 #
 import logging
-from typing import List, Tuple, cast
+from typing import Awaitable, Callable, List, Tuple, cast
 from unittest.mock import AsyncMock, Mock
 
 import yaml
@@ -240,6 +240,63 @@ class BackgroundUpdateTestCase(unittest.HomeserverTestCase):
         # check that an update has run
         self.update_handler.assert_called()
 
+    @override_config(
+        yaml.safe_load(
+            """
+            background_updates:
+                max_concurrent_updates: 2
+                sleep_enabled: false
+            """
+        )
+    )
+    def test_concurrent_background_updates(self) -> None:
+        """
+        Test that independent background updates are run side by side when
+        max_concurrent_updates is set
+        """
+        second_update_handler = Mock()
+        self.updates.register_background_update_handler(
+            "test_update_2", second_update_handler
+        )
+
+        for update_name in ("test_update", "test_update_2"):
+            self.get_success(
+                self.store.db_pool.simple_insert(
+                    "background_updates",
+                    values={"update_name": update_name, "progress_json": "{}"},
+                )
+            )
+
+        # Each update blocks until we tell it to complete.
+        finish_updates: Deferred[None] = Deferred()
+
+        def make_update(update_name: str) -> Callable[[JsonDict, int], Awaitable[int]]:
+            async def update(progress: JsonDict, count: int) -> int:
+                await finish_updates
+                await self.updates._end_background_update(update_name)
+                return count
+
+            return update
+
+        self.update_handler.side_effect = make_update("test_update")
+        second_update_handler.side_effect = make_update("test_update_2")
+
+        self.updates.start_doing_background_updates()
+        self.reactor.pump([0.1])
+
+        # Both updates should be in progress at the same time.
+        self.update_handler.assert_called_once()
+        second_update_handler.assert_called_once()
+        self.assertEqual(len(self.updates.get_concurrent_updates()), 1)
+        self.assertIsNotNone(self.updates.get_current_update())
+
+        finish_updates.callback(None)
+        self.reactor.pump([0.1])
+
+        self.assertTrue(
+            self.get_success(self.updates.has_completed_background_updates())
+        )
+
     @override_config(
         yaml.safe_load(
             """
@@ -26,7 +26,7 @@ from unittest.mock import Mock, call, patch
 from twisted.internet import defer
 
 from synapse.storage._base import SQLBaseStore
-from synapse.storage.database import DatabasePool
+from synapse.storage.database import COPY_MIN_ROWS, DatabasePool
 from synapse.storage.engines import create_engine
 
 from tests import unittest
@@ -105,7 +105,7 @@ class SQLBaseStoreTestCase(unittest.TestCase):
         # To fix isinstance(...) checks.
         fake_engine.__class__ = engine.__class__  # type: ignore[assignment]
 
-        db = DatabasePool(Mock(), Mock(config=db_config), fake_engine)
+        db = DatabasePool(Mock(), Mock(config=db_config, replica=None), fake_engine)
         db._db_pool = conn_pool
 
         self.datastore = SQLBaseStore(db, None, hs)  # type: ignore[arg-type]
@@ -179,6 +179,39 @@ class SQLBaseStoreTestCase(unittest.TestCase):
                 [("val1", "val2"), ("val3", "val4")],
             )
 
+    @defer.inlineCallbacks
+    def test_insert_many_large_batch(
+        self,
+    ) -> Generator["defer.Deferred[object]", object, None]:
+        """Large batches are inserted with `COPY` on postgres."""
+        values = [("val%d" % (i,), i) for i in range(COPY_MIN_ROWS - 2)]
+        values.append(("tab\tnew\nline\\", None))
+        values.append((True, b"\x01\xff"))
+
+        yield defer.ensureDeferred(
+            self.datastore.db_pool.simple_insert_many(
+                table="tablename",
+                keys=("col1", "col2"),
+                values=values,
+                desc="",
+            )
+        )
+
+        if USE_POSTGRES_FOR_TESTS:
+            self.mock_execute_values.assert_not_called()
+            self.mock_txn.copy_expert.assert_called_once()
+            sql, data = self.mock_txn.copy_expert.call_args[0]
+            self.assertEqual(sql, "COPY tablename (col1, col2) FROM STDIN")
+            lines = data.getvalue().split("\n")
+            self.assertEqual(lines[0], "val0\t0")
+            self.assertEqual(lines[-3], "tab\\tnew\\nline\\\\\t\\N")
+            self.assertEqual(lines[-2], "t\t\\\\x01ff")
+            self.assertEqual(lines[-1], "")
+        else:
+            self.mock_txn.executemany.assert_called_once_with(
+                "INSERT INTO tablename (col1, col2) VALUES(?, ?)", values
+            )
+
     @defer.inlineCallbacks
     def test_insert_many_no_iterable(
         self,
@@ -26,6 +26,9 @@ from twisted.internet import defer
 from twisted.internet.defer import CancelledError, Deferred
 from twisted.test.proto_helpers import MemoryReactor
 
+from synapse.api.constants import Direction
+from synapse.rest import admin
+from synapse.rest.client import login, room
 from synapse.server import HomeServer
 from synapse.storage.database import (
     DatabasePool,
@@ -286,3 +289,148 @@ class CancellationTestCase(unittest.HomeserverTestCase):
             ]
         )
         self.assertEqual(exception_callback.call_count, 6)  # no additional calls
+
+
+class ReplicaTestCase(unittest.HomeserverTestCase):
+    """Tests for routing transactions to a read replica."""
+
+    servlets = [
+        admin.register_servlets,
+        login.register_servlets,
+        room.register_servlets,
+    ]
+
+    def prepare(self, reactor: MemoryReactor, clock: Clock, hs: HomeServer) -> None:
+        self.store = hs.get_datastores().main
+        self.db_pool: DatabasePool = self.store.db_pool
+
+        # Stand in for a replica by wrapping the primary's connection pool.
+        primary_pool = self.db_pool._db_pool
+        self.replica_pool = Mock()
+        self.replica_pool.runWithConnection.side_effect = primary_pool.runWithConnection
+        self.replica_pool.threadID.side_effect = primary_pool.threadID
+
+    def test_no_replica(self) -> None:
+        """Without a replica, we never claim that it has caught up."""
+        self.assertFalse(self.db_pool.replica_has_caught_up_to({}))
+
+    def test_replica_has_caught_up_to(self) -> None:
+        """We only consider the replica to have caught up once each writer is
+        past the given position for that writer.
+        """
+        self.db_pool._replica_pool = self.replica_pool
+        self.db_pool._replica_stream_positions = {
+            "events": {"worker1": 5, "worker2": 7},
+            "backfill": {"worker1": -3},
+        }
+
+        self.assertTrue(
+            self.db_pool.replica_has_caught_up_to(
+                {"events": {"worker1": 5, "worker2": 7}}
+            )
+        )
+        # Only `worker2` is past 6.
+        self.assertFalse(
+            self.db_pool.replica_has_caught_up_to(
+                {"events": {"worker1": 6, "worker2": 6}}
+            )
+        )
+        self.assertTrue(
+            self.db_pool.replica_has_caught_up_to(
+                {"events": {"worker1": 5}, "backfill": {"worker1": -3}}
+            )
+        )
+        self.assertFalse(
+            self.db_pool.replica_has_caught_up_to({"backfill": {"worker1": -4}})
+        )
+
+        # Writers without a position on the replica haven't written anything.
+        self.assertTrue(
+            self.db_pool.replica_has_caught_up_to(
+                {"backfill": {"worker2": -1}, "unknown": {"worker1": 1}}
+            )
+        )
+        self.assertFalse(
+            self.db_pool.replica_has_caught_up_to({"backfill": {"worker2": -2}})
+        )
+        self.assertFalse(
+            self.db_pool.replica_has_caught_up_to({"unknown": {"worker1": 2}})
+        )
+
+    def test_allow_replica(self) -> None:
+        """Only transactions which allow it are run against the replica."""
+        self.db_pool._replica_pool = self.replica_pool
+
+        def _test_txn(txn: LoggingTransaction) -> int:
+            txn.execute("SELECT 1")
+            return 1
+
+        self.get_success(self.db_pool.runInteraction("test_primary", _test_txn))
+        self.replica_pool.runWithConnection.assert_not_called()
+
+        result = self.get_success(
+            self.db_pool.runInteraction("test_replica", _test_txn, allow_replica=True)
+        )
+        self.assertEqual(result, 1)
+        self.replica_pool.runWithConnection.assert_called_once()
+
+    def test_poll_replica_stream_positions(self) -> None:
+        """The positions in the replica's `stream_positions` are tracked."""
+        self.db_pool._replica_pool = self.replica_pool
+
+        self.get_success(
+            self.db_pool.simple_insert(
+                "stream_positions",
+                {
+                    "stream_name": "test_stream",
+                    "instance_name": "worker1",
+                    "stream_id": 10,
+                },
+            )
+        )
+
+        self.get_success(self.db_pool._poll_replica_stream_positions())
+
+        self.assertEqual(
+            self.db_pool._replica_stream_positions["test_stream"], {"worker1": 10}
+        )
+        self.assertTrue(
+            self.db_pool.replica_has_caught_up_to({"test_stream": {"worker1": 10}})
+        )
+
+    def test_paginate_room_events(self) -> None:
+        """Paginating a room's history uses the replica once it has caught up
+        with the events being paginated.
+        """
+        user_id = self.register_user("user", "pass")
+        tok = self.login("user", "pass")
+        room_id = self.helper.create_room_as(user_id, tok=tok)
+        self.helper.send(room_id, "message", tok=tok)
+
+        self.db_pool._replica_pool = self.replica_pool
+
+        def paginate() -> None:
+            from_key = self.store.get_room_max_token()
+            events, _, _ = self.get_success(
+                self.store.paginate_room_events_by_topological_ordering(
+                    room_id=room_id,
+                    from_key=from_key,
+                    direction=Direction.BACKWARDS,
+                    limit=10,
+                )
+            )
+            self.assertEqual(events[0].content["body"], "message")
+
+        # We haven't fetched the replica's positions yet, so we don't know
+        # whether it has caught up.
+        paginate()
+        self.replica_pool.runWithConnection.assert_not_called()
+
+        # Nothing has been backfilled, but that shouldn't stop us using the
+        # replica.
+        self.get_success(self.db_pool._poll_replica_stream_positions())
+        self.assertNotIn("backfill", self.db_pool._replica_stream_positions)
+        self.replica_pool.runWithConnection.reset_mock()
+
+        paginate()
+        self.replica_pool.runWithConnection.assert_called_once()
@@ -151,6 +151,48 @@ class DeviceStoreTestCase(HomeserverTestCase):
         # Check original device_ids are contained within these updates
         self._check_devices_in_updates(device_ids, device_updates)
 
+    def test_outbound_pokes_are_coalesced(self) -> None:
+        """Tests that when device updates are marked as sent to a destination, any
+        pokes waiting to be sent that are superseded by a later poke for the same
+        device are removed.
+        """
+        self.add_device_change("@user_id:test", ["device_id1"], "somehost")
+        sent_stream_id = self.store.get_device_stream_token()
+        self.add_device_change("@user_id:test", ["device_id1"], "somehost")
+        self.add_device_change("@user_id:test", ["device_id1"], "otherhost")
+        self.add_device_change("@user_id:test", ["device_id1"], "somehost")
+        self.add_device_change("@user_id:test", ["device_id2"], "somehost")
+
+        self.get_success(
+            self.store.mark_as_sent_devices_by_remote("somehost", sent_stream_id)
+        )
+
+        rows = self.get_success(
+            self.store.db_pool.simple_select_list(
+                table="device_lists_outbound_pokes",
+                keyvalues={"user_id": "@user_id:test"},
+                retcols=("destination", "device_id"),
+            )
+        )
+        self.assertCountEqual(
+            rows,
+            [
+                ("somehost", "device_id1"),
+                ("otherhost", "device_id1"),
+                ("somehost", "device_id2"),
+            ],
+        )
+
+        # The remaining pokes should still give an update for each device, which
+        # follows on from the update that was sent.
+        _, device_updates = self.get_success(
+            self.store.get_device_updates_by_remote(
+                "somehost", sent_stream_id, limit=100
+            )
+        )
+        self._check_devices_in_updates(["device_id1", "device_id2"], device_updates)
+        self.assertEqual(device_updates[0][1]["prev_id"], [sent_stream_id])
+
     def test_get_device_updates_by_remote_can_limit_properly(self) -> None:
         """
         Tests that `get_device_updates_by_remote` returns an appropriate
@@ -245,6 +245,53 @@ class EventFederationWorkerStoreTestCase(tests.unittest.HomeserverTestCase):
         for i in range(10):
             self.assertEqual("$event_%i:local" % (19 - i), r[i])
 
+    def test_get_prev_events_for_rooms(self) -> None:
+        """Test that `get_prev_events_for_rooms` returns the newest ten forward
+        extremities of each room, like `get_prev_events_for_room`.
+        """
+
+        def insert_event(txn: Cursor, room_id: str, i: int) -> None:
+            event_id = "$event_%s_%i:local" % (room_id, i)
+
+            txn.execute(
+                (
+                    "INSERT INTO events ("
+                    "   room_id, event_id, type, depth, topological_ordering,"
+                    "   content, processed, outlier, stream_ordering) "
+                    "VALUES (?, ?, 'm.test', ?, ?, 'test', ?, ?, ?)"
+                ),
+                (room_id, event_id, i, i, True, False, len(room_id) * 100 + i),
+            )
+
+            txn.execute(
+                (
+                    "INSERT INTO event_forward_extremities (room_id, event_id) "
+                    "VALUES (?, ?)"
+                ),
+                (room_id, event_id),
+            )
+
+        for room_id, count in (("!a:local", 20), ("!bb:local", 3)):
+            for i in range(count):
+                self.get_success(
+                    self.store.db_pool.runInteraction(
+                        "insert", insert_event, room_id, i
+                    )
+                )
+
+        r = self.get_success(
+            self.store.get_prev_events_for_rooms(
+                ["!a:local", "!bb:local", "!missing:local"]
+            )
+        )
+        self.assertEqual(
+            r,
+            {
+                "!a:local": ["$event_!a:local_%i:local" % (19 - i) for i in range(10)],
+                "!bb:local": ["$event_!bb:local_%i:local" % (2 - i) for i in range(3)],
+            },
+        )
+
     def test_get_rooms_with_many_extremities(self) -> None:
         room1 = "#room1"
         room2 = "#room2"
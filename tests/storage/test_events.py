@@ -21,6 +21,7 @@
 
 import logging
 from typing import List, Optional
+from unittest.mock import Mock, patch
 
 from twisted.test.proto_helpers import MemoryReactor
 
@@ -31,10 +32,12 @@ from synapse.federation.federation_base import event_from_pdu_json
 from synapse.rest import admin
 from synapse.rest.client import login, room
 from synapse.server import HomeServer
+from synapse.storage.controllers import persist_events
 from synapse.types import StateMap
+from synapse.types.state import StateFilter
 from synapse.util import Clock
 
-from tests.unittest import HomeserverTestCase
+from tests.unittest import HomeserverTestCase, override_config
 
 logger = logging.getLogger(__name__)
 
@@ -484,3 +487,148 @@ class InvalideUsersInRoomCacheTestCase(HomeserverTestCase):
 
         users = self.get_success(self.store.get_users_in_room(room_id))
         self.assertEqual(users, [])
+
+
+class CrossRoomPersistBatchingTestCase(HomeserverTestCase):
+    servlets = [
+        admin.register_servlets,
+        room.register_servlets,
+        login.register_servlets,
+    ]
+
+    def prepare(
+        self, reactor: MemoryReactor, clock: Clock, homeserver: HomeServer
+    ) -> None:
+        persistence = self.hs.get_storage_controllers().persistence
+        assert persistence is not None
+        self._persistence = persistence
+        self.store = self.hs.get_datastores().main
+
+    @override_config({"event_persistence_batching_window": "10ms"})
+    @patch.object(persist_events, "CROSS_ROOM_PERSIST_QUEUE_SHARDS", 1)
+    def test_events_in_different_rooms_share_a_transaction(self) -> None:
+        """Events sent to different rooms within the batching window are
+        persisted together.
+        """
+        self.register_user("user", "pass")
+        token = self.login("user", "pass")
+
+        room_id_1 = self.helper.create_room_as("user", tok=token)
+        room_id_2 = self.helper.create_room_as("user", tok=token)
+
+        persist_events_store = self._persistence.persist_events_store
+        orig = persist_events_store._persist_events_and_state_updates_for_rooms
+        batch_sizes: List[int] = []
+
+        async def _spy(rooms, **kwargs):  # type: ignore[no-untyped-def]
+            batch_sizes.append(len(rooms))
+            return await orig(rooms, **kwargs)
+
+        persist_events_store._persist_events_and_state_updates_for_rooms = _spy  # type: ignore[method-assign]
+
+        channels = [
+            self.make_request(
+                "PUT",
+                f"/rooms/{room_id}/send/m.room.message/txn{i}",
+                {"msgtype": "m.text", "body": "hello"},
+                access_token=token,
+                await_result=False,
+            )
+            for i, room_id in enumerate((room_id_1, room_id_2))
+        ]
+        self.reactor.advance(1)
+
+        for channel in channels:
+            channel.await_result()
+            self.assertEqual(channel.code, 200, channel.json_body)
+            event = self.get_success(
+                self.store.get_event(channel.json_body["event_id"])
+            )
+            self.assertEqual(event.content["body"], "hello")
+
+        self.assertEqual(batch_sizes, [2])
+
+    @override_config({"event_persistence_batching_window": "10ms"})
+    @patch.object(persist_events, "CROSS_ROOM_PERSIST_QUEUE_SHARDS", 1)
+    def test_failure_after_commit_is_not_retried(self) -> None:
+        """If persisting a batch fails after its transaction was committed, the
+        rooms are not persisted again one at a time.
+        """
+        self.register_user("user", "pass")
+        token = self.login("user", "pass")
+
+        room_id_1 = self.helper.create_room_as("user", tok=token)
+        room_id_2 = self.helper.create_room_as("user", tok=token)
+
+        persist_events_store = self._persistence.persist_events_store
+        orig = persist_events_store._persist_events_and_state_updates_for_rooms
+        batch_sizes: List[int] = []
+
+        async def _fail_after_commit(rooms, **kwargs):  # type: ignore[no-untyped-def]
+            batch_sizes.append(len(rooms))
+            await orig(rooms, **kwargs)
+            raise Exception("failed after commit")
+
+        persist_events_store._persist_events_and_state_updates_for_rooms = (  # type: ignore[method-assign]
+            _fail_after_commit
+        )
+
+        channels = [
+            self.make_request(
+                "PUT",
+                f"/rooms/{room_id}/send/m.room.message/txn{i}",
+                {"msgtype": "m.text", "body": "hello"},
+                access_token=token,
+                await_result=False,
+            )
+            for i, room_id in enumerate((room_id_1, room_id_2))
+        ]
+        self.reactor.advance(1)
+
+        for channel in channels:
+            channel.await_result()
+            self.assertEqual(channel.code, 500, channel.json_body)
+
+        self.assertEqual(batch_sizes, [2])
+
+
+class StateDeltaFromContextTestCase(HomeserverTestCase):
+    servlets = [
+        admin.register_servlets,
+        room.register_servlets,
+        login.register_servlets,
+    ]
+
+    def prepare(
+        self, reactor: MemoryReactor, clock: Clock, homeserver: HomeServer
+    ) -> None:
+        persistence = self.hs.get_storage_controllers().persistence
+        assert persistence is not None
+        self._persistence = persistence
+        self.store = self.hs.get_datastores().main
+
+    def test_local_state_event_reuses_context(self) -> None:
+        """A state event created on top of the current forward extremities
+        updates the current state without recalculating it.
+        """
+        self.register_user("user", "pass")
+        token = self.login("user", "pass")
+        room_id = self.helper.create_room_as("user", tok=token)
+
+        get_new_state_after_events = Mock(
+            side_effect=self._persistence._get_new_state_after_events
+        )
+        self._persistence._get_new_state_after_events = get_new_state_after_events  # type: ignore[method-assign]
+
+        body = self.helper.send_state(
+            room_id, EventTypes.Topic, {"topic": "A topic"}, tok=token
+        )
+
+        get_new_state_after_events.assert_not_called()
+
+        state = self.get_success(
+            self.store.get_partial_filtered_current_state_ids(
+                room_id, StateFilter.from_types([(EventTypes.Topic, "")])
+            )
+        )
+        self.assertEqual(state, {(EventTypes.Topic, ""): body["event_id"]})
@@ -19,6 +19,7 @@
 #
 #
 from typing import Dict, List, Optional
+from unittest.mock import patch
 
 from twisted.test.proto_helpers import MemoryReactor
 
@@ -29,7 +30,10 @@ from synapse.storage.database import (
     LoggingTransaction,
 )
 from synapse.storage.types import Cursor
-from synapse.storage.util.id_generators import MultiWriterIdGenerator
+from synapse.storage.util.id_generators import (
+    STREAM_POSITIONS_REFRESH_INTERVAL_MS,
+    MultiWriterIdGenerator,
+)
 from synapse.storage.util.sequence import (
     LocalSequenceGenerator,
     PostgresSequenceGenerator,
@@ -37,7 +41,7 @@ from synapse.storage.util.sequence import (
 )
 from synapse.util import Clock
 
-from tests.unittest import HomeserverTestCase
+from tests.unittest import HomeserverTestCase, override_config
 from tests.utils import USE_POSTGRES_FOR_TESTS
 
 
@@ -291,6 +295,44 @@ class MultiWriterIdGeneratorTestCase(MultiWriterIdGeneratorBase):
         self.assertEqual(id_gen.get_positions(), {"master": 8})
         self.assertEqual(id_gen.get_current_token_for_writer("master"), 8)
 
+    @override_config({"stream_id_block_size": 3})
+    def test_block_allocation(self) -> None:
+        """Test that stream IDs are reserved in blocks, and that the current
+        position doesn't include reserved IDs that haven't been used yet.
+        """
+
+        # Prefill table with 7 rows written by 'master'
+        self._insert_rows("master", 7)
+
+        id_gen = self._create_id_generator()
+
+        async def _get_next_async(expected_stream_id: int) -> None:
+            async with id_gen.get_next() as stream_id:
+                self.assertEqual(stream_id, expected_stream_id)
+
+        # The first call reserves 8 to 10, but we've only used 8.
+        self.get_success(_get_next_async(8))
+        self.assertEqual(id_gen.get_positions(), {"master": 8})
+        self.assertEqual(id_gen.get_current_token_for_writer("master"), 8)
+
+        # The rest of the block is handed out without going to the database.
+        with patch.object(
+            self.db_pool, "runInteraction", wraps=self.db_pool.runInteraction
+        ) as mock_run_interaction:
+            self.get_success(_get_next_async(9))
+            self.get_success(_get_next_async(10))
+        self.assertNotIn(
+            "_load_next_mult_id",
+            [call.args[0] for call in mock_run_interaction.call_args_list],
+        )
+
+        self.assertEqual(id_gen.get_positions(), {"master": 10})
+        self.assertEqual(id_gen.get_current_token_for_writer("master"), 10)
+
+        # Once the block is used up we fetch another one.
+        self.get_success(_get_next_async(11))
+        self.assertEqual(id_gen.get_positions(), {"master": 11})
+
     def test_restart_during_out_of_order_persistence(self) -> None:
         """Test that restarting a process while another process is writing out
         of order updates are handled correctly.
@@ -498,6 +540,42 @@ class WorkerMultiWriterIdGeneratorTestCase(MultiWriterIdGeneratorBase):
         second_id_gen.advance("first", 8)
         self.assertEqual(second_id_gen.get_positions(), {"first": 8, "second": 9})
 
+    @override_config({"stream_id_block_size": 3})
+    def test_multi_instance_block_allocation(self) -> None:
+        """Test that a writer drops its reserved stream IDs once another writer
+        has moved the stream past them.
+        """
+        self._insert_rows("first", 3)
+        first_id_gen = self._create_id_generator("first", writers=["first", "second"])
+
+        self._insert_rows("second", 4)
+        second_id_gen = self._create_id_generator("second", writers=["first", "second"])
+
+        self._replicate_all()
+
+        async def _get_next_async(
+            id_gen: MultiWriterIdGenerator, expected_stream_id: int
+        ) -> None:
+            async with id_gen.get_next() as stream_id:
+                self.assertEqual(stream_id, expected_stream_id)
+
+        # The first writer reserves 8 to 10, and only uses 8. It must not claim
+        # to be past the IDs it might still use.
+        self.get_success(_get_next_async(first_id_gen, 8))
+        self.assertEqual(first_id_gen.get_current_token_for_writer("first"), 8)
+
+        # The second writer reserves 11 to 13.
+        self.get_success(_get_next_async(second_id_gen, 11))
+        self.assertEqual(second_id_gen.get_current_token_for_writer("second"), 11)
+
+        # The second writer has moved the stream past the IDs the first writer
+        # had reserved, so the first writer drops them and catches up.
+        self._replicate_all()
+        self.assertEqual(first_id_gen.get_current_token_for_writer("first"), 11)
+        self.assertEqual(first_id_gen.get_persisted_upto_position(), 11)
+
+        self.get_success(_get_next_async(first_id_gen, 14))
+
     def test_multi_instance_empty_row(self) -> None:
         """Test that reads and writes from multiple processes are handled
         correctly, when one of the writers starts without any rows.
@@ -633,6 +711,35 @@ class WorkerMultiWriterIdGeneratorTestCase(MultiWriterIdGeneratorBase):
         self.assertEqual(second_id_gen.get_positions(), {"first": 3, "second": 7})
         self.assertEqual(second_id_gen.get_minimal_local_current_token(), 7)
 
+    def test_idle_writer_refreshes_stream_positions(self) -> None:
+        """Test that a writer that isn't writing to the stream still moves its
+        row in `stream_positions` forward as other writers write.
+        """
+        self._insert_rows("first", 3)
+        first_id_gen = self._create_id_generator("first", writers=["first", "second"])
+
+        self._insert_rows("second", 4)
+        self._create_id_generator("second", writers=["first", "second"])
+
+        self._replicate_all()
+
+        self.assertEqual(first_id_gen.get_current_token_for_writer("first"), 7)
+
+        def _get_stream_position() -> int:
+            return self.get_success(
+                self.db_pool.simple_select_one_onecol(
+                    table="stream_positions",
+                    keyvalues={"stream_name": "test_stream", "instance_name": "first"},
+                    retcol="stream_id",
+                )
+            )
+
+        self.assertEqual(_get_stream_position(), 3)
+
+        self.reactor.advance(STREAM_POSITIONS_REFRESH_INTERVAL_MS / 1000)
+
+        self.assertEqual(_get_stream_position(), 7)
+
     def test_current_token_gap(self) -> None:
         """Test that getting the current token for a writer returns the maximal
         token when there are no writes.
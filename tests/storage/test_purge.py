@@ -17,6 +17,7 @@
 # [This file includes modifications made by New Vector Limited]
 #
 #
+from unittest.mock import patch
 
 from twisted.test.proto_helpers import MemoryReactor
 
@@ -128,3 +129,115 @@ class PurgeTests(HomeserverTestCase):
         self.store._invalidate_local_get_event_cache(create_event.event_id)
         self.get_failure(self.store.get_event(create_event.event_id), NotFoundError)
         self.get_failure(self.store.get_event(first["event_id"]), NotFoundError)
+
+    def test_purge_room_in_batches(self) -> None:
+        """
+        Purging a room in small batches will still delete everything about it.
+        """
+        event_ids = [
+            self.helper.send(self.room_id, body=f"test{i}")["event_id"]
+            for i in range(5)
+        ]
+
+        with (
+            patch(
+                "synapse.storage.databases.main.purge_events.PURGE_ROOM_EVENTS_BATCH_SIZE",
+                2,
+            ),
+            patch(
+                "synapse.storage.databases.state.store.PURGE_STATE_GROUPS_BATCH_SIZE",
+                2,
+            ),
+        ):
+            self.get_success(
+                self._storage_controllers.purge_events.purge_room(self.room_id),
+                by=0.1,
+            )
+
+        # Nothing is left of the room's events...
+        for table in ("events", "event_json", "event_edges"):
+            rows = self.get_success(
+                self.store.db_pool.simple_select_many_batch(
+                    table=table,
+                    column="event_id",
+                    iterable=event_ids,
+                    retcols=("event_id",),
+                )
+            )
+            self.assertEqual(rows, [], table)
+
+        # ... or its state.
+        state_store = self.hs.get_datastores().state
+        rows = self.get_success(
+            state_store.db_pool.simple_select_list(
+                table="state_groups",
+                keyvalues={"room_id": self.room_id},
+                retcols=("id",),
+            )
+        )
+        self.assertEqual(rows, [])
+
+    def test_resume_interrupted_state_group_purge(self) -> None:
+        """
+        State groups which were due to be deleted by an interrupted purge get
+        deleted the next time the room's history is purged.
+        """
+        state_store = self.hs.get_datastores().state
+
+        state_group1 = self.get_success(
+            state_store.store_state_group(
+                "$create", self.room_id, None, None, {("m.room.create", ""): "$create"}
+            )
+        )
+        state_group2 = self.get_success(
+            state_store.store_state_group(
+                "$name",
+                self.room_id,
+                state_group1,
+                {("m.room.name", ""): "$name"},
+                None,
+            )
+        )
+
+        # Simulate a purge which was interrupted after finding the state groups
+        # to delete.
+        self.get_success(
+            state_store.db_pool.runInteraction(
+                "test_record_pending",
+                state_store._record_state_groups_pending_purge_txn,
+                self.room_id,
+                [state_group1],
+            )
+        )
+
+        self.get_success(
+            state_store.purge_unreferenced_state_groups(self.room_id, set())
+        )
+
+        rows = self.get_success(
+            state_store.db_pool.simple_select_onecol(
+                table="state_groups",
+                keyvalues={"room_id": self.room_id},
+                retcol="id",
+            )
+        )
+        self.assertNotIn(state_group1, rows)
+        self.assertIn(state_group2, rows)
+
+        rows = self.get_success(
+            state_store.db_pool.simple_select_onecol(
+                table="state_groups_pending_purge",
+                keyvalues={"room_id": self.room_id},
+                retcol="state_group",
+            )
+        )
+        self.assertEqual(rows, [])
+
+        # The remaining state group was de-delta-ed and still has its full state.
+        state_store._state_group_cache.invalidate_all()
+        state_store._state_group_members_cache.invalidate_all()
+        state = self.get_success(state_store._get_state_for_groups([state_group2]))
+        self.assertEqual(
+            state[state_group2],
+            {("m.room.create", ""): "$create", ("m.room.name", ""): "$name"},
+        )
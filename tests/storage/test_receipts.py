@@ -20,12 +20,18 @@
 #
 
 from typing import Collection, Optional
+from unittest.mock import patch
 
 from twisted.test.proto_helpers import MemoryReactor
 
-from synapse.api.constants import ReceiptTypes
+from synapse.api.constants import EduTypes, ReceiptTypes
 from synapse.server import HomeServer
-from synapse.types import UserID, create_requester
+from synapse.types import (
+    MultiWriterStreamToken,
+    ReadReceipt,
+    UserID,
+    create_requester,
+)
 from synapse.util import Clock
 
 from tests.test_utils.event_injection import create_event
@@ -307,3 +313,181 @@ class ReceiptTestCase(HomeserverTestCase):
             [ReceiptTypes.READ, ReceiptTypes.READ_PRIVATE], room_id=self.room_id2
         )
         self.assertEqual(res, event2_1_id)
+
+    def test_insert_receipts(self) -> None:
+        """Test that a batch of receipts is persisted in one go, skipping receipts
+        which are older than ones already persisted.
+        """
+        event1_1_id = self.create_and_send_event(
+            self.room_id1, UserID.from_string(OTHER_USER_ID)
+        )
+        event1_2_id = self.create_and_send_event(
+            self.room_id1, UserID.from_string(OTHER_USER_ID)
+        )
+        event2_1_id = self.create_and_send_event(
+            self.room_id2, UserID.from_string(OTHER_USER_ID)
+        )
+
+        stream_ids = self.get_success(
+            self.store.insert_receipts(
+                [
+                    ReadReceipt(
+                        self.room_id1,
+                        ReceiptTypes.READ,
+                        OUR_USER_ID,
+                        [event1_2_id],
+                        None,
+                        {},
+                    ),
+                    # This is older than the previous receipt, so is ignored.
+                    ReadReceipt(
+                        self.room_id1,
+                        ReceiptTypes.READ,
+                        OUR_USER_ID,
+                        [event1_1_id],
+                        None,
+                        {},
+                    ),
+                    ReadReceipt(
+                        self.room_id2,
+                        ReceiptTypes.READ,
+                        OUR_USER_ID,
+                        [event2_1_id],
+                        None,
+                        {},
+                    ),
+                ]
+            )
+        )
+        self.assertIsNotNone(stream_ids[0])
+        self.assertIsNone(stream_ids[1])
+        self.assertIsNotNone(stream_ids[2])
+
+        res = self.get_success(
+            self.store.get_receipts_for_user(OUR_USER_ID, [ReceiptTypes.READ])
+        )
+        self.assertEqual(res, {self.room_id1: event1_2_id, self.room_id2: event2_1_id})
+
+    def test_get_linearized_receipts_for_rooms_in_range(self) -> None:
+        """Test that only receipts within the given stream range are returned,
+        including when the receipts in the room have already been cached.
+        """
+        event1_1_id = self.create_and_send_event(
+            self.room_id1, UserID.from_string(OTHER_USER_ID)
+        )
+        event2_1_id = self.create_and_send_event(
+            self.room_id2, UserID.from_string(OTHER_USER_ID)
+        )
+
+        position1 = self.get_success(
+            self.store.insert_receipt(
+                self.room_id1, ReceiptTypes.READ, OUR_USER_ID, [event1_1_id], None, {}
+            )
+        )
+        assert position1 is not None
+        token1 = MultiWriterStreamToken(stream=position1.stream)
+
+        # Populate the caches for both rooms.
+        res = self.get_success(
+            self.store.get_linearized_receipts_for_rooms(
+                [self.room_id1, self.room_id2], to_key=token1
+            )
+        )
+        self.assertEqual([r["room_id"] for r in res], [self.room_id1])
+
+        position2 = self.get_success(
+            self.store.insert_receipt(
+                self.room_id2, ReceiptTypes.READ, OUR_USER_ID, [event2_1_id], None, {}
+            )
+        )
+        assert position2 is not None
+        token2 = MultiWriterStreamToken(stream=position2.stream)
+
+        # Only the receipt in the second room is after `token1`.
+        res = self.get_success(
+            self.store.get_linearized_receipts_for_rooms(
+                [self.room_id1, self.room_id2], to_key=token2, from_key=token1
+            )
+        )
+        self.assertEqual(
+            res,
+            [
+                {
+                    "room_id": self.room_id2,
+                    "type": EduTypes.RECEIPT,
+                    "content": {event2_1_id: {ReceiptTypes.READ: {OUR_USER_ID: {}}}},
+                }
+            ],
+        )
+
+        # Both receipts are up to `token2`, and receipts after `to_key` are
+        # excluded.
+        res = self.get_success(
+            self.store.get_linearized_receipts_for_rooms(
+                [self.room_id1, self.room_id2], to_key=token2
+            )
+        )
+        self.assertCountEqual(
+            [r["room_id"] for r in res], [self.room_id1, self.room_id2]
+        )
+        res = self.get_success(
+            self.store.get_linearized_receipts_for_room(self.room_id2, to_key=token1)
+        )
+        self.assertEqual(res, [])
+
+    def test_new_receipt_updates_room_cache(self) -> None:
+        """Test that a new receipt in a room updates the cached receipts for the
+        room, rather than causing all of the room's receipts to be reloaded.
+        """
+        event1_1_id = self.create_and_send_event(
+            self.room_id1, UserID.from_string(OTHER_USER_ID)
+        )
+        event1_2_id = self.create_and_send_event(
+            self.room_id1, UserID.from_string(OTHER_USER_ID)
+        )
+
+        position1 = self.get_success(
+            self.store.insert_receipt(
+                self.room_id1, ReceiptTypes.READ, OUR_USER_ID, [event1_1_id], None, {}
+            )
+        )
+        assert position1 is not None
+        token1 = MultiWriterStreamToken(stream=position1.stream)
+
+        # Populate the cache for the room.
+        self.get_success(
+            self.store.get_linearized_receipts_for_room(self.room_id1, to_key=token1)
+        )
+
+        position2 = self.get_success(
+            self.store.insert_receipt(
+                self.room_id1, ReceiptTypes.READ, OUR_USER_ID, [event1_2_id], None, {}
+            )
+        )
+        assert position2 is not None
+        token2 = MultiWriterStreamToken(stream=position2.stream)
+
+        with patch.object(
+            self.store.db_pool,
+            "runInteraction",
+            wraps=self.store.db_pool.runInteraction,
+        ) as mock_run_interaction:
+            res = self.get_success(
+                self.store.get_linearized_receipts_for_room(
+                    self.room_id1, to_key=token2, from_key=token1
+                )
+            )
+
+        # The new receipt replaced the old one in the cache, and nothing was
+        # fetched from the database.
+        mock_run_interaction.assert_not_called()
+        self.assertEqual(
+            res,
+            [
+                {
+                    "room_id": self.room_id1,
+                    "type": EduTypes.RECEIPT,
+                    "content": {event1_2_id: {ReceiptTypes.READ: {OUR_USER_ID: {}}}},
+                }
+            ],
+        )
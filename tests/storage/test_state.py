@@ -34,7 +34,7 @@ from synapse.types import JsonDict, RoomID, StateMap, UserID
 from synapse.types.state import StateFilter
 from synapse.util import Clock
 
-from tests.unittest import HomeserverTestCase
+from tests.unittest import HomeserverTestCase, override_config
 
 logger = logging.getLogger(__name__)
 
@@ -643,3 +643,122 @@ class StateStoreTestCase(HomeserverTestCase):
                     ),
                 )
                 self.assertEqual(context.state_group_before_event, groups[0][0])
+
+    @override_config({"state_group_snapshot_interval": "10m"})
+    def test_snapshot_frequently_read_state_group(self) -> None:
+        """A frequently read state group at the end of a long delta chain gets
+        rewritten to store its full state.
+        """
+        room_id = self.room.to_string()
+
+        # Build a long chain of state groups, each adding a member.
+        state: StateMap[str] = {(EventTypes.Create, ""): "$create"}
+        state_group = self.get_success(
+            self.state_datastore.store_state_group(
+                "$create", room_id, None, None, state
+            )
+        )
+        for i in range(15):
+            delta = {(EventTypes.Member, f"@user{i}:test"): f"$member{i}"}
+            state = {**state, **delta}
+            state_group = self.get_success(
+                self.state_datastore.store_state_group(
+                    f"$member{i}", room_id, state_group, delta, None
+                )
+            )
+
+        def load_state_group() -> None:
+            self.state_datastore._state_group_cache.invalidate_all()
+            self.state_datastore._state_group_members_cache.invalidate_all()
+            self.get_success(self.state_datastore._get_state_for_groups([state_group]))
+
+        # Load the state group from the database a bunch of times. The reads
+        # are added up in the database, so that reads on other workers count
+        # too.
+        for _ in range(5):
+            load_state_group()
+        self.get_success(self.state_datastore._flush_state_group_reads())
+
+        reads = self.get_success(
+            self.state_datastore.db_pool.simple_select_one_onecol(
+                table="state_group_reads",
+                keyvalues={"state_group": state_group},
+                retcol="reads",
+            )
+        )
+        self.assertEqual(reads, 5)
+
+        for _ in range(5):
+            load_state_group()
+
+        self.get_success(self.state_datastore._snapshot_frequently_read_state_groups())
+
+        # The counts are reset for the next run.
+        rows = self.get_success(
+            self.state_datastore.db_pool.simple_select_list(
+                table="state_group_reads", keyvalues=None, retcols=("state_group",)
+            )
+        )
+        self.assertEqual(rows, [])
+
+        # The state group should no longer be a delta.
+        prev_group = self.get_success(
+            self.state_datastore.db_pool.simple_select_one_onecol(
+                table="state_group_edges",
+                keyvalues={"state_group": state_group},
+                retcol="prev_state_group",
+                allow_none=True,
+            )
+        )
+        self.assertIsNone(prev_group)
+
+        # ... but still have the same state.
+        self.state_datastore._state_group_cache.invalidate_all()
+        self.state_datastore._state_group_members_cache.invalidate_all()
+        state_by_group = self.get_success(
+            self.state_datastore._get_state_for_groups([state_group])
+        )
+        self.assertEqual(state_by_group[state_group], state)
+
+    def test_wildcard_type_lookup_is_cached(self) -> None:
+        """Fetching all the state of a particular type for a state group caches
+        it, without fetching the rest of the state.
+        """
+        self.inject_state_event(self.room, self.u_alice, EventTypes.Create, "", {})
+        e2 = self.inject_state_event(
+            self.room, self.u_alice, EventTypes.Name, "", {"name": "test room"}
+        )
+        e3 = self.inject_state_event(
+            self.room,
+            self.u_alice,
+            EventTypes.Member,
+            self.u_alice.to_string(),
+            {"membership": Membership.JOIN},
+        )
+
+        group_ids = self.get_success(
+            self.storage.state.get_state_groups_ids(
+                self.room.to_string(), [e3.event_id]
+            )
+        )
+        group = list(group_ids.keys())[0]
+
+        self.state_datastore._state_group_cache.invalidate_all()
+        self.state_datastore._state_group_members_cache.invalidate_all()
+
+        state_filter = StateFilter.from_types([(EventTypes.Name, None)])
+        state = self.get_success(
+            self.state_datastore._get_state_for_groups([group], state_filter)
+        )
+        self.assertEqual(state[group], {(EventTypes.Name, ""): e2.event_id})
+
+        # Only the requested type should have been cached...
+        cache_entry = self.state_datastore._state_group_cache.get(group)
+        self.assertFalse(cache_entry.full)
+
+        # ... but the same lookup can now be answered from the cache.
+        state_dict, is_all = self.state_datastore._get_state_for_group_using_cache(
+            self.state_datastore._state_group_cache, group, state_filter
+        )
+        self.assertTrue(is_all)
+        self.assertEqual(state_dict, {(EventTypes.Name, ""): e2.event_id})
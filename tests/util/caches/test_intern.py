@@ -0,0 +1,40 @@
+#
+# This file is licensed under the Affero General Public License (AGPL) version 3.
+#
+# Copyright (C) 2026 New Vector, Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# See the GNU Affero General Public License for more details:
+# <https://www.gnu.org/licenses/agpl-3.0.html>.
+#
+#
+
+from unittest.mock import patch
+
+from synapse.util.caches import intern_state_key
+
+from tests import unittest
+
+
+class InternStateKeyTestCase(unittest.TestCase):
+    def test_same_pair_is_shared(self) -> None:
+        key1 = intern_state_key("m.room." + "member", "@alice" + ":test")
+        key2 = intern_state_key("m.room." + "member", "@alice" + ":test")
+
+        self.assertEqual(key1, ("m.room.member", "@alice:test"))
+        self.assertIs(key1, key2)
+
+    def test_table_is_bounded(self) -> None:
+        with patch("synapse.util.caches.STATE_KEY_INTERN_TABLE_MAX_SIZE", 2):
+            key1 = intern_state_key("m.room.member", "@bounded1:test")
+            intern_state_key("m.room.member", "@bounded2:test")
+            intern_state_key("m.room.member", "@bounded3:test")
+
+            # The table was emptied, so we get back a new tuple.
+            key1_again = intern_state_key("m.room.member", "@bounded1:" + "test")
+            self.assertEqual(key1, key1_again)
+            self.assertIsNot(key1, key1_again)
@@ -126,3 +126,50 @@ class DictCacheTestCase(unittest.TestCase):
         r = self.cache.get(key, dict_keys=["a"])
         self.assertFalse(r.full)
         self.assertEqual(r.value, {"a": "b"})
+
+    def test_types(self) -> None:
+        """Test that the cache can track that it has all the keys of a type."""
+        cache: DictionaryCache[str, str, str] = DictionaryCache(
+            "types", max_entries=10, dict_key_type=lambda dict_key: dict_key[0]
+        )
+        key = "test_types"
+
+        # Nothing is cached to start with.
+        self.assertIsNone(cache.get_for_types(key, ["a"]))
+
+        # Cache all the "a" keys, and an explicit "b" key.
+        seq = cache.sequence
+        cache.update(
+            seq,
+            key,
+            {"a1": "x", "a2": "y", "b1": "z"},
+            fetched_keys=["b1"],
+            fetched_types=["a"],
+        )
+
+        self.assertEqual(cache.get_for_types(key, ["a"]), {"a1": "x", "a2": "y"})
+        self.assertIsNone(cache.get_for_types(key, ["a", "b"]))
+        self.assertEqual(cache.get(key, ["b1"]).value, {"b1": "z"})
+
+        # The "a" keys are only stored in the entry for their type, and so
+        # only count once towards the size of the cache.
+        self.assertEqual(len(cache.cache), 3)
+
+        # ... but can still be looked up explicitly.
+        r = cache.get(key, ["a1", "a3", "b1"])
+        self.assertFalse(r.full)
+        self.assertEqual(r.value, {"a1": "x", "b1": "z"})
+        self.assertEqual(r.known_absent, {"a3"})
+
+        # A type with no keys is cached as being empty.
+        cache.update(seq, key, {}, fetched_keys=[], fetched_types=["c"])
+        self.assertEqual(cache.get_for_types(key, ["c"]), {})
+
+        # Lookups can be answered from the full dict.
+        other_key = "test_types_full"
+        cache.update(seq, other_key, {"a1": "x", "b1": "z"})
+        self.assertEqual(cache.get_for_types(other_key, ["b"]), {"b1": "z"})
+
+        # Invalidating the key drops the entries for each type.
+        cache.invalidate(key)
+        self.assertIsNone(cache.get_for_types(key, ["a"]))